@@ -0,0 +1,144 @@
+# api_server.py
+"""
+Headless HTTP API for ingesting videos and asking questions.
+
+Run with:
+    uvicorn api_server:app --host 0.0.0.0 --port 8000 --workers 1
+
+The service is stateless apart from the shared caches (open indexes,
+embedding model, LLM gateway and response cache), so more replicas can be
+added behind a load balancer.
+"""
+
+import sys
+import os
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from contextlib import asynccontextmanager
+from typing import List, Optional
+from dotenv import load_dotenv
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+from utils import extract_video_id
+from rag_pipeline import get_answer, stream_answer, get_transcript_summary, open_index
+from ingest_jobs import submit_ingest, submit_manual_ingest, get_job
+from llm_gateway import get_default_llm
+import telemetry
+import warmup
+
+# Load environment variables
+load_dotenv()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Preload popular videos in the background on startup (see warmup.py)."""
+    warmup.start_warmup()
+    yield
+
+
+app = FastAPI(title="YouTube RAG Chatbot API", lifespan=lifespan)
+
+
+class IngestRequest(BaseModel):
+    url: Optional[str] = None
+    video_id: Optional[str] = None
+    transcript: Optional[str] = None
+
+
+class AskRequest(BaseModel):
+    video_id: Optional[str] = None
+    video_ids: Optional[List[str]] = None   # Ask across several videos
+    question: str
+    stream: bool = False
+
+
+def _require_index(video_id: str):
+    """Get the index for a video or fail with 404."""
+    vector_store = open_index(video_id)
+    if vector_store is None:
+        raise HTTPException(status_code=404, detail=f"Video {video_id} has not been ingested")
+    return vector_store
+
+
+@app.get("/health")
+def health():
+    return {"status": "ok"}
+
+
+@app.get("/ready")
+def ready():
+    """Readiness: 200 once the warm-up has finished, 503 while it runs."""
+    status = warmup.warm_status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Per-stage pipeline metrics in Prometheus text format."""
+    return PlainTextResponse(telemetry.render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.post("/ingest", status_code=202)
+def ingest(request: IngestRequest):
+    """Queue a video (by URL or ID) or a raw transcript for ingestion."""
+    llm = get_default_llm()
+
+    if request.transcript:
+        job_id = submit_manual_ingest(request.transcript, llm=llm)
+    else:
+        video_id = request.video_id or (extract_video_id(request.url) if request.url else None)
+        if not video_id:
+            raise HTTPException(status_code=400, detail="Provide a valid YouTube url, video_id or transcript")
+        job_id = submit_ingest(video_id, llm=llm)
+        warmup.record_access(video_id, "ingest")
+
+    job = get_job(job_id)
+    return job.snapshot()
+
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    """Progress of an ingestion job."""
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    return job.snapshot()
+
+
+# Plain (not async) handlers: opening indexes, recording accesses and
+# answering all block, so FastAPI runs them in its thread pool
+@app.post("/ask")
+def ask(request: AskRequest):
+    """Answer a question about one or more ingested videos, optionally streamed as plain text."""
+    video_ids = list(dict.fromkeys(request.video_ids or ([request.video_id] if request.video_id else [])))
+    if not video_ids:
+        raise HTTPException(status_code=400, detail="Provide a video_id or video_ids")
+    vector_stores = [_require_index(video_id) for video_id in video_ids]
+    for video_id in video_ids:
+        warmup.record_access(video_id, "ask")
+    llm = get_default_llm()
+
+    if request.stream:
+        # Sync generators are iterated in a worker thread by Starlette
+        return StreamingResponse(
+            stream_answer(request.question, vector_stores, llm),
+            media_type="text/plain; charset=utf-8",
+        )
+
+    answer = get_answer(request.question, vector_stores, llm)
+    if len(video_ids) > 1:
+        return {"video_ids": video_ids, "question": request.question, "answer": answer}
+    return {"video_id": video_ids[0], "question": request.question, "answer": answer}
+
+
+@app.get("/summary/{video_id}")
+def summary(video_id: str):
+    """Summary of an ingested video (precomputed when available)."""
+    vector_store = _require_index(video_id)
+    warmup.record_access(video_id, "summary")
+    text = get_transcript_summary(vector_store, get_default_llm())
+    return {"video_id": video_id, "summary": text}
@@ -6,11 +6,17 @@ import os
 # Add current directory to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+import uuid
 import streamlit as st
 from dotenv import load_dotenv
-from utils import extract_video_id, get_transcript
-from rag_pipeline import process_transcript, get_answer, get_transcript_summary
-from langchain_openai import ChatOpenAI
+from utils import extract_video_id
+from rag_pipeline import stream_answer, get_transcript_summary, index_exists, open_index
+from ingest_jobs import submit_ingest, submit_manual_ingest, get_job, DONE, FAILED, INDEXING
+from llm_gateway import get_default_llm
+from conversation import ConversationMemory
+from telemetry import start_metrics_server
+import warmup
+import mem_profile
 
 # Load environment variables
 load_dotenv()
@@ -503,13 +509,16 @@ st.markdown("""
 def initialize_session_state():
     """Initialize all session state variables."""
     defaults = {
-        "vector_store": None,
         "messages": [],
         "video_id": None,
+        "video_ids": [],     # Every video loaded into this chat; questions span all of them
         "video_url": "",
-        "transcript": None,
+        "transcript_preview": None,
+        "ingest_job_id": None,
+        "ingest_error": None,
         "detected_language": None,
-        "llm": None
+        "memory": None,
+        "session_id": uuid.uuid4().hex[:12],
     }
     
     for key, value in defaults.items():
@@ -545,29 +554,71 @@ def _get_language_display(lang_code: str) -> str:
 
 initialize_session_state()
 
-# Initialize LLM if not exists
-if st.session_state.llm is None:
-    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-    
-    if not OPENAI_API_KEY:
-        st.error("⚠️ OPENAI_API_KEY not found in environment variables!")
-        st.info("Please create a .env file with: OPENAI_API_KEY=your_key_here")
-        st.stop()
-    
-    try:
-        st.session_state.llm = ChatOpenAI(
-            model="gpt-4o-mini",
-            temperature=0.2,
-            api_key=OPENAI_API_KEY
-        )
-    except Exception as e:
-        st.error(f"Failed to initialize OpenAI: {e}")
-        st.stop()
+# Attribute memory profile entries (MEM_PROFILE=1) to this browser session
+mem_profile.set_session(f"session-{st.session_state.session_id}")
+
+@st.cache_resource
+def get_llm():
+    """
+    LLM client shared by all sessions: one gateway per process, so
+    concurrency, rate limits and retries are global, wrapped in the on-disk
+    response cache for identical prompts.
+    """
+    return get_default_llm()
+
+
+@st.cache_resource
+def start_metrics():
+    """Serve pipeline metrics on METRICS_PORT (once per process) if it is set."""
+    return start_metrics_server()
+
+
+start_metrics()
+
+# Initialize LLM
+if os.getenv("USE_FAKE_LLM") != "1" and not os.getenv("OPENAI_API_KEY"):
+    st.error("⚠️ OPENAI_API_KEY not found in environment variables!")
+    st.info("Please create a .env file with: OPENAI_API_KEY=your_key_here")
+    st.stop()
+
+try:
+    llm = get_llm()
+except Exception as e:
+    st.error(f"Failed to initialize OpenAI: {e}")
+    st.stop()
+
+
+@st.cache_resource
+def start_warmup():
+    """Preload popular videos in the background (once per process)."""
+    return warmup.start_warmup()
+
+
+start_warmup()
+
+# Sessions only hold video IDs; the indexes themselves are shared across sessions.
+# Only check that they exist here: opening them (Chroma, embedding model) waits
+# until a summary or answer is actually requested, so the page paints fast.
+chat_video_ids = [video_id for video_id in st.session_state.video_ids if index_exists(video_id)]
+has_index = bool(st.session_state.video_id) and st.session_state.video_id in chat_video_ids
+
+
+def _remove_video(video_id: str):
+    """Drop a video from the chat; the most recent remaining one becomes active."""
+    st.session_state.video_ids = [v for v in st.session_state.video_ids if v != video_id]
+    if st.session_state.video_id == video_id:
+        st.session_state.video_id = st.session_state.video_ids[-1] if st.session_state.video_ids else None
+        st.session_state.transcript_preview = None
+        st.session_state.detected_language = None
 
 # Sidebar
 with st.sidebar:
     st.markdown("<h2 style='color: white; text-align: center; margin-bottom: 2rem;'>⚙️ Dashboard</h2>", unsafe_allow_html=True)
     
+    if not warmup.is_ready():
+        warm = warmup.warm_status()
+        st.caption(f"🔥 Warming up popular videos ({warm['done']}/{warm['total']})")
+    
     # Display current video info
     if st.session_state.video_id:
         detected_lang = st.session_state.get('detected_language', 'unknown')
@@ -582,19 +633,25 @@ with st.sidebar:
             </div>
         """, unsafe_allow_html=True)
         
+        # Other videos loaded into this chat
+        if len(chat_video_ids) > 1:
+            st.markdown("<p style='color: white; font-weight: 700;'>📚 Asking across</p>", unsafe_allow_html=True)
+            for loaded_id in chat_video_ids:
+                name_col, remove_col = st.columns([4, 1])
+                name_col.caption(loaded_id)
+                remove_col.button("✖", key=f"remove_{loaded_id}", on_click=_remove_video, args=(loaded_id,))
+        
         # Show transcript preview
-        if st.session_state.transcript:
+        if st.session_state.transcript_preview:
             with st.expander("📄 Transcript Preview", expanded=False):
-                st.text_area("", st.session_state.transcript[:500] + "...", height=150, disabled=True)
+                st.text_area("", st.session_state.transcript_preview + "...", height=150, disabled=True)
         
         # Summary button
         st.markdown("<br>", unsafe_allow_html=True)
-        if st.button("✨ Generate Summary", use_container_width=True):
+        if st.button("✨ Generate Summary", use_container_width=True, disabled=not has_index):
             with st.spinner("Creating summary..."):
-                summary = get_transcript_summary(
-                    st.session_state.vector_store,
-                    st.session_state.llm
-                )
+                warmup.record_access(st.session_state.video_id, "summary")
+                summary = get_transcript_summary(open_index(st.session_state.video_id), llm)
                 st.markdown(f"""
                     <div style='background: rgba(255,255,255,0.2); padding: 1.5rem; border-radius: 15px; margin-top: 1rem;
                                 box-shadow: 0 4px 15px rgba(0,0,0,0.2); backdrop-filter: blur(10px);'>
@@ -607,8 +664,8 @@ with st.sidebar:
     # Reset button
     if st.button("🔄 New Video", type="primary", use_container_width=True):
         for key in list(st.session_state.keys()):
-            if key != 'llm':
-                del st.session_state[key]
+            del st.session_state[key]
+        st.query_params.clear()
         st.rerun()
     
     st.markdown("<hr style='border: 1px solid rgba(255,255,255,0.2); margin: 2rem 0;'>", unsafe_allow_html=True)
@@ -697,14 +754,37 @@ with tab2:
     st.markdown("2. Click '...' → 'Show transcript'")
     st.markdown("3. Copy all the text and paste below")
     
-    manual_transcript = st.text_area(
+    def _submit_manual_transcript():
+        """Queue the pasted transcript for ingestion and clear the text area."""
+        transcript = st.session_state.manual_transcript
+        if not transcript or not transcript.strip():
+            st.session_state.manual_error = "Please paste a transcript first."
+            return
+        
+        job_id = submit_manual_ingest(transcript, llm=llm)
+        st.session_state.ingest_job_id = job_id
+        st.session_state.ingest_error = None
+        st.query_params["job"] = job_id
+        # The job has its own reference; don't keep a second full copy in session state
+        st.session_state.manual_transcript = ""
+    
+    st.text_area(
         "Paste transcript here:",
         height=200,
         placeholder="Paste the video transcript here...",
         key="manual_transcript"
     )
     
-    manual_load_button = st.button("📥 Load Manual Transcript", type="primary", use_container_width=True, key="load_manual")
+    st.button(
+        "📥 Load Manual Transcript",
+        type="primary",
+        use_container_width=True,
+        key="load_manual",
+        on_click=_submit_manual_transcript
+    )
+    
+    if st.session_state.get("manual_error"):
+        st.warning(st.session_state.pop("manual_error"))
 
 st.markdown("</div>", unsafe_allow_html=True)
 
@@ -714,56 +794,89 @@ if video_url and (load_button or video_url != st.session_state.video_url):
     
     if not video_id:
         st.error("❌ Invalid YouTube URL. Please check and try again.")
-    elif video_id != st.session_state.video_id:
-        # New video - process it
+    elif video_id not in st.session_state.video_ids:
+        # New video - ingest it in the background; chat with the loaded ones keeps working
         st.session_state.video_url = video_url
-        
-        with st.status("🎬 Processing your video...", expanded=True) as status:
-            st.write("🔍 Extracting video ID...")
-            st.write(f"📹 Video ID: `{video_id}`")
-            
-            st.write("📥 Fetching transcript...")
-            result = get_transcript(video_id)
-            
-            if result[0] is None:
-                status.update(label="❌ Failed to load transcript", state="error")
-                st.error("Could not fetch transcript. The video might not have captions enabled.")
-                st.stop()
-            
-            transcript, detected_lang = result
-            lang_name = _get_language_display(detected_lang)
-            
-            st.write(f"✅ Transcript loaded in {lang_name} ({len(transcript):,} characters)")
-            
-            st.write("🔄 Processing and embedding transcript...")
-            try:
-                vector_store = process_transcript(transcript)
-                
-                # Update session state
-                st.session_state.vector_store = vector_store
-                st.session_state.video_id = video_id
-                st.session_state.transcript = transcript
-                st.session_state.detected_language = detected_lang
-                st.session_state.messages = []  # Clear chat history for new video
-                
-                status.update(label="✅ Video ready for chat!", state="complete")
-                st.balloons()
-                st.success("🎉 Success! Start chatting with your video below.")
-                
-            except Exception as e:
-                status.update(label="❌ Processing failed", state="error")
-                st.error(f"Error processing transcript: {e}")
-                st.stop()
+        job_id = submit_ingest(video_id, llm=llm)
+        warmup.record_access(video_id, "ingest")
+        st.session_state.ingest_job_id = job_id
+        st.session_state.ingest_error = None
+        st.query_params["job"] = job_id
     else:
         st.info("ℹ️ This video is already loaded. Ask questions below!")
 
+# Reattach to a running ingestion after a browser refresh
+if st.session_state.ingest_job_id is None and "job" in st.query_params:
+    if get_job(st.query_params["job"]) is not None:
+        st.session_state.ingest_job_id = st.query_params["job"]
+    else:
+        del st.query_params["job"]
+
+
+def _activate_job(job):
+    """Add a finished ingestion to the chat and make it the active video."""
+    if not st.session_state.video_ids:
+        st.session_state.messages = []  # Clear chat history for the first video
+        st.session_state.memory = ConversationMemory()
+    if job.video_id not in st.session_state.video_ids:
+        st.session_state.video_ids = st.session_state.video_ids + [job.video_id]
+    st.session_state.video_id = job.video_id
+    st.session_state.transcript_preview = job.transcript_preview
+    st.session_state.detected_language = job.detected_language
+
+
+@st.fragment(run_every=1.0)
+def _render_ingest_progress():
+    """Poll the background ingestion job and show its progress."""
+    job = get_job(st.session_state.ingest_job_id)
+    if job is None:
+        st.session_state.ingest_job_id = None
+        return
+    
+    progress = job.snapshot()
+    
+    if progress["status"] == DONE:
+        _activate_job(job)
+        st.session_state.ingest_job_id = None
+        del st.query_params["job"]
+        st.toast("🎉 Success! Start chatting with your video below.")
+        st.rerun()
+    
+    if progress["status"] == FAILED:
+        # Shown by the full script run; this fragment stops polling
+        st.session_state.ingest_error = progress["error"]
+        st.session_state.ingest_job_id = None
+        del st.query_params["job"]
+        st.rerun()
+    
+    with st.status(f"🎬 Processing video `{progress['video_id']}`...", expanded=True):
+        st.write("📥 Fetching transcript...")
+        if progress["transcript_chars"]:
+            lang_name = _get_language_display(progress["detected_language"])
+            st.write(f"✅ Transcript loaded in {lang_name} ({progress['transcript_chars']:,} characters)")
+        if progress["chunks_total"]:
+            st.progress(
+                progress["chunks_done"] / progress["chunks_total"],
+                text=f"🔄 Embedded {progress['chunks_done']}/{progress['chunks_total']} chunks"
+            )
+        if progress["status"] == INDEXING:
+            st.write("💾 Saving index...")
+
+
+if st.session_state.ingest_error:
+    st.error(f"❌ {st.session_state.ingest_error}")
+
+if st.session_state.ingest_job_id:
+    _render_ingest_progress()
+
 # Chat interface
-if st.session_state.vector_store:
+if has_index:
     st.markdown("<div class='chat-container'>", unsafe_allow_html=True)
-    st.markdown("""
+    chat_title = "Chat with Your Videos" if len(chat_video_ids) > 1 else "Chat with Your Video"
+    st.markdown(f"""
         <h2 style='text-align: center; color: #2d3748; margin-bottom: 2rem; 
                    font-weight: 700; font-size: 2rem;'>
-            💬 Chat with Your Video
+            💬 {chat_title}
         </h2>
     """, unsafe_allow_html=True)
     
@@ -785,13 +898,22 @@ if st.session_state.vector_store:
         
         # Generate and display assistant response
         with st.chat_message("assistant"):
-            with st.spinner("🤔 Thinking..."):
-                answer = get_answer(
-                    user_question,
-                    st.session_state.vector_store,
-                    st.session_state.llm
-                )
-            st.markdown(answer)
+            if st.session_state.memory is None:
+                st.session_state.memory = ConversationMemory()
+            
+            for video_id in chat_video_ids:
+                warmup.record_access(video_id, "ask")
+            
+            # With several videos loaded, retrieval fans out across all of them
+            vector_stores = [open_index(video_id) for video_id in chat_video_ids]
+            
+            # Render tokens as they arrive; write_stream returns the full text
+            answer = st.write_stream(stream_answer(
+                user_question,
+                [vector_store for vector_store in vector_stores if vector_store is not None],
+                llm,
+                memory=st.session_state.memory
+            ))
         
         st.session_state.messages.append({
             "role": "assistant",
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Batch mode: ingest a list of videos and answer a list of questions for
+each one, writing one JSON line per (video, question) pair.
+
+Usage:
+    python batch_cli.py --urls urls.txt --questions questions.txt --output results.jsonl
+    python batch_cli.py --urls urls.txt --questions questions.txt --export-dir bundles/
+
+Runs are resumable: pairs that already have an answer in the output file
+are skipped, so an interrupted run can simply be started again. Pairs that
+failed (retrieval or LLM errors) are written with an "error" field and are
+retried.
+
+With --export-dir, each video's index is also written as a single-file
+bundle (see index_bundle.py) for serving nodes to import, including videos
+whose questions were all answered by an earlier run.
+"""
+
+import sys
+import os
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Set, Tuple
+from dotenv import load_dotenv
+from utils import extract_video_id, get_transcript
+from rag_pipeline import get_answer, index_dir_for, open_index, process_transcript
+from llm_gateway import get_default_llm
+from fake_llm import FakeLLM
+
+
+def _read_lines(path: str) -> List[str]:
+    """Read non-empty, non-comment lines from a file."""
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def _load_completed(output_path: str) -> Set[Tuple[str, str]]:
+    """(video_id, question) pairs already answered in a previous run."""
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Partial line from a crashed run
+            if "error" not in record:
+                completed.add((record["video_id"], record["question"]))
+    return completed
+
+
+class ResultWriter:
+    """Appends JSON lines from many threads, flushing each one to disk."""
+
+    def __init__(self, path: str):
+        needs_newline = False
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b"\n"
+
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+        if needs_newline:
+            # Terminate a partial line left by a crashed run
+            self._file.write("\n")
+
+    def write(self, record: dict):
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+def _ingest(video_id: str, llm) -> Dict[str, object]:
+    """
+    Fetch and index a video unless its index already exists.
+
+    Returns:
+        Stage timings, or {"ingest": "skipped"} when the index existed
+    """
+    if open_index(video_id) is not None:
+        return {"ingest": "skipped"}
+
+    timings = {}
+    start = time.perf_counter()
+    transcript, _ = get_transcript(video_id)
+    timings["fetch_s"] = round(time.perf_counter() - start, 3)
+    if transcript is None:
+        raise RuntimeError("Could not fetch transcript")
+
+    start = time.perf_counter()
+    process_transcript(transcript, llm=llm, persist_dir=index_dir_for(video_id))
+    timings["index_s"] = round(time.perf_counter() - start, 3)
+    return timings
+
+
+def _export(video_id: str, export_dir: str):
+    """Write a video's index to <export_dir>/<video_id>.ytrag unless it is already there."""
+    from index_bundle import BUNDLE_EXTENSION, export_bundle
+
+    path = os.path.join(export_dir, f"{video_id}{BUNDLE_EXTENSION}")
+    if not os.path.exists(path):
+        export_bundle(video_id, path)
+
+
+def _process_video(
+    url: str,
+    video_id: str,
+    questions: List[str],
+    llm,
+    writer: ResultWriter,
+    question_workers: int,
+    export_dir: Optional[str] = None,
+):
+    """Ingest one video, answer its pending questions in parallel, then export it."""
+    try:
+        ingest_timings = _ingest(video_id, llm)
+    except Exception as e:
+        print(f"❌ {video_id}: {e}")
+        for question in questions:
+            writer.write({"video_id": video_id, "url": url, "question": question, "error": str(e)})
+        return
+
+    vector_store = open_index(video_id)
+
+    def answer(question: str):
+        start = time.perf_counter()
+        try:
+            # Failures must not come back as an answer text, which would be
+            # recorded as done and never retried
+            result = {"answer": get_answer(question, vector_store, llm, raise_errors=True)}
+        except Exception as e:
+            result = {"error": str(e)}
+        timings = dict(ingest_timings, answer_s=round(time.perf_counter() - start, 3))
+        writer.write({"video_id": video_id, "url": url, "question": question, **result, "timings": timings})
+
+    if questions:
+        with ThreadPoolExecutor(max_workers=question_workers) as executor:
+            list(executor.map(answer, questions))
+        print(f"✅ {video_id}: answered {len(questions)} questions")
+
+    if export_dir:
+        try:
+            _export(video_id, export_dir)
+        except Exception as e:
+            print(f"⚠️ {video_id}: could not export bundle: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest videos and answer questions in bulk")
+    parser.add_argument("--urls", required=True, help="File with one YouTube URL or video ID per line")
+    parser.add_argument("--questions", required=True, help="File with one question per line")
+    parser.add_argument("--output", default="results.jsonl", help="JSONL file to append results to")
+    parser.add_argument("--ingest-workers", type=int, default=2, help="Videos ingested in parallel")
+    parser.add_argument("--question-workers", type=int, default=4, help="Questions answered in parallel per video")
+    parser.add_argument("--fake-llm", action="store_true", help="Use the deterministic offline LLM")
+    parser.add_argument("--export-dir", help="Also export each video's index as a bundle into this directory")
+    args = parser.parse_args()
+
+    load_dotenv()
+    llm = FakeLLM() if args.fake_llm else get_default_llm()
+
+    questions = _read_lines(args.questions)
+    completed = _load_completed(args.output)
+
+    work = []
+    seen = set()
+    for url in _read_lines(args.urls):
+        video_id = extract_video_id(url) or url
+        if video_id in seen:
+            continue
+        seen.add(video_id)
+        pending = [q for q in questions if (video_id, q) not in completed]
+        if pending or args.export_dir:
+            work.append((url, video_id, pending))
+
+    skipped = len(completed)
+    print(f"📋 {sum(1 for _, _, pending in work if pending)} videos to process ({skipped} pairs already done)")
+
+    if args.export_dir:
+        os.makedirs(args.export_dir, exist_ok=True)
+
+    writer = ResultWriter(args.output)
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=args.ingest_workers) as executor:
+            futures = [
+                executor.submit(
+                    _process_video, url, video_id, pending, llm, writer, args.question_workers, args.export_dir
+                )
+                for url, video_id, pending in work
+            ]
+            for future in as_completed(futures):
+                future.result()
+    finally:
+        writer.close()
+
+    print(f"🏁 Done in {time.perf_counter() - start:.1f}s, results in {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Coarse-to-fine (IVF) retrieval vs. the flat as_retriever path.
+
+Builds an index for a long synthetic transcript made of recurring topics
+(like a multi-hour stream or podcast), then compares per-query latency and
+recall@k of:
+    flat          vector_store.as_retriever(), Chroma's HNSW search
+    coarse/nP     rag_pipeline.coarse_search with nprobe=P
+
+Recall is measured against the exact top-k by cosine similarity. The
+default hashing embeddings are fast and give related text similar vectors,
+so clustering behaves much like it does with a real model; use
+--embeddings real for the routed sentence-transformers model.
+
+Usage:
+    python benchmarks/bench_coarse.py
+    python benchmarks/bench_coarse.py --sizes 500000,2000000 --nprobes 1,2,4,8 --output coarse.json
+"""
+
+import sys
+import os
+
+# Add src directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import random
+import shutil
+import statistics
+import tempfile
+import time
+import zlib
+from typing import Dict, List
+
+import numpy as np
+
+DEFAULT_SIZES = [500_000, 2_000_000]    # About 10 and 40 hours of speech
+DEFAULT_NPROBES = [1, 2, 4, 8]
+DEFAULT_QUERIES = 100
+TOPICS = 60
+TOPIC_WORDS = 40
+SEGMENT_CHARS = 6000        # Speakers stay on a topic for a while
+FILLER = "so the a of to and in is that we this for it with as on be at by you know like".split()
+
+
+class HashingEmbedding:
+    """
+    Bag-of-words embedding: every word maps to a fixed random vector and a
+    text is the normalised sum of its words. Texts sharing words are close.
+    """
+
+    def __init__(self, size: int = 384):
+        self.size = size
+        self._cache: Dict[str, np.ndarray] = {}
+
+    def _word(self, word: str) -> np.ndarray:
+        vector = self._cache.get(word)
+        if vector is None:
+            rng = np.random.default_rng(zlib.crc32(word.encode("utf-8")))
+            vector = self._cache[word] = rng.standard_normal(self.size).astype(np.float32)
+        return vector
+
+    def embed_query(self, text: str) -> List[float]:
+        words = text.lower().split()
+        total = np.sum([self._word(word) for word in words], axis=0) if words else np.zeros(self.size)
+        return (total / max(np.linalg.norm(total), 1e-12)).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+
+def topic_transcript(size: int, seed: int = 0) -> str:
+    """A transcript of about `size` characters that moves between recurring topics."""
+    rng = random.Random(seed)
+    syllables = ["ka", "lo", "mi", "re", "tu", "sa", "ne", "po", "vi", "da", "go", "shi"]
+    topics = [
+        ["".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))) for _ in range(TOPIC_WORDS)]
+        for _ in range(TOPICS)
+    ]
+
+    sentences = []
+    length = 0
+    while length < size:
+        topic = rng.choice(topics)
+        segment_end = length + SEGMENT_CHARS
+        while length < min(segment_end, size):
+            words = [rng.choice(topic) if rng.random() < 0.6 else rng.choice(FILLER) for _ in range(rng.randint(8, 20))]
+            sentence = " ".join(words) + "."
+            sentences.append(sentence)
+            length += len(sentence) + 1
+    return " ".join(sentences)[:size]
+
+
+def build_index(transcript: str, embeddings, persist_dir: str):
+    """Chunk, embed and index a transcript the way process_transcript does."""
+    from langchain_community.vectorstores import Chroma
+    import rag_pipeline
+
+    store = Chroma(embedding_function=embeddings, persist_directory=persist_dir)
+    spans = list(rag_pipeline.iter_transcript_spans(transcript))
+    rag_pipeline.index_spans(store, embeddings, spans)
+    chunks = [chunk for _, chunk in spans]
+    return store, chunks
+
+
+def _latency_stats(samples: List[float]) -> Dict[str, float]:
+    samples = sorted(samples)
+    return {
+        "mean_ms": round(statistics.mean(samples) * 1000, 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 3),
+    }
+
+
+def bench_size(size: int, embeddings, nprobes: List[int], num_queries: int, k: int) -> dict:
+    import coarse_index
+    import rag_pipeline
+
+    transcript = topic_transcript(size)
+    persist_dir = tempfile.mkdtemp(prefix="bench_coarse_")
+    try:
+        store, chunks = build_index(transcript, embeddings, persist_dir)
+
+        started = time.perf_counter()
+        coarse = coarse_index.build_for_store(store, persist_dir, min_chunks=0)
+        build_seconds = time.perf_counter() - started
+
+        # Queries: a handful of words from a random chunk
+        rng = random.Random(1)
+        queries = []
+        for _ in range(num_queries):
+            words = rng.choice(chunks).split()
+            queries.append(" ".join(rng.sample(words, min(8, len(words)))))
+
+        # Exact top-k by cosine similarity, as chunk texts
+        all_ids = list(coarse.ids)
+        all_vectors = coarse.vectors
+        texts = dict(zip(*[store._collection.get(ids=all_ids, include=["documents"])[key] for key in ("ids", "documents")]))
+        truth = []
+        for query in queries:
+            q = np.asarray(embeddings.embed_query(query), dtype=np.float32)
+            best = np.argsort(-(all_vectors @ (q / max(np.linalg.norm(q), 1e-12))))[:k]
+            truth.append({texts[all_ids[i]] for i in best})
+
+        def run(search) -> dict:
+            latencies = []
+            recalls = []
+            for query, expected in zip(queries, truth):
+                started = time.perf_counter()
+                docs = search(query)
+                latencies.append(time.perf_counter() - started)
+                recalls.append(len({doc.page_content for doc in docs} & expected) / len(expected))
+            return {**_latency_stats(latencies), f"recall@{k}": round(statistics.mean(recalls), 4)}
+
+        retriever = store.as_retriever(search_type="similarity", search_kwargs={"k": k})
+        methods = {"flat": run(retriever.invoke)}
+        for nprobe in nprobes:
+            methods[f"coarse/n{nprobe}"] = run(
+                lambda query: rag_pipeline.coarse_search(query, store, coarse, k, nprobe=nprobe)
+            )
+
+        return {
+            "size": size,
+            "chunks": len(chunks),
+            "partitions": coarse.partitions,
+            "coarse_build_s": round(build_seconds, 4),
+            "methods": methods,
+        }
+    finally:
+        shutil.rmtree(persist_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare coarse-to-fine retrieval with flat search")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="Transcript sizes in characters")
+    parser.add_argument("--nprobes", default=",".join(map(str, DEFAULT_NPROBES)), help="nprobe values to compare")
+    parser.add_argument("--queries", type=int, default=DEFAULT_QUERIES, help="Queries per transcript")
+    parser.add_argument("--k", type=int, default=None, help="Chunks retrieved per query (defaults to TOP_K_RESULTS)")
+    parser.add_argument("--embeddings", choices=["hashing", "real"], default="hashing",
+                        help="Hashing bag-of-words vectors, or the real embedding model")
+    parser.add_argument("--output", help="Optional JSON file to write results to")
+    args = parser.parse_args()
+
+    import rag_pipeline
+
+    if args.embeddings == "real":
+        embeddings = rag_pipeline.get_embeddings(rag_pipeline.EMBED_MODEL)
+    else:
+        embeddings = HashingEmbedding()
+    k = args.k or rag_pipeline.TOP_K_RESULTS
+    nprobes = [int(n) for n in args.nprobes.split(",") if n.strip()]
+
+    results = []
+    for size in [int(s) for s in args.sizes.split(",") if s.strip()]:
+        print(f"⏱️ {size:,} chars")
+        result = bench_size(size, embeddings, nprobes, args.queries, k)
+        print(f"   {result['chunks']} chunks, {result['partitions']} partitions, "
+              f"coarse layer built in {result['coarse_build_s']:.3f}s")
+        for name, stats in result["methods"].items():
+            print(f"   {name:<11} mean {stats['mean_ms']:>8.3f}ms  p95 {stats['p95_ms']:>8.3f}ms  "
+                  f"recall@{k} {stats[f'recall@{k}']:.3f}")
+        results.append(result)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"embeddings": args.embeddings, "k": k, "results": results}, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Cold-process import time benchmark.
+
+Each measurement runs a fresh interpreter with `python -X importtime`, so
+numbers reflect a cold start of the Streamlit script (module caches in the
+OS page cache aside). Reports the median wall time per target, and the
+heaviest modules pulled in by the app shell.
+
+Targets:
+    app-shell   everything app.py imports before the first paint
+    ingest      what the first ingest additionally loads (Chroma, splitter)
+    <module>    any importable module name
+
+Usage:
+    python benchmarks/bench_imports.py
+    python benchmarks/bench_imports.py --budget 1.0 --output imports.json
+    python benchmarks/bench_imports.py --targets rag_pipeline,ingest_jobs
+"""
+
+import sys
+import os
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+import argparse
+import json
+import statistics
+import subprocess
+from typing import Dict, List, Tuple
+
+# Imports app.py performs at module level (streamlit itself is added when
+# it is installed)
+APP_SHELL_MODULES = ["dotenv", "utils", "rag_pipeline", "ingest_jobs", "llm_gateway", "conversation", "telemetry", "warmup"]
+INGEST_MODULES = ["langchain_community.vectorstores.chroma", "langchain_text_splitters", "langchain_core.documents"]
+DEFAULT_TARGETS = ["app-shell", "ingest"]
+DEFAULT_REPEATS = 5
+TOP_MODULES = 10
+
+
+def _target_imports(target: str) -> List[str]:
+    if target == "app-shell":
+        modules = list(APP_SHELL_MODULES)
+        if _importable("streamlit"):
+            modules.insert(0, "streamlit")
+        return modules
+    if target == "ingest":
+        return APP_SHELL_MODULES + INGEST_MODULES
+    return [target]
+
+
+def _importable(module: str) -> bool:
+    result = subprocess.run([sys.executable, "-c", f"import {module}"], capture_output=True, cwd=SRC_DIR)
+    return result.returncode == 0
+
+
+def measure_imports(modules: List[str]) -> Tuple[float, Dict[str, int]]:
+    """
+    Import modules in a fresh interpreter.
+
+    Returns:
+        (wall seconds, {module: cumulative microseconds}) from -X importtime
+    """
+    code = (
+        "import time; _start = time.perf_counter(); "
+        + "; ".join(f"import {module}" for module in modules)
+        + "; print(time.perf_counter() - _start)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, cwd=SRC_DIR,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, self_us, cumulative_us, name = [part.strip() for part in line.replace("import time:", "|").split("|")]
+        cumulative[name.strip()] = int(cumulative_us)
+
+    return float(result.stdout.strip().splitlines()[-1]), cumulative
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-process import times")
+    parser.add_argument("--targets", default=",".join(DEFAULT_TARGETS), help="Comma-separated targets")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS, help="Fresh processes per target")
+    parser.add_argument("--budget", type=float, help="Fail (exit 1) if app-shell takes longer, in seconds")
+    parser.add_argument("--output", help="Optional JSON file to write results to")
+    args = parser.parse_args()
+
+    results = {}
+    for target in [t.strip() for t in args.targets.split(",") if t.strip()]:
+        modules = _target_imports(target)
+        samples = []
+        heaviest = {}
+        for _ in range(args.repeats):
+            seconds, cumulative = measure_imports(modules)
+            samples.append(seconds)
+            heaviest = cumulative
+
+        top = sorted(heaviest.items(), key=lambda item: item[1], reverse=True)[:TOP_MODULES]
+        results[target] = {
+            "modules": modules,
+            "median_s": round(statistics.median(samples), 4),
+            "min_s": round(min(samples), 4),
+            "heaviest": [{"module": name, "cumulative_s": round(us / 1e6, 4)} for name, us in top],
+        }
+
+        print(f"⏱️ {target}: median {results[target]['median_s']:.3f}s (min {results[target]['min_s']:.3f}s)")
+        for entry in results[target]["heaviest"]:
+            print(f"   {entry['module']:<32} {entry['cumulative_s']:.3f}s")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "results": results}, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+
+    if args.budget is not None and "app-shell" in results:
+        if results["app-shell"]["median_s"] > args.budget:
+            print(f"❌ app-shell imports take {results['app-shell']['median_s']:.3f}s, over the {args.budget}s budget")
+            sys.exit(1)
+        print(f"✅ app-shell imports within the {args.budget}s budget")
+
+
+if __name__ == "__main__":
+    main()
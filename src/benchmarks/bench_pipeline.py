@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Offline end-to-end benchmark for the RAG pipeline.
+
+Times chunking, embedding, indexing, retrieval, context assembly and
+answering (with the fake LLM) on synthetic and fixture transcripts from
+1k to 1M+ characters, in English and Hindi, and records peak memory for
+each stage. No network access is needed with the default fake embeddings.
+
+Usage:
+    python benchmarks/bench_pipeline.py --output bench.json
+    python benchmarks/bench_pipeline.py --sizes 1000,100000 --embeddings real
+    python benchmarks/bench_pipeline.py --compare baseline.json --threshold 0.2
+
+With --compare, stages that got slower than the baseline by more than the
+threshold are reported and the script exits with status 1.
+"""
+
+import sys
+import os
+
+# Add src directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import platform
+import random
+import resource
+import shutil
+import statistics
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+QUERY_REPEATS = 20
+
+EN_WORDS = (
+    "network layer neuron weight bias gradient descent cost function training example "
+    "model data learning step slope minimum accuracy image digit output input value "
+    "the a of to and in is that we this for it with as on be at by"
+).split()
+HI_WORDS = (
+    "नेटवर्क परत न्यूरॉन वज़न बायस ग्रेडिएंट कॉस्ट फ़ंक्शन प्रशिक्षण उदाहरण मॉडल डेटा "
+    "सीखना कदम ढलान सटीकता अंक है और के में की को से यह हम एक पर भी"
+).split()
+
+QUERIES = {
+    "en": [
+        "What is gradient descent?",
+        "How does the network learn its weights?",
+        "Summarize the video",
+        "What does the second half cover?",
+    ],
+    "hi": [
+        "ग्रेडिएंट डिसेंट क्या है?",
+        "नेटवर्क वज़न कैसे सीखता है?",
+        "वीडियो का सारांश बताइए",
+        "दूसरे भाग में क्या बताया गया है?",
+    ],
+}
+
+
+# ----------------------------------------------------------
+# Transcript corpus
+# ----------------------------------------------------------
+def synthetic_transcript(size: int, lang: str, seed: int = 0) -> str:
+    """Generate a transcript of about `size` characters from a fixed word list."""
+    rng = random.Random(seed)
+    words = HI_WORDS if lang == "hi" else EN_WORDS
+    full_stop = "।" if lang == "hi" else "."
+
+    sentences = []
+    length = 0
+    while length < size:
+        sentence = " ".join(rng.choice(words) for _ in range(rng.randint(6, 18))) + full_stop
+        sentences.append(sentence)
+        length += len(sentence) + 1
+    return " ".join(sentences)[:size]
+
+
+def build_corpus(sizes: List[int], langs: List[str]) -> List[Tuple[str, str, str]]:
+    """List of (name, lang, transcript) for synthetic sizes plus the fixtures."""
+    corpus = []
+    for lang in langs:
+        for size in sizes:
+            corpus.append((f"synthetic-{lang}-{size}", lang, synthetic_transcript(size, lang)))
+
+    for filename in sorted(os.listdir(FIXTURES_DIR)):
+        lang = "hi" if filename.endswith("_hi.txt") else "en"
+        if lang not in langs:
+            continue
+        with open(os.path.join(FIXTURES_DIR, filename), encoding="utf-8") as f:
+            corpus.append((f"fixture-{os.path.splitext(filename)[0]}", lang, f.read()))
+    return corpus
+
+
+# ----------------------------------------------------------
+# Measurement
+# ----------------------------------------------------------
+def _max_rss_mb() -> float:
+    """Peak resident set size of this process so far."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def measure(fn: Callable, trace_memory: bool = True) -> Tuple[object, Dict[str, float]]:
+    """Run fn() and return (result, {seconds, peak_mb, max_rss_mb})."""
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = fn()
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else 0
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+
+    stats = {"seconds": round(seconds, 4), "max_rss_mb": _max_rss_mb()}
+    if trace_memory:
+        stats["peak_mb"] = round(peak / (1024 * 1024), 2)
+    return result, stats
+
+
+def _latencies(fn: Callable[[str], object], queries: List[str], repeats: int) -> Dict[str, float]:
+    """Per-query latency statistics for fn over repeats rounds of queries."""
+    samples = []
+    for i in range(repeats):
+        query = queries[i % len(queries)]
+        start = time.perf_counter()
+        fn(query)
+        samples.append(time.perf_counter() - start)
+
+    samples.sort()
+    return {
+        "queries": len(samples),
+        "mean_ms": round(statistics.mean(samples) * 1000, 2),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 2),
+    }
+
+
+# ----------------------------------------------------------
+# Benchmark
+# ----------------------------------------------------------
+def get_benchmark_embeddings(kind: str, lang: str = "en"):
+    """
+    Embedding model for a transcript: deterministic fake vectors, or the
+    real model rag_pipeline routes that language to.
+    """
+    if kind == "real":
+        from rag_pipeline import embed_model_for, get_embeddings
+        return get_embeddings(embed_model_for(lang))
+
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    return DeterministicFakeEmbedding(size=384)  # Same dimension as MiniLM
+
+
+def bench_transcript(name: str, lang: str, transcript: str, embeddings, repeats: int, trace_memory: bool) -> dict:
+    """Run every pipeline stage on one transcript and collect stage stats."""
+    from langchain_community.vectorstores import Chroma
+    from rag_pipeline import EMBED_BATCH_SIZE, TOP_K_RESULTS, iter_transcript_chunks, _prepare_answer, get_answer
+    from fake_llm import FakeLLM
+
+    stages = {}
+
+    # Chunking
+    chunks, stages["chunking"] = measure(lambda: list(iter_transcript_chunks(transcript)), trace_memory)
+
+    # Embedding
+    def embed():
+        vectors = []
+        for i in range(0, len(chunks), EMBED_BATCH_SIZE):
+            vectors.extend(embeddings.embed_documents(chunks[i:i + EMBED_BATCH_SIZE]))
+        return vectors
+
+    vectors, stages["embedding"] = measure(embed, trace_memory)
+
+    # Indexing (precomputed vectors, so this is Chroma alone)
+    persist_dir = tempfile.mkdtemp(prefix="bench_index_")
+    try:
+        def index():
+            store = Chroma(embedding_function=embeddings, persist_directory=persist_dir)
+            for i in range(0, len(chunks), EMBED_BATCH_SIZE):
+                batch = range(i, min(i + EMBED_BATCH_SIZE, len(chunks)))
+                store._collection.add(
+                    ids=[f"chunk-{j}" for j in batch],
+                    embeddings=[vectors[j] for j in batch],
+                    documents=[chunks[j] for j in batch],
+                    metadatas=[{"chunk_id": j, "source": "benchmark"} for j in batch],
+                )
+            return store
+
+        vector_store, stages["indexing"] = measure(index, trace_memory)
+
+        # Query stages
+        queries = QUERIES[lang]
+        retriever = vector_store.as_retriever(search_type="similarity", search_kwargs={"k": TOP_K_RESULTS})
+        llm = FakeLLM()
+
+        query_stages = {
+            "retrieval": retriever.invoke,
+            "context": lambda q: _prepare_answer(q, vector_store),
+            "answer": lambda q: get_answer(q, vector_store, llm),
+        }
+        for stage, fn in query_stages.items():
+            latencies, stats = measure(lambda: _latencies(fn, queries, repeats), trace_memory)
+            stats.update(latencies)
+            stages[stage] = stats
+    finally:
+        shutil.rmtree(persist_dir, ignore_errors=True)
+
+    return {"name": name, "lang": lang, "chars": len(transcript), "chunks": len(chunks), "stages": stages}
+
+
+# ----------------------------------------------------------
+# Regression check
+# ----------------------------------------------------------
+MIN_SECONDS = 0.005     # Stages faster than this are too noisy to compare
+COMPARED_METRICS = ["seconds", "peak_mb"]
+
+
+def compare_results(current: dict, baseline: dict, threshold: float) -> List[str]:
+    """
+    Compare a run against a baseline run.
+
+    Returns:
+        One message per (transcript, stage, metric) that regressed by more
+        than threshold (a fraction, e.g. 0.2 for 20%)
+    """
+    baseline_by_name = {result["name"]: result for result in baseline.get("results", [])}
+    regressions = []
+
+    for result in current["results"]:
+        base = baseline_by_name.get(result["name"])
+        if base is None:
+            continue
+
+        for stage, stats in result["stages"].items():
+            base_stats = base["stages"].get(stage, {})
+            for metric in COMPARED_METRICS:
+                old, new = base_stats.get(metric), stats.get(metric)
+                if old is None or new is None:
+                    continue
+                if metric == "seconds" and old < MIN_SECONDS:
+                    continue
+                if old > 0 and new > old * (1 + threshold):
+                    regressions.append(
+                        f"{result['name']} / {stage} / {metric}: {old} -> {new} (+{(new / old - 1) * 100:.0f}%)"
+                    )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark chunking, embedding, indexing and querying offline")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="Comma-separated synthetic transcript sizes in characters")
+    parser.add_argument("--langs", default="en,hi", help="Comma-separated languages (en, hi)")
+    parser.add_argument("--embeddings", choices=["fake", "real"], default="fake",
+                        help="Deterministic fake vectors (offline) or the real embedding model")
+    parser.add_argument("--repeats", type=int, default=QUERY_REPEATS, help="Queries per query stage")
+    parser.add_argument("--no-tracemalloc", action="store_true",
+                        help="Skip Python heap tracing (faster, only max RSS is recorded)")
+    parser.add_argument("--output", default="bench_results.json", help="JSON file to write results to")
+    parser.add_argument("--compare", help="Baseline JSON from an earlier run to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed slowdown/memory growth before a stage counts as a regression")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    langs = [lang.strip() for lang in args.langs.split(",") if lang.strip()]
+
+    results = []
+    for name, lang, transcript in build_corpus(sizes, langs):
+        print(f"⏱️ {name} ({len(transcript):,} chars)")
+        embeddings = get_benchmark_embeddings(args.embeddings, lang)
+        result = bench_transcript(name, lang, transcript, embeddings, args.repeats, not args.no_tracemalloc)
+        for stage, stats in result["stages"].items():
+            print(f"   {stage:<10} {stats['seconds']:>9.3f}s  peak {stats.get('peak_mb', '-')} MB")
+        results.append(result)
+
+    report = {
+        "meta": {
+            "created_at": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "embeddings": args.embeddings,
+            "repeats": args.repeats,
+            "tracemalloc": not args.no_tracemalloc,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"💾 Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_results(report, baseline, args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} regressions against {args.compare}:")
+            for message in regressions:
+                print(f"   {message}")
+            sys.exit(1)
+        print(f"✅ No regressions against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
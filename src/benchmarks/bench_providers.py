@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for transcript provider parsing and fallback.
+
+Times each provider's parsing path on the recorded fixtures (scaled up to
+long-video sizes), then replays fallback scenarios with injected latency
+and failures to show how long a fetch takes before a provider succeeds.
+Runs offline.
+
+Usage:
+    python benchmarks/bench_providers.py
+    python benchmarks/bench_providers.py --scale 200 --repeats 50
+"""
+
+import sys
+import os
+
+# Add src directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import contextlib
+import io
+import json
+import statistics
+import time
+from typing import Callable, Dict
+import utils
+from http_replay import CASSETTE_DIR, Cassette, replaying
+
+OFFLINE_PROVIDERS = [utils._fetch_from_youtube_transcript_api_service, utils._fetch_direct_from_youtube]
+
+# name -> (cassette, injected faults)
+FALLBACK_SCENARIOS = {
+    "service ok": ("service_list", {}),
+    "first service down": ("service_snippet", {}),
+    "first service slow": ("service_snippet", {"latency": {"onrender": 30.0}}),
+    "services down, direct ok": ("direct_timedtext", {}),
+    "services slow, direct ok": ("direct_timedtext", {"latency": {"onrender": 8.0, "vercel": 8.0}}),
+    "everything times out": ("direct_timedtext", {"latency": {"": 60.0}}),
+}
+
+
+def _body(cassette: str, url_part: str) -> str:
+    for interaction in Cassette(os.path.join(CASSETTE_DIR, f"{cassette}.json")).interactions:
+        if url_part in interaction["request"]["url"]:
+            return interaction["response"]["body"]
+    raise KeyError(url_part)
+
+
+def _time(fn: Callable, repeats: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return {"mean_ms": round(statistics.mean(samples) * 1000, 3), "min_ms": round(min(samples) * 1000, 3)}
+
+
+def bench_parsing(scale: int, repeats: int) -> Dict[str, dict]:
+    """Time each parsing path on fixture payloads repeated `scale` times."""
+    entries = json.loads(_body("service_list", "onrender")) * scale
+    snippet = json.loads(_body("service_snippet", "vercel"))
+    snippet["transcript"] *= scale
+    page = _body("direct_timedtext", "youtube.com/watch")
+    # Watch pages are mostly unrelated markup before the caption data
+    padded_page = ("<div>" + "x" * 1000 + "</div>") * scale + page
+    xml = _body("direct_timedtext", "timedtext")
+    body = xml[xml.index("<text"):xml.rindex("</transcript>")]
+    big_xml = xml[:xml.index("<text")] + body * scale + "</transcript>"
+    raw_entries = json.dumps(entries)
+
+    cases = {
+        "service list (json + join)": lambda: utils.parse_service_transcript(json.loads(raw_entries)),
+        "service snippet": lambda: utils.parse_service_transcript(snippet),
+        "library entries": lambda: utils.parse_library_entries(entries),
+        "watch page caption tracks": lambda: utils.select_caption_url(utils.parse_caption_tracks(padded_page)),
+        "timedtext xml": lambda: utils.parse_timedtext_xml(big_xml),
+    }
+    return {name: _time(fn, repeats) for name, fn in cases.items()}
+
+
+def bench_fallback() -> Dict[str, dict]:
+    """Replay fallback scenarios on a simulated clock (fixed sleeps between providers are not counted)."""
+    utils.PROVIDER_DELAY = 0
+    utils.CAPTION_DELAY = 0
+    results = {}
+    for name, (cassette, faults) in FALLBACK_SCENARIOS.items():
+        with replaying(cassette, realtime=False, **faults) as transport:
+            with contextlib.redirect_stdout(io.StringIO()):
+                transcript, _ = utils.get_transcript("aircAruvnKk", providers=OFFLINE_PROVIDERS)
+        results[name] = {
+            "success": transcript is not None,
+            "requests": len(transport.calls),
+            "network_s": transport.simulated_seconds,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark transcript provider parsing and fallback")
+    parser.add_argument("--scale", type=int, default=100, help="Times each fixture payload is repeated")
+    parser.add_argument("--repeats", type=int, default=20, help="Timing repetitions per parsing path")
+    parser.add_argument("--output", help="Optional JSON file to write results to")
+    args = parser.parse_args()
+
+    parsing = bench_parsing(args.scale, args.repeats)
+    print(f"⏱️ Parsing (fixtures x{args.scale})")
+    for name, stats in parsing.items():
+        print(f"   {name:<28} mean {stats['mean_ms']:>9.3f} ms   min {stats['min_ms']:>9.3f} ms")
+
+    fallback = bench_fallback()
+    print("⏱️ Fallback (simulated network time)")
+    for name, stats in fallback.items():
+        status = "✅" if stats["success"] else "❌"
+        print(f"   {status} {name:<26} {stats['requests']} requests, {stats['network_s']:.1f}s waiting on providers")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"parsing": parsing, "fallback": fallback}, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+# coarse_index.py
+"""
+IVF-style coarse layer for long transcripts.
+
+At ingest, chunk embeddings are clustered with k-means into about
+sqrt(chunks) partitions. A query is scored against the partition
+centroids first, and only the chunks in the `nprobe` closest partitions
+are searched. Vectors are stored grouped by partition, so each partition
+is one contiguous slice (an inverted list).
+
+Short videos don't get a coarse layer (see MIN_CHUNKS); they are searched
+flat as before.
+
+Configuration:
+    COARSE_MIN_CHUNKS=512    chunks below which no coarse layer is built
+    COARSE_NPROBE=8          partitions searched per query
+"""
+
+import os
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# Configuration
+COARSE_FILE = "coarse.npz"
+MIN_CHUNKS = int(os.getenv("COARSE_MIN_CHUNKS", "512"))
+NPROBE = int(os.getenv("COARSE_NPROBE", "8"))
+KMEANS_ITERATIONS = 25
+READ_BATCH_SIZE = 5000      # Embeddings read back from Chroma per call
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale vectors (along the last axis) to unit length."""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def kmeans(vectors: np.ndarray, k: int, iterations: int = KMEANS_ITERATIONS, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Spherical k-means (cosine similarity) over unit vectors.
+
+    Args:
+        vectors: (n, dim) array of unit vectors
+        k: Number of clusters (at most n)
+        iterations: Maximum Lloyd iterations
+        seed: Random seed for k-means++ initialisation
+
+    Returns:
+        (centroids, labels): (k, dim) unit centroids and the cluster of
+        each vector
+    """
+    n = len(vectors)
+    rng = np.random.default_rng(seed)
+
+    # k-means++ initialisation: spread the seeds out by cosine distance
+    centroids = np.empty((k, vectors.shape[1]), dtype=vectors.dtype)
+    centroids[0] = vectors[rng.integers(n)]
+    distance = 1.0 - vectors @ centroids[0]
+    for i in range(1, k):
+        weights = np.maximum(distance, 0.0)
+        total = weights.sum()
+        index = rng.choice(n, p=weights / total) if total > 0 else rng.integers(n)
+        centroids[i] = vectors[index]
+        distance = np.minimum(distance, 1.0 - vectors @ centroids[i])
+
+    labels = np.full(n, -1)
+    for _ in range(iterations):
+        new_labels = np.argmax(vectors @ centroids.T, axis=1)
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, vectors)
+        counts = np.bincount(labels, minlength=k)
+
+        # Empty clusters are re-seeded with the vectors furthest from their centroid
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            fit = np.einsum("ij,ij->i", vectors, centroids[labels])
+            sums[empty] = vectors[np.argsort(fit)[:len(empty)]]
+        centroids = normalize(sums)
+
+    return centroids, labels
+
+
+class CoarseIndex:
+    """Partition centroids plus chunk vectors grouped by partition."""
+
+    def __init__(self, centroids: np.ndarray, offsets: np.ndarray, vectors: np.ndarray, ids: np.ndarray):
+        self.centroids = centroids
+        self.offsets = offsets      # Partition p holds rows offsets[p]:offsets[p + 1]
+        self.vectors = vectors
+        self.ids = ids
+
+    @property
+    def partitions(self) -> int:
+        return len(self.centroids)
+
+    @classmethod
+    def build(cls, ids: List[str], vectors, partitions: Optional[int] = None, seed: int = 0) -> "CoarseIndex":
+        """
+        Cluster chunk vectors into partitions.
+
+        Args:
+            ids: Chunk IDs in the vector store
+            vectors: Chunk embeddings, one row per ID
+            partitions: Number of partitions (defaults to sqrt(len(ids)))
+        """
+        vectors = normalize(np.asarray(vectors, dtype=np.float32))
+        k = partitions or int(round(np.sqrt(len(ids))))
+        k = max(1, min(k, len(ids)))
+
+        centroids, labels = kmeans(vectors, k, seed=seed)
+        order = np.argsort(labels, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(labels, minlength=k))])
+        return cls(centroids.astype(np.float32), offsets, vectors[order], np.asarray(ids)[order])
+
+    def search(self, query_vector, k: int, nprobe: int = NPROBE) -> List[Tuple[str, float]]:
+        """
+        Find the chunks most similar to a query in the closest partitions.
+
+        Returns:
+            Up to k (chunk_id, cosine_similarity) pairs, best first
+        """
+        query = normalize(np.asarray(query_vector, dtype=np.float32))
+        nprobe = max(1, min(nprobe, self.partitions))
+
+        centroid_scores = self.centroids @ query
+        probed = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        rows = np.concatenate([np.arange(self.offsets[p], self.offsets[p + 1]) for p in probed])
+        if len(rows) == 0:
+            return []
+
+        scores = self.vectors[rows] @ query
+        k = min(k, len(rows))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return [(str(self.ids[rows[i]]), float(scores[i])) for i in best]
+
+    def save(self, path: str):
+        # Write to a temporary name first so readers never see a partial file
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, centroids=self.centroids, offsets=self.offsets, vectors=self.vectors, ids=self.ids)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "CoarseIndex":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data["centroids"], data["offsets"], data["vectors"], data["ids"])
+
+
+def build_for_store(vector_store, persist_dir: str, min_chunks: int = MIN_CHUNKS) -> Optional[CoarseIndex]:
+    """
+    Build and save the coarse layer for a Chroma index.
+
+    Returns:
+        The coarse index, or None when the index is too small to need one
+    """
+    collection = vector_store._collection
+    total = collection.count()
+    if total < min_chunks:
+        return None
+
+    ids: List[str] = []
+    vectors = []
+    for offset in range(0, total, READ_BATCH_SIZE):
+        page = collection.get(include=["embeddings"], limit=READ_BATCH_SIZE, offset=offset)
+        ids.extend(page["ids"])
+        vectors.append(np.asarray(page["embeddings"], dtype=np.float32))
+
+    coarse = CoarseIndex.build(ids, np.concatenate(vectors))
+    coarse.save(os.path.join(persist_dir, COARSE_FILE))
+    print(f"🗂️ Coarse layer built ({coarse.partitions} partitions over {total} chunks)")
+    return coarse
+
+
+def load_for_dir(persist_dir: str) -> Optional[CoarseIndex]:
+    """Load the coarse layer saved with an index, or None if it has none."""
+    path = os.path.join(persist_dir, COARSE_FILE)
+    if not os.path.exists(path):
+        return None
+    try:
+        return CoarseIndex.load(path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"⚠️ Ignoring coarse layer {path}: {e}")
+        return None
@@ -0,0 +1,154 @@
+# conversation.py
+
+import re
+from typing import List, Optional
+from utils import extract_response_text
+
+# Configuration
+HISTORY_TOKEN_BUDGET = 600      # Tokens of history kept across all turns
+RECENT_MESSAGES = 4             # Messages kept (clipped) before being compressed
+SUMMARY_SHARE = 0.3             # Share of the budget for compressed older turns
+
+# Phrases that mark a question as depending on earlier turns
+FOLLOW_UP_PATTERNS = [
+    r'^(and|but|also|so|then|what about|how about|how come|why not)\b',
+    r'\b(tell me more|more detail|in detail|elaborate|expand on|go on|what else|anything else)\b',
+    r'^(यह|वह|ये|वे|इसके|उसके|इसे|उसे|इसका|उसका|इसमें|उसमें|इसको|उसको)(?![\u0900-\u097F])',
+    r'(?<![\u0900-\u097F])(और बताओ|विस्तार से)(?![\u0900-\u097F])',
+]
+
+# Pronouns that refer back to an earlier turn when nothing before them names a subject
+ANAPHORA = {"it", "that", "this", "those", "these", "they", "them", "its", "their", "he", "she", "his", "her", "him"}
+
+# Words that don't name a subject: question words, auxiliaries, articles,
+# prepositions and request verbs
+FUNCTION_WORDS = set("""
+    a an the and or but so also then what which who whom whose why how when where
+    is are was were be been do does did can could will would should may might has have had
+    of in on at to for from by with about as into than
+    i you we me us my your our please tell explain describe say said mean means give show
+    more else again further
+""".split())
+
+CONDENSE_PROMPT = """Rewrite the follow-up question so it can be understood without the conversation.
+Keep it short and in the same language as the follow-up. Return only the rewritten question.
+
+Conversation:
+{history}
+
+Follow-up question: {question}
+
+Standalone question:"""
+
+
+def _clip(text: str, max_tokens: int) -> str:
+    """Clip text to roughly max_tokens, keeping the start."""
+    max_chars = max_tokens * 4
+    text = " ".join(text.split())
+    return text if len(text) <= max_chars else text[:max_chars].rsplit(" ", 1)[0] + "…"
+
+
+class ConversationMemory:
+    """
+    Rolling, compressed chat history under a fixed token budget.
+
+    The most recent messages are kept (clipped); older ones are squeezed
+    into a short running digest, so the history stays the same size however
+    long the chat runs. Used to rewrite follow-up questions into standalone
+    queries for retrieval.
+    """
+
+    def __init__(self, token_budget: int = HISTORY_TOKEN_BUDGET, recent_messages: int = RECENT_MESSAGES):
+        self.token_budget = token_budget
+        self.recent_messages = recent_messages
+        self.digest = ""
+        self.messages: List[dict] = []
+
+    def add(self, role: str, content: str):
+        """Record a chat message, compressing older history as needed."""
+        per_message = max(1, int(self.token_budget * (1 - SUMMARY_SHARE)) // self.recent_messages)
+        self.messages.append({"role": role, "content": _clip(content, per_message)})
+
+        while len(self.messages) > self.recent_messages:
+            oldest = self.messages.pop(0)
+            # Older turns only need to carry the topic, so keep their first sentence
+            first_sentence = re.split(r'(?<=[.!?।])\s', oldest["content"], maxsplit=1)[0]
+            self.digest = f"{self.digest} {oldest['role']}: {first_sentence}".strip()
+
+        # Keep only the newest part of the digest
+        max_digest_chars = int(self.token_budget * SUMMARY_SHARE) * 4
+        if len(self.digest) > max_digest_chars:
+            self.digest = "…" + self.digest[-max_digest_chars:]
+
+    def render(self) -> str:
+        """History as prompt text."""
+        lines = []
+        if self.digest:
+            lines.append(f"Earlier: {self.digest}")
+        lines.extend(f"{m['role']}: {m['content']}" for m in self.messages)
+        return "\n".join(lines)
+
+    def last_user_question(self) -> Optional[str]:
+        for message in reversed(self.messages):
+            if message["role"] == "user":
+                return message["content"]
+        return None
+
+    def clear(self):
+        self.digest = ""
+        self.messages = []
+
+
+def is_follow_up(question: str) -> bool:
+    """
+    Check if a question likely refers back to earlier turns: it opens with a
+    connective ("and why?", "what about X"), uses a pronoun before naming
+    any subject ("how does it learn?"), or is too short to stand alone
+    ("why?"). Questions that name their subject ("what is a neuron and how
+    does it learn?", "define bias") are not follow-ups.
+    """
+    question = question.strip().lower()
+    # "this video" refers to the video, not to an earlier turn
+    question = re.sub(r'\b(this|that|the) (video|lecture|talk)\b', 'video', question)
+    if any(re.search(pattern, question) for pattern in FOLLOW_UP_PATTERNS):
+        return True
+
+    words = re.findall(r"[\w\u0900-\u097F']+", question)
+    for word in words:
+        if word in ANAPHORA:
+            return True
+        if word not in FUNCTION_WORDS:
+            break  # The question names its subject first
+
+    # Elliptical: a few words, none of which names anything
+    return len(words) <= 3 and all(word in FUNCTION_WORDS or word in ANAPHORA for word in words)
+
+
+def condense_question(question: str, memory: Optional[ConversationMemory], llm=None) -> str:
+    """
+    Rewrite a follow-up question into a standalone query.
+
+    Args:
+        question: User's question
+        memory: Conversation so far (None for no history)
+        llm: Optional language model for the rewrite; without one (or if
+            the call fails) the previous question is used as context
+
+    Returns:
+        Standalone question (the original one if it is not a follow-up)
+    """
+    if memory is None or not memory.messages or not is_follow_up(question):
+        return question
+
+    if llm is not None:
+        try:
+            response = llm.invoke(CONDENSE_PROMPT.format(history=memory.render(), question=question))
+            standalone = extract_response_text(response)
+            if standalone:
+                print(f"🔁 Condensed follow-up: {standalone[:80]}")
+                return standalone
+        except Exception as e:
+            print(f"⚠️ Could not condense question: {str(e)[:50]}")
+
+    previous = memory.last_user_question()
+    return f"{question} (regarding: {previous})" if previous else question
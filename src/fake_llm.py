@@ -0,0 +1,63 @@
+# fake_llm.py
+
+import asyncio
+import hashlib
+import re
+import threading
+import time
+from typing import Iterator
+
+
+def fake_completion(prompt: str) -> str:
+    """Deterministic reply derived from the prompt."""
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+    
+    # Echo the question back when the prompt follows PROMPT_TEMPLATE
+    match = re.search(r"Question:\s*(.+)", prompt)
+    subject = f' about "{match.group(1).strip()[:80]}"' if match else ""
+    
+    return f"Fake answer {digest}{subject} from a prompt of {len(prompt)} characters."
+
+
+class FakeLLM:
+    """
+    Deterministic, offline stand-in for a chat model.
+    
+    Same prompt in, same text out, with optional simulated latency, so the
+    pipeline can be tested and benchmarked without network access. Supports
+    invoke(), stream() and ainvoke() like the real clients.
+    """
+    
+    def __init__(self, latency: float = 0.0, token_latency: float = 0.0, model: str = "fake-llm", temperature: float = 0.0):
+        self.latency = latency
+        self.token_latency = token_latency
+        self.model = model
+        self.temperature = temperature
+        self.calls = 0
+        self._lock = threading.Lock()
+    
+    def _count_call(self):
+        with self._lock:
+            self.calls += 1
+    
+    def invoke(self, prompt: str) -> str:
+        self._count_call()
+        if self.latency:
+            time.sleep(self.latency)
+        return fake_completion(prompt)
+    
+    def stream(self, prompt: str) -> Iterator[str]:
+        self._count_call()
+        if self.latency:
+            time.sleep(self.latency)
+        words = fake_completion(prompt).split(" ")
+        for i, word in enumerate(words):
+            if self.token_latency:
+                time.sleep(self.token_latency)
+            yield word if i == len(words) - 1 else word + " "
+    
+    async def ainvoke(self, prompt: str) -> str:
+        self._count_call()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return fake_completion(prompt)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Local fake of the OpenAI chat completions API.
+
+Used to exercise the LLM gateway (retries, Retry-After handling,
+concurrency limits and streaming) without network access or an API key.
+
+Run standalone:
+    python fake_openai_server.py --port 8765 --fail-first 2 --latency 0.2
+
+Then point the app at it with OPENAI_BASE_URL=http://127.0.0.1:8765/v1
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+from fake_llm import fake_completion
+
+
+class FakeOpenAIState:
+    """Behaviour knobs and counters shared by all request handlers."""
+
+    def __init__(self, latency: float = 0.0, fail_first: int = 0, retry_after: float = 0.0, fail_status: int = 429):
+        self.latency = latency
+        self.fail_first = fail_first
+        self.retry_after = retry_after
+        self.fail_status = fail_status
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    state: FakeOpenAIState = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+
+        state = self.state
+        with state.lock:
+            state.requests += 1
+            should_fail = state.requests <= state.fail_first
+            state.in_flight += 1
+            state.max_in_flight = max(state.max_in_flight, state.in_flight)
+
+        try:
+            if should_fail:
+                self.send_response(state.fail_status)
+                self.send_header("Retry-After", str(state.retry_after))
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(b'{"error": {"message": "Rate limit reached"}}')
+                return
+
+            time.sleep(state.latency)
+            prompt = "\n".join(m.get("content", "") for m in body.get("messages", []))
+            text = fake_completion(prompt)
+
+            if body.get("stream"):
+                self._stream(text)
+            else:
+                self._send_json({
+                    "object": "chat.completion",
+                    "model": body.get("model"),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                })
+        finally:
+            with state.lock:
+                state.in_flight -= 1
+
+    def _send_json(self, data: dict):
+        payload = json.dumps(data).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _stream(self, text: str):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        for word in text.split(" "):
+            chunk = {"choices": [{"index": 0, "delta": {"content": word + " "}}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+
+
+def start_fake_server(port: int = 0, **state_kwargs) -> Tuple[ThreadingHTTPServer, FakeOpenAIState, str]:
+    """
+    Start the fake server on a background thread.
+
+    Returns:
+        Tuple of (server, state, base_url); call server.shutdown() when done
+    """
+    state = FakeOpenAIState(**state_kwargs)
+    handler = type("FakeOpenAIHandler", (_Handler,), {"state": state})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    return server, state, base_url
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible chat completions server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before answering")
+    parser.add_argument("--fail-first", type=int, default=0, help="Reject the first N requests")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After sent with rejections")
+    parser.add_argument("--fail-status", type=int, default=429)
+    args = parser.parse_args()
+
+    server, _, base_url = start_fake_server(
+        port=args.port,
+        latency=args.latency,
+        fail_first=args.fail_first,
+        retry_after=args.retry_after,
+        fail_status=args.fail_status,
+    )
+    print(f"✅ Fake OpenAI server listening on {base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+# http_replay.py
+"""
+Record and replay transcript provider HTTP traffic.
+
+Provider requests in utils.py go through a pluggable transport. This module
+provides one that records real responses to a JSON "cassette" file and one
+that replays them offline, optionally injecting latency and failures so
+fallback and timeout behavior can be measured deterministically.
+
+The youtube-transcript-api library makes its own requests, so its traffic
+is not recorded; pass providers= to get_transcript to leave it out of
+offline runs.
+
+Usage:
+    from http_replay import replaying
+
+    with replaying("direct_timedtext", latency={"onrender": 30}):
+        transcript, lang = get_transcript("aircAruvnKk")
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Union
+import requests
+from requests.structures import CaseInsensitiveDict
+import utils
+
+CASSETTE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "http")
+RECORDED_HEADERS = ["Content-Type", "Retry-After"]
+
+
+class ReplayResponse:
+    """The subset of requests.Response used by the transcript providers."""
+
+    def __init__(self, status_code: int, body: str, headers: Optional[Dict[str, str]] = None, url: str = ""):
+        self.status_code = status_code
+        self.text = body
+        self.content = body.encode("utf-8")
+        self.headers = CaseInsensitiveDict(headers or {})
+        self.url = url
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class Cassette:
+    """A list of recorded (url -> response) interactions stored as JSON."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.interactions: List[dict] = []
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.interactions = json.load(f).get("interactions", [])
+
+    def find(self, url: str) -> Optional[dict]:
+        for interaction in self.interactions:
+            if interaction["request"]["url"] == url:
+                return interaction["response"]
+        return None
+
+    def add(self, url: str, response) -> None:
+        headers = {name: response.headers[name] for name in RECORDED_HEADERS if name in response.headers}
+        self.interactions.append({
+            "request": {"method": "GET", "url": url},
+            "response": {"status": response.status_code, "headers": headers, "body": response.text},
+        })
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"interactions": self.interactions}, f, indent=2, ensure_ascii=False)
+
+
+class ReplayTransport:
+    """
+    requests.get-compatible transport backed by a cassette.
+
+    In "replay" mode every request must have a recording (unknown URLs get
+    a 404 so a missing fixture shows up as a provider failure, never as a
+    network call). In "record" mode requests go to the network and the
+    responses are added to the cassette.
+
+    Faults are matched by URL substring:
+        latency:  {"onrender": 2.5}  adds 2.5s to matching requests; if that
+                  exceeds the request timeout, requests.Timeout is raised
+        failures: {"vercel": 503, "youtube.com/watch": "connection"} returns
+                  that status, or raises "timeout"/"connection" errors
+
+    With realtime=False latency is not slept but added to simulated_seconds,
+    so timing assertions are exact and tests stay fast.
+    """
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        mode: str = "replay",
+        latency: Optional[Dict[str, float]] = None,
+        failures: Optional[Dict[str, Union[int, str]]] = None,
+        realtime: bool = True,
+    ):
+        if mode not in ("replay", "record"):
+            raise ValueError(f"Unknown mode: {mode}")
+        self.cassette = cassette
+        self.mode = mode
+        self.latency = latency or {}
+        self.failures = failures or {}
+        self.realtime = realtime
+        self.simulated_seconds = 0.0
+        self.calls: List[dict] = []
+        self._lock = threading.Lock()
+
+    def __call__(self, url: str, timeout: Optional[float] = None, **kwargs):
+        delay = sum(seconds for pattern, seconds in self.latency.items() if pattern in url)
+        failure = next((value for pattern, value in self.failures.items() if pattern in url), None)
+
+        if timeout is not None and delay > timeout:
+            self._wait(timeout)
+            self._log(url, "timeout", timeout)
+            raise requests.Timeout(f"Injected latency {delay}s exceeds timeout {timeout}s for {url}")
+        self._wait(delay)
+
+        if failure == "timeout":
+            self._log(url, "timeout", delay)
+            raise requests.Timeout(f"Injected timeout for {url}")
+        if failure == "connection":
+            self._log(url, "connection", delay)
+            raise requests.ConnectionError(f"Injected connection error for {url}")
+        if isinstance(failure, int):
+            self._log(url, failure, delay)
+            return ReplayResponse(failure, "", url=url)
+
+        if self.mode == "record":
+            response = requests.get(url, timeout=timeout, **kwargs)
+            with self._lock:
+                self.cassette.add(url, response)
+            self._log(url, response.status_code, delay)
+            return response
+
+        recorded = self.cassette.find(url)
+        if recorded is None:
+            self._log(url, 404, delay)
+            return ReplayResponse(404, "", url=url)
+
+        self._log(url, recorded["status"], delay)
+        return ReplayResponse(recorded["status"], recorded["body"], recorded.get("headers"), url=url)
+
+    def _wait(self, seconds: float):
+        if seconds <= 0:
+            return
+        if self.realtime:
+            time.sleep(seconds)
+        else:
+            with self._lock:
+                self.simulated_seconds += seconds
+
+    def _log(self, url: str, outcome: Union[int, str], seconds: float):
+        with self._lock:
+            self.calls.append({"url": url, "outcome": outcome, "seconds": seconds})
+
+
+def cassette_path(name: str) -> str:
+    """Path of a cassette in the fixture corpus, by name or path."""
+    if os.path.sep in name or name.endswith(".json"):
+        return name
+    return os.path.join(CASSETTE_DIR, f"{name}.json")
+
+
+@contextmanager
+def replaying(name: str, **kwargs) -> Iterator[ReplayTransport]:
+    """Route provider HTTP traffic through a cassette for the duration of the block."""
+    transport = ReplayTransport(Cassette(cassette_path(name)), **kwargs)
+    previous = utils.set_http_transport(transport)
+    try:
+        yield transport
+    finally:
+        utils.set_http_transport(previous)
+        if transport.mode == "record":
+            transport.cassette.save()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Record transcript provider traffic for a video into a cassette")
+    parser.add_argument("video_id", help="YouTube video ID to fetch")
+    parser.add_argument("--cassette", help="Cassette name or path (defaults to the video ID)")
+    args = parser.parse_args()
+
+    with replaying(args.cassette or args.video_id, mode="record") as transport:
+        transcript, _ = utils.get_transcript(args.video_id)
+
+    print(f"💾 Recorded {len(transport.calls)} requests to {cassette_path(args.cassette or args.video_id)}")
+    print(f"   Transcript: {len(transcript or '')} chars")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Single-file index bundles for shipping prebuilt videos between nodes.
+
+A bundle holds everything needed to serve a video: chunks with their
+offsets and metadata, chunk vectors, the background summary and summary
+tree, and the coarse layer of long videos. Indexes can be built once in a
+batch job (batch_cli.py --export-dir) and imported on serving nodes
+without loading an embedding model or re-embedding anything.
+
+Queries are not served from the bundle itself: importing copies the stored
+vectors into a regular index (the memory-mapped arrays are only a staging
+buffer), so import time still grows with the number of chunks. It skips
+the embedding step, which is by far the slowest part of an ingest.
+
+File layout (little-endian):
+    magic "YTRAGIDX" | u32 version | u32 header length
+    header           JSON: index metadata, chunk texts/metadata, summary,
+                     and the offset, dtype and shape of every array
+    arrays           raw, 64-byte aligned, so they are memory-mapped as is
+    sha256           32 bytes over everything before it
+
+Usage:
+    python index_bundle.py export VIDEO_ID [--output VIDEO_ID.ytrag]
+    python index_bundle.py import bundle.ytrag [--index-id VIDEO_ID]
+    python index_bundle.py inspect bundle.ytrag
+"""
+
+import sys
+import os
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import argparse
+import hashlib
+import json
+import struct
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import coarse_index
+import rag_pipeline
+
+MAGIC = b"YTRAGIDX"
+BUNDLE_VERSION = 1
+BUNDLE_EXTENSION = ".ytrag"
+ALIGNMENT = 64
+IMPORT_BATCH_SIZE = 1000
+_PREFIX = struct.Struct("<8sII")
+_CHECKSUM_BYTES = 32
+_HASH_BLOCK = 1 << 20
+
+
+def _aligned(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _read_collection(collection, include: List[str]) -> Dict[str, list]:
+    """All records of a Chroma collection, read page by page."""
+    records = {"ids": [], **{key: [] for key in include}}
+    total = collection.count()
+    for offset in range(0, total, IMPORT_BATCH_SIZE):
+        page = collection.get(include=include, limit=IMPORT_BATCH_SIZE, offset=offset)
+        for key in records:
+            records[key].extend(page[key])
+    return records
+
+
+# ----------------------------------------------------------
+# Export
+# ----------------------------------------------------------
+def export_bundle(index_id: str, path: str) -> dict:
+    """
+    Write the index of a video to a bundle file.
+
+    Waits for a background summary that is still running, so the bundle
+    carries it.
+
+    Returns:
+        The bundle header
+    """
+    vector_store = rag_pipeline.open_index(index_id)
+    if vector_store is None:
+        raise ValueError(f"No complete index for {index_id}")
+    persist_dir = rag_pipeline.index_dir_for(index_id)
+
+    chunks = _read_collection(vector_store._collection, ["documents", "metadatas", "embeddings"])
+    vectors = np.asarray(chunks["embeddings"], dtype="<f4")
+
+    # Long videos store chunks grouped by partition, so the coarse layer
+    # can use the bundle's vectors directly
+    coarse = coarse_index.load_for_dir(persist_dir)
+    if coarse is not None:
+        position = {chunk_id: i for i, chunk_id in enumerate(chunks["ids"])}
+        order = [position[str(chunk_id)] for chunk_id in coarse.ids]
+    else:
+        order = sorted(range(len(chunks["ids"])), key=lambda i: (chunks["metadatas"][i] or {}).get("chunk_id", 0))
+
+    arrays = {"vectors": vectors[order] if len(order) else vectors}
+    if coarse is not None:
+        arrays["coarse_centroids"] = np.asarray(coarse.centroids, dtype="<f4")
+        arrays["coarse_offsets"] = np.asarray(coarse.offsets, dtype="<i8")
+
+    tree = None
+    tree_store = rag_pipeline.open_summary_tree(vector_store)
+    if tree_store._collection.count():
+        tree_records = _read_collection(tree_store._collection, ["documents", "metadatas", "embeddings"])
+        tree = {"ids": tree_records["ids"], "documents": tree_records["documents"], "metadatas": tree_records["metadatas"]}
+        arrays["tree_vectors"] = np.asarray(tree_records["embeddings"], dtype="<f4")
+
+    layout = {}
+    payload_size = 0
+    for name, array in arrays.items():
+        payload_size = _aligned(payload_size)
+        layout[name] = {"offset": payload_size, "dtype": array.dtype.str, "shape": list(array.shape)}
+        payload_size += array.nbytes
+
+    header = {
+        "format": "youtube-rag-index",
+        "version": BUNDLE_VERSION,
+        "index_id": index_id,
+        "exported_at": time.time(),
+        "index_meta": rag_pipeline.read_index_meta(persist_dir),
+        "chunks": {
+            "ids": [chunks["ids"][i] for i in order],
+            "documents": [chunks["documents"][i] for i in order],
+            "metadatas": [chunks["metadatas"][i] for i in order],
+        },
+        "summary": rag_pipeline.get_stored_summary(vector_store, wait=True),
+        "tree": tree,
+        "arrays": layout,
+    }
+    header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    payload_start = _aligned(_PREFIX.size + len(header_bytes))
+
+    tmp_path = f"{path}.tmp"
+    hasher = hashlib.sha256()
+    with open(tmp_path, "wb") as f:
+        def write(data: bytes):
+            hasher.update(data)
+            f.write(data)
+
+        write(_PREFIX.pack(MAGIC, BUNDLE_VERSION, len(header_bytes)))
+        write(header_bytes)
+        position = _PREFIX.size + len(header_bytes)
+        for name, array in arrays.items():
+            target = payload_start + layout[name]["offset"]
+            write(b"\0" * (target - position))
+            write(np.ascontiguousarray(array).tobytes())
+            position = target + array.nbytes
+        f.write(hasher.digest())
+    os.replace(tmp_path, path)
+
+    print(f"📦 Exported {index_id} ({len(order)} chunks) to {path}")
+    return header
+
+
+# ----------------------------------------------------------
+# Reading
+# ----------------------------------------------------------
+class IndexBundle:
+    """An opened bundle; arrays are memory-mapped, not read into memory."""
+
+    def __init__(self, path: str, header: dict, payload_start: int):
+        self.path = path
+        self.header = header
+        self.payload_start = payload_start
+
+    @classmethod
+    def open(cls, path: str, verify: bool = True) -> "IndexBundle":
+        """
+        Open a bundle, checking its format, version and (unless verify is
+        False) checksum.
+
+        Raises:
+            ValueError: If the file is not a valid bundle
+        """
+        with open(path, "rb") as f:
+            prefix = f.read(_PREFIX.size)
+            if len(prefix) < _PREFIX.size:
+                raise ValueError(f"{path} is not an index bundle")
+            magic, version, header_size = _PREFIX.unpack(prefix)
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not an index bundle")
+            if version > BUNDLE_VERSION:
+                raise ValueError(f"{path} is bundle version {version}; this build reads up to {BUNDLE_VERSION}")
+            try:
+                header = json.loads(f.read(header_size).decode("utf-8"))
+            except ValueError as e:
+                raise ValueError(f"{path} has a corrupt header: {e}") from e
+
+        if verify:
+            cls._verify(path)
+        return cls(path, header, _aligned(_PREFIX.size + header_size))
+
+    @staticmethod
+    def _verify(path: str):
+        size = os.path.getsize(path) - _CHECKSUM_BYTES
+        hasher = hashlib.sha256()
+        with open(path, "rb") as f:
+            remaining = size
+            while remaining > 0:
+                block = f.read(min(_HASH_BLOCK, remaining))
+                if not block:
+                    break
+                hasher.update(block)
+                remaining -= len(block)
+            if hasher.digest() != f.read(_CHECKSUM_BYTES):
+                raise ValueError(f"{path} failed its checksum (truncated or corrupted)")
+
+    def has_array(self, name: str) -> bool:
+        return name in self.header["arrays"]
+
+    def array(self, name: str) -> np.ndarray:
+        """Read-only, zero-copy view of an array stored in the bundle."""
+        spec = self.header["arrays"][name]
+        shape = tuple(spec["shape"])
+        if 0 in shape:
+            return np.empty(shape, dtype=spec["dtype"])
+        return np.memmap(self.path, dtype=spec["dtype"], mode="r", offset=self.payload_start + spec["offset"], shape=shape)
+
+
+# ----------------------------------------------------------
+# Import
+# ----------------------------------------------------------
+def import_bundle(path: str, index_id: Optional[str] = None, verify: bool = True) -> str:
+    """
+    Install a bundle as the index of a video, replacing any existing one.
+
+    Chunks are added to Chroma with their stored vectors, so no embedding
+    model is loaded; the vectors are still copied into the index batch by
+    batch, so this takes time proportional to the number of chunks. As with process_transcript, index.json is written last
+    and marks the index as complete.
+
+    Args:
+        path: Bundle file
+        index_id: Index (video) ID to install it as; defaults to the ID it
+            was exported from
+        verify: Check the bundle checksum first
+
+    Returns:
+        The index ID
+    """
+    bundle = IndexBundle.open(path, verify=verify)
+    header = bundle.header
+    index_id = index_id or header["index_id"]
+    persist_dir = rag_pipeline.index_dir_for(index_id)
+    meta = dict(header["index_meta"])
+    embed_model = meta.get("embed_model", rag_pipeline.EMBED_MODEL)
+
+    started = time.perf_counter()
+    rag_pipeline.clear_vector_store(persist_dir)
+
+    embeddings = rag_pipeline.LazyEmbeddings(embed_model)
+    vector_store = rag_pipeline.new_store(
+        persist_dir,
+        embeddings,
+        collection_metadata={"embed_model": embed_model, "language": meta.get("language", "unknown")},
+    )
+    chunks = header["chunks"]
+    vectors = bundle.array("vectors")
+    for start in range(0, len(chunks["ids"]), IMPORT_BATCH_SIZE):
+        end = start + IMPORT_BATCH_SIZE
+        vector_store._collection.add(
+            ids=chunks["ids"][start:end],
+            embeddings=vectors[start:end],
+            documents=chunks["documents"][start:end],
+            metadatas=chunks["metadatas"][start:end],
+        )
+
+    if header.get("tree"):
+        tree = header["tree"]
+        tree_store = rag_pipeline.new_store(persist_dir, embeddings, collection=rag_pipeline.TREE_COLLECTION)
+        tree_store._collection.add(
+            ids=tree["ids"],
+            embeddings=bundle.array("tree_vectors"),
+            documents=tree["documents"],
+            metadatas=tree["metadatas"],
+        )
+
+    if header.get("summary"):
+        with open(os.path.join(persist_dir, rag_pipeline.SUMMARY_FILE), "w", encoding="utf-8") as f:
+            f.write(header["summary"])
+
+    if bundle.has_array("coarse_centroids"):
+        coarse = coarse_index.CoarseIndex(
+            bundle.array("coarse_centroids"),
+            bundle.array("coarse_offsets"),
+            coarse_index.normalize(vectors),  # Chroma keeps the vectors as embedded
+            np.asarray(chunks["ids"]),
+        )
+        coarse.save(os.path.join(persist_dir, coarse_index.COARSE_FILE))
+
+    meta.update(imported_from=os.path.basename(path), bundle_version=header["version"], imported_at=time.time())
+    with open(os.path.join(persist_dir, rag_pipeline.INDEX_META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+    print(f"📥 Imported {index_id} ({len(chunks['ids'])} chunks) in {time.perf_counter() - started:.2f}s")
+    return index_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export and import single-file index bundles")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="Write a video's index to a bundle")
+    export_parser.add_argument("index_id", help="Video ID of an existing index")
+    export_parser.add_argument("--output", help=f"Bundle file (defaults to <index_id>{BUNDLE_EXTENSION})")
+
+    import_parser = commands.add_parser("import", help="Install a bundle as a video's index")
+    import_parser.add_argument("path", help="Bundle file")
+    import_parser.add_argument("--index-id", help="Install under this video ID instead of the exported one")
+    import_parser.add_argument("--no-verify", action="store_true", help="Skip the checksum check")
+
+    inspect_parser = commands.add_parser("inspect", help="Show a bundle's metadata")
+    inspect_parser.add_argument("path", help="Bundle file")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "export":
+            export_bundle(args.index_id, args.output or f"{args.index_id}{BUNDLE_EXTENSION}")
+        elif args.command == "import":
+            import_bundle(args.path, args.index_id, verify=not args.no_verify)
+        else:
+            header = IndexBundle.open(args.path).header
+            print(json.dumps({
+                "index_id": header["index_id"],
+                "version": header["version"],
+                "exported_at": header["exported_at"],
+                "index_meta": header["index_meta"],
+                "chunks": len(header["chunks"]["ids"]),
+                "has_summary": bool(header.get("summary")),
+                "has_tree": bool(header.get("tree")),
+                "arrays": header["arrays"],
+            }, indent=2, ensure_ascii=False))
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Lightweight HTTP index server shared by app replicas.
+
+Serves a LocalBackend (Chroma, one database per index ID) over JSON:
+    GET  /health
+    POST /v1/add      {collection, ids, embeddings, documents, metadatas}
+    POST /v1/query    {collection, embeddings: [[...], ...], k, where}
+                      -> {"hits": [[{id, distance, document, metadata}], ...]}
+    POST /v1/get      {collection, ids, where, include, limit, offset}
+    POST /v1/count    {collection} -> {"count": n}
+    POST /v1/delete   {collection}
+
+Connections are kept alive (HTTP/1.1), so clients can pool them, and each
+query request carries a batch of vectors. Pointing --root at an existing
+./indexes directory serves the indexes already built there.
+
+Usage:
+    python index_server.py --port 8765 --root ./indexes
+    VECTOR_BACKEND=remote INDEX_SERVER_URL=http://127.0.0.1:8765 streamlit run app.py
+"""
+
+import sys
+import os
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import argparse
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from vector_backend import LocalBackend
+
+DEFAULT_PORT = 8765
+DEFAULT_ROOT = "./indexes"
+MAX_BODY_BYTES = 256 * 1024 * 1024
+
+
+class IndexServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, backend: LocalBackend):
+        super().__init__(address, _IndexHandler)
+        self.backend = backend
+        self.stats = {"connections": 0, "requests": 0, "query_vectors": 0}
+        self.stats_lock = threading.Lock()
+
+    def count(self, name: str, value: int = 1):
+        with self.stats_lock:
+            self.stats[name] += value
+
+
+class _IndexHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, so client pools reuse connections
+
+    def setup(self):
+        super().setup()
+        self.server.count("connections")
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.server.count("requests")
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        else:
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        self.server.count("requests")
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            self._send_json(413, {"error": "Request body too large"})
+            return
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError as e:
+            self._send_json(400, {"error": f"Invalid JSON: {e}"})
+            return
+
+        operation = self.path[len("/v1/"):] if self.path.startswith("/v1/") else None
+        handler = _OPERATIONS.get(operation)
+        if handler is None:
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+
+        try:
+            self._send_json(200, handler(self.server, payload))
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(400, {"error": f"{type(e).__name__}: {e}"})
+        except Exception as e:
+            print(f"❌ Index server {operation} failed: {e}")
+            self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+
+    def log_message(self, format, *args):
+        pass  # One line per query would flood the console
+
+
+def _add(server: IndexServer, payload: dict) -> dict:
+    server.backend.add(
+        payload["collection"], payload["ids"], payload["embeddings"], payload["documents"], payload["metadatas"],
+    )
+    return {"added": len(payload["ids"])}
+
+
+def _query(server: IndexServer, payload: dict) -> dict:
+    server.count("query_vectors", len(payload["embeddings"]))
+    return {"hits": server.backend.query(payload["collection"], payload["embeddings"], int(payload["k"]), payload.get("where"))}
+
+
+def _get(server: IndexServer, payload: dict) -> dict:
+    result = server.backend.get(
+        payload["collection"],
+        ids=payload.get("ids"),
+        where=payload.get("where"),
+        include=payload.get("include") or ("documents", "metadatas"),
+        limit=payload.get("limit"),
+        offset=payload.get("offset"),
+    )
+    if result.get("embeddings") is not None:
+        result["embeddings"] = [list(map(float, vector)) for vector in result["embeddings"]]
+    return result
+
+
+def _count(server: IndexServer, payload: dict) -> dict:
+    return {"count": server.backend.count(payload["collection"])}
+
+
+def _delete(server: IndexServer, payload: dict) -> dict:
+    server.backend.delete_collection(payload["collection"])
+    return {"deleted": payload["collection"]}
+
+
+_OPERATIONS = {"add": _add, "query": _query, "get": _get, "count": _count, "delete": _delete}
+
+
+def create_server(root: str = DEFAULT_ROOT, host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> IndexServer:
+    """Create (but don't start) an index server; port 0 picks a free port."""
+    os.makedirs(root, exist_ok=True)
+    return IndexServer((host, port), LocalBackend(root))
+
+
+def serve_in_background(root: str = DEFAULT_ROOT, host: str = "127.0.0.1", port: int = 0) -> IndexServer:
+    """Start an index server on a daemon thread (used by tests and benchmarks)."""
+    server = create_server(root, host, port)
+    threading.Thread(target=server.serve_forever, daemon=True, name="index-server").start()
+    return server
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Serve vector indexes over HTTP")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--root", default=DEFAULT_ROOT, help="Directory holding one Chroma database per index")
+    args = parser.parse_args(argv)
+
+    server = create_server(args.root, args.host, args.port)
+    print(f"🗄️ Index server on http://{args.host}:{server.server_address[1]} (root {args.root})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
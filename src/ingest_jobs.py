@@ -0,0 +1,211 @@
+# ingest_jobs.py
+
+import contextvars
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+from language import detect_language
+from rag_pipeline import index_dir_for, open_index, process_transcript, read_index_meta, transcript_hash
+from utils import get_transcript
+import mem_profile
+
+# Configuration
+INGEST_WORKERS = 2
+PREVIEW_CHARS = 500
+JOB_TTL_SECONDS = 3600      # Finished jobs are forgotten this long after their last update
+
+# Job statuses, in the order a job moves through them
+QUEUED = "queued"
+FETCHING = "fetching"
+EMBEDDING = "embedding"
+INDEXING = "indexing"
+DONE = "done"
+FAILED = "failed"
+
+
+class IngestJob:
+    """Progress and result of one background ingestion."""
+
+    def __init__(self, job_id: str, video_id: str):
+        self.job_id = job_id
+        self.video_id = video_id
+        self.status = QUEUED
+        self.transcript_chars = 0
+        self.transcript_preview = ""
+        self.detected_language = "unknown"
+        self.chunks_done = 0
+        self.chunks_total = 0
+        self.error = None
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self._lock = threading.Lock()
+
+    def update(self, **fields):
+        with self._lock:
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self.updated_at = time.time()
+
+    def snapshot(self) -> dict:
+        """Copy of the job's progress, safe to read from another thread."""
+        with self._lock:
+            return {
+                "job_id": self.job_id,
+                "video_id": self.video_id,
+                "status": self.status,
+                "transcript_chars": self.transcript_chars,
+                "detected_language": self.detected_language,
+                "chunks_done": self.chunks_done,
+                "chunks_total": self.chunks_total,
+                "error": self.error,
+                "created_at": self.created_at,
+                "updated_at": self.updated_at,
+            }
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+
+# Process-wide job registry, shared by all sessions
+_executor = ThreadPoolExecutor(max_workers=INGEST_WORKERS, thread_name_prefix="ingest")
+_jobs: Dict[str, IngestJob] = {}
+_job_by_video: Dict[str, str] = {}
+_jobs_lock = threading.Lock()
+
+mem_profile.register_gauge("ingest_jobs", lambda: len(_jobs))
+
+
+def _prune_jobs(now: Optional[float] = None):
+    """Forget finished jobs older than JOB_TTL_SECONDS. Call with _jobs_lock held."""
+    cutoff = (now or time.time()) - JOB_TTL_SECONDS
+    expired = [job_id for job_id, job in _jobs.items() if job.finished and job.updated_at < cutoff]
+    for job_id in expired:
+        job = _jobs.pop(job_id)
+        if _job_by_video.get(job.video_id) == job_id:
+            del _job_by_video[job.video_id]
+
+
+def submit_ingest(video_id: str, llm=None) -> str:
+    """
+    Queue a video for background ingestion.
+
+    If the same video is already being ingested (or has been ingested by
+    this process), that job is reused instead of indexing the video again.
+
+    Args:
+        video_id: YouTube video ID
+        llm: Optional language model for the background summary
+
+    Returns:
+        Job ID to poll with get_job()
+    """
+    return _submit(video_id, llm)
+
+
+def submit_manual_ingest(transcript: str, llm=None) -> str:
+    """
+    Queue a pasted transcript for background ingestion.
+
+    The transcript is keyed by its content hash, so pasting the same text
+    again reuses the existing index instead of embedding it a second time.
+
+    Args:
+        transcript: Pasted transcript text
+        llm: Optional language model for the background summary
+
+    Returns:
+        Job ID to poll with get_job()
+    """
+    index_id = f"manual-{transcript_hash(transcript)[:16]}"
+    return _submit(index_id, llm, transcript=transcript)
+
+
+def _submit(video_id: str, llm, transcript: Optional[str] = None) -> str:
+    with _jobs_lock:
+        _prune_jobs()
+        existing_id = _job_by_video.get(video_id)
+        if existing_id and _jobs[existing_id].status != FAILED:
+            return existing_id
+
+        job = IngestJob(uuid.uuid4().hex[:12], video_id)
+        _jobs[job.job_id] = job
+        _job_by_video[video_id] = job.job_id
+
+    # Run in a copy of the caller's context so the job is attributed to the
+    # session that started it (telemetry spans, memory profile reports)
+    _executor.submit(contextvars.copy_context().run, _run_ingest, job, llm, transcript)
+    print(f"🕒 Ingest job {job.job_id} queued for {video_id}")
+    return job.job_id
+
+
+def get_job(job_id: str) -> Optional[IngestJob]:
+    """Get an ingestion job by ID, or None if it is unknown or has expired."""
+    with _jobs_lock:
+        _prune_jobs()
+        return _jobs.get(job_id)
+
+
+def _run_ingest(job: IngestJob, llm, transcript: Optional[str] = None):
+    """
+    Fetch (unless a transcript is given), chunk, embed and index a video,
+    recording progress on the job.
+    """
+    try:
+        # Reuse an index built earlier, e.g. before a restart
+        vector_store = open_index(job.video_id)
+        if vector_store is not None:
+            print(f"♻️ Reusing existing index for {job.video_id}")
+            first_chunk = vector_store.get(where={"chunk_id": 0}, include=["documents"])["documents"]
+            job.update(
+                status=DONE,
+                transcript_preview=(first_chunk[0] if first_chunk else "")[:PREVIEW_CHARS],
+                detected_language=read_index_meta(index_dir_for(job.video_id)).get("language", "unknown"),
+            )
+            return
+
+        if transcript is None:
+            job.update(status=FETCHING)
+            transcript, _ = get_transcript(job.video_id)
+            source = "youtube_transcript"
+        else:
+            source = "manual_transcript"
+
+        if transcript is None:
+            job.update(status=FAILED, error="Could not fetch transcript. The video might not have captions enabled.")
+            return
+
+        # Providers do not reliably report the caption language, so detect it;
+        # it also selects the embedding model
+        detected_lang = detect_language(transcript)
+        job.update(
+            status=EMBEDDING,
+            transcript_chars=len(transcript),
+            transcript_preview=transcript[:PREVIEW_CHARS],
+            detected_language=detected_lang,
+        )
+
+        def on_progress(stage: str, done: int, total: int):
+            job.update(
+                chunks_done=done,
+                chunks_total=total,
+                status=INDEXING if stage == "indexing" else EMBEDDING,
+            )
+
+        # The finished index is cached by rag_pipeline; sessions open it by video ID
+        process_transcript(
+            transcript,
+            llm=llm,
+            persist_dir=index_dir_for(job.video_id),
+            progress_callback=on_progress,
+            source=source,
+            language=detected_lang,
+        )
+        job.update(status=DONE)
+        print(f"✅ Ingest job {job.job_id} finished")
+
+    except Exception as e:
+        print(f"❌ Ingest job {job.job_id} failed: {e}")
+        job.update(status=FAILED, error=str(e))
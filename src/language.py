@@ -0,0 +1,93 @@
+# language.py
+"""
+Lightweight language detection for transcripts and questions.
+
+Non-Latin scripts are identified from Unicode ranges; Latin-script text is
+told apart by common function words. No external dependency and fast
+enough to run on every question.
+"""
+
+import re
+from collections import Counter
+from typing import Dict
+
+SAMPLE_CHARS = 5000          # Transcripts are detected from their start
+MIN_LETTERS = 3              # Less than this is "unknown"
+MIN_STOPWORD_HITS = 1
+
+# (language code, first code point, last code point)
+SCRIPT_RANGES = [
+    ("hi", 0x0900, 0x097F),   # Devanagari (Hindi, Marathi, Nepali)
+    ("bn", 0x0980, 0x09FF),   # Bengali
+    ("pa", 0x0A00, 0x0A7F),   # Gurmukhi
+    ("gu", 0x0A80, 0x0AFF),   # Gujarati
+    ("ta", 0x0B80, 0x0BFF),   # Tamil
+    ("te", 0x0C00, 0x0C7F),   # Telugu
+    ("kn", 0x0C80, 0x0CFF),   # Kannada
+    ("ml", 0x0D00, 0x0D7F),   # Malayalam
+    ("th", 0x0E00, 0x0E7F),   # Thai
+    ("ar", 0x0600, 0x06FF),   # Arabic script (Arabic, Urdu, Persian)
+    ("ru", 0x0400, 0x04FF),   # Cyrillic
+    ("el", 0x0370, 0x03FF),   # Greek
+    ("ko", 0xAC00, 0xD7AF),   # Hangul
+    ("ja", 0x3040, 0x30FF),   # Hiragana and Katakana
+    ("zh", 0x4E00, 0x9FFF),   # CJK ideographs
+]
+
+# Letters used in Urdu but not Arabic
+URDU_LETTERS = set("ٹڈڑںےگ")
+
+# Frequent function words for Latin-script languages
+STOPWORDS: Dict[str, set] = {
+    "en": {"the", "and", "is", "of", "to", "in", "that", "it", "what", "this", "for", "are", "with", "how", "why", "does"},
+    "es": {"el", "la", "de", "que", "y", "en", "los", "es", "por", "qué", "una", "las", "del", "cómo"},
+    "fr": {"le", "la", "les", "de", "et", "est", "que", "des", "un", "une", "pour", "qui", "dans", "pas"},
+    "de": {"der", "die", "das", "und", "ist", "nicht", "ein", "eine", "zu", "den", "mit", "wie", "was", "ich"},
+    "pt": {"o", "a", "de", "que", "e", "é", "do", "da", "em", "um", "uma", "não", "os", "para"},
+    "it": {"il", "di", "che", "e", "la", "è", "un", "per", "non", "una", "sono", "come", "del", "della"},
+}
+
+_WORD_RE = re.compile(r"[^\W\d_]+", re.UNICODE)
+
+
+def _script_of(char: str) -> str:
+    code_point = ord(char)
+    for language, start, end in SCRIPT_RANGES:
+        if start <= code_point <= end:
+            return language
+    return "latin" if char.isascii() or "À" <= char <= "ɏ" else "other"
+
+
+def detect_language(text: str, sample_chars: int = SAMPLE_CHARS) -> str:
+    """
+    Detect the main language of a text.
+
+    Args:
+        text: Transcript or question
+        sample_chars: Only this many characters from the start are looked at
+
+    Returns:
+        ISO 639-1 code (e.g. "en", "hi"), or "unknown" if the text is too
+        short or ambiguous
+    """
+    sample = (text or "")[:sample_chars]
+    letters = [char for char in sample if char.isalpha()]
+    if len(letters) < MIN_LETTERS:
+        return "unknown"
+
+    scripts = Counter(_script_of(char) for char in letters)
+    script, _ = scripts.most_common(1)[0]
+
+    if script == "ar":
+        return "ur" if any(char in URDU_LETTERS for char in sample) else "ar"
+    if script == "zh" and scripts.get("ja"):
+        return "ja"  # Japanese mixes kanji with kana
+    if script not in ("latin", "other"):
+        return script
+
+    words = [word.lower() for word in _WORD_RE.findall(sample)]
+    hits = {language: sum(1 for word in words if word in stopwords) for language, stopwords in STOPWORDS.items()}
+    language, best = max(hits.items(), key=lambda item: item[1])
+    if best < MIN_STOPWORD_HITS or list(hits.values()).count(best) > 1:
+        return "unknown"
+    return language
@@ -0,0 +1,187 @@
+# llm_cache.py
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Iterator, Optional
+import telemetry
+from utils import extract_response_text
+
+# Configuration
+CACHE_DIR = os.getenv("LLM_CACHE_DIR", "./llm_cache")
+CACHE_MAX_BYTES = 100 * 1024 * 1024     # Disk cache size before evicting
+CACHE_MAX_ENTRIES = 1000                # Memory cache size before evicting
+
+
+class MemoryCacheBackend:
+    """In-process LRU cache, bounded by number of entries."""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class DiskCacheBackend:
+    """
+    Local disk cache with one JSON file per entry, bounded by total size.
+    Least recently used entries (by file mtime) are evicted first.
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._total_bytes = sum(
+            entry.stat().st_size for entry in os.scandir(cache_dir) if entry.name.endswith(".json")
+        )
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                value = json.load(f)["response"]
+            os.utime(path)  # Mark as recently used
+            return value
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def set(self, key: str, value: str):
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+
+        with self._lock:
+            try:
+                previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump({"response": value}, f, ensure_ascii=False)
+                os.replace(tmp_path, path)
+                self._total_bytes += os.path.getsize(path) - previous_size
+            except OSError as e:
+                print(f"⚠️ Could not write LLM cache entry: {e}")
+                return
+
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Delete least recently used entries until under 90% of the size budget."""
+        entries = sorted(
+            (entry for entry in os.scandir(self.cache_dir) if entry.name.endswith(".json")),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        target = int(self.max_bytes * 0.9)
+        for entry in entries:
+            if self._total_bytes <= target:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                self._total_bytes -= size
+            except OSError:
+                continue
+
+
+def cache_key(model: str, temperature, prompt: str) -> str:
+    """Cache key for an exact (model, temperature, prompt) combination."""
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    return hashlib.sha256(f"{model}|{temperature}|{prompt_hash}".encode("utf-8")).hexdigest()
+
+
+class CachedLLM:
+    """
+    Wraps an llm so byte-identical prompts are answered from a cache.
+
+    Supports invoke(), stream() and ainvoke(); a streamed answer is cached
+    once it has been received in full.
+    """
+
+    def __init__(self, llm, backend=None, model: Optional[str] = None, temperature=None):
+        self.llm = llm
+        self.backend = backend if backend is not None else MemoryCacheBackend()
+        self.model = model or getattr(llm, "model", None) or getattr(llm, "model_name", "unknown")
+        self.temperature = temperature if temperature is not None else getattr(llm, "temperature", None)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _key(self, prompt: str) -> str:
+        return cache_key(self.model, self.temperature, prompt)
+
+    def _lookup(self, key: str) -> Optional[str]:
+        value = self.backend.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        telemetry.count_cache("llm", hit=value is not None)
+        return value
+
+    def invoke(self, prompt: str) -> str:
+        key = self._key(prompt)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+
+        text = extract_response_text(self.llm.invoke(prompt))
+        self.backend.set(key, text)
+        return text
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        key = self._key(prompt)
+        cached = self._lookup(key)
+        if cached is not None:
+            yield cached
+            return
+
+        parts = []
+        for chunk in self.llm.stream(prompt):
+            text = chunk if isinstance(chunk, str) else getattr(chunk, "content", str(chunk))
+            parts.append(text)
+            yield text
+
+        self.backend.set(key, "".join(parts).strip())
+
+    async def ainvoke(self, prompt: str) -> str:
+        key = self._key(prompt)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+
+        if hasattr(self.llm, "ainvoke"):
+            response = await self.llm.ainvoke(prompt)
+        else:
+            response = await asyncio.to_thread(self.llm.invoke, prompt)
+
+        text = extract_response_text(response)
+        self.backend.set(key, text)
+        return text
+
+    def __getattr__(self, name):
+        # Expose the wrapped client's extras (e.g. the gateway's metrics())
+        if name == "llm":
+            raise AttributeError(name)
+        return getattr(self.llm, name)
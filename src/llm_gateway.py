@@ -0,0 +1,333 @@
+# llm_gateway.py
+
+import asyncio
+import email.utils
+import json
+import os
+import random
+import threading
+import time
+from typing import Dict, Iterator, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from fake_llm import FakeLLM
+from llm_cache import CachedLLM, DiskCacheBackend
+import telemetry
+
+# Configuration
+DEFAULT_MODEL = "gpt-4o-mini"
+DEFAULT_TEMPERATURE = 0.2
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "300"))
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0          # Seconds before the first retry
+BACKOFF_MAX = 30.0          # Cap for a single exponential backoff sleep (Retry-After is honored in full)
+REQUEST_DEADLINE = 180.0    # Give up rather than retry past this many seconds per request
+REQUEST_TIMEOUT = 60.0      # Seconds to wait for the API to respond
+QUEUE_TIMEOUT = 120.0       # Seconds to wait for a free slot before giving up
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class LLMGatewayError(Exception):
+    """Raised when the LLM API cannot be reached or keeps failing."""
+
+
+class _RateLimiter:
+    """Token bucket limiting how many requests start per second."""
+
+    def __init__(self, rate_per_second: float, burst: int):
+        self.rate = rate_per_second
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class LLMGateway:
+    """
+    Process-wide client for an OpenAI-compatible chat completions API.
+
+    All sessions share one gateway so concurrency and request rate are
+    limited globally. Failed requests (429 and 5xx) are retried with
+    exponential backoff, honoring the server's Retry-After header; a
+    request fails right away instead of waiting past its deadline.
+
+    Queue depth, in-flight requests, retries and rate-limited responses are
+    exported as llm_gateway_* metrics (see telemetry.render_metrics).
+
+    Exposes invoke(), stream() and ainvoke(), so it can be passed anywhere
+    the pipeline expects an llm.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model: str = DEFAULT_MODEL,
+        temperature: float = DEFAULT_TEMPERATURE,
+        base_url: str = DEFAULT_BASE_URL,
+        max_concurrency: int = MAX_CONCURRENCY,
+        requests_per_minute: int = REQUESTS_PER_MINUTE,
+        max_retries: int = MAX_RETRIES,
+        timeout: float = REQUEST_TIMEOUT,
+        queue_timeout: float = QUEUE_TIMEOUT,
+        backoff_max: float = BACKOFF_MAX,
+        deadline: float = REQUEST_DEADLINE,
+    ):
+        self.api_key = api_key
+        self.model = model
+        self.temperature = temperature
+        self.base_url = base_url.rstrip("/")
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.queue_timeout = queue_timeout
+        self.backoff_max = backoff_max
+        self.deadline = deadline
+
+        # One pooled HTTP session shared by all callers
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._rate_limiter = _RateLimiter(requests_per_minute / 60.0, burst=max_concurrency)
+
+        self._metrics_lock = threading.Lock()
+        self._metrics = {
+            "queue_depth": 0,
+            "in_flight": 0,
+            "requests_total": 0,
+            "retries_total": 0,
+            "rate_limited_total": 0,
+            "errors_total": 0,
+        }
+        for name in ("queue_depth", "in_flight"):
+            telemetry.register_gauge(f"llm_gateway_{name}", lambda name=name: self._metrics[name], model=model)
+        telemetry.register_gauge("llm_gateway_max_concurrency", lambda: self.max_concurrency, model=model)
+
+    # ------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------
+    def invoke(self, prompt: str) -> str:
+        """Send a prompt and return the full completion text."""
+        response = self._send(self._payload(prompt, stream=False), stream=False)
+        try:
+            data = response.json()
+            return data["choices"][0]["message"]["content"] or ""
+        except (ValueError, KeyError, IndexError) as e:
+            self._count("errors_total")
+            raise LLMGatewayError(f"Unexpected response from LLM API: {e}")
+        finally:
+            response.close()
+            self._release()
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        """Send a prompt and yield completion text as it is generated."""
+        response = self._send(self._payload(prompt, stream=True), stream=True)
+        try:
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+
+                try:
+                    delta = json.loads(data)["choices"][0].get("delta", {})
+                except (ValueError, KeyError, IndexError):
+                    continue
+
+                if delta.get("content"):
+                    yield delta["content"]
+        except requests.RequestException as e:
+            self._count("errors_total")
+            raise LLMGatewayError(f"LLM stream interrupted: {e}")
+        finally:
+            response.close()
+            self._release()
+
+    async def ainvoke(self, prompt: str) -> str:
+        """Async variant of invoke; runs the request in a worker thread."""
+        return await asyncio.to_thread(self.invoke, prompt)
+
+    def metrics(self) -> Dict[str, int]:
+        """Snapshot of queue depth, in-flight requests and error counters."""
+        with self._metrics_lock:
+            snapshot = dict(self._metrics)
+        snapshot["max_concurrency"] = self.max_concurrency
+        return snapshot
+
+    # ------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------
+    def _payload(self, prompt: str, stream: bool) -> dict:
+        return {
+            "model": self.model,
+            "temperature": self.temperature,
+            "messages": [{"role": "user", "content": prompt}],
+            "stream": stream,
+        }
+
+    def _count(self, name: str, delta: int = 1):
+        with self._metrics_lock:
+            self._metrics[name] += delta
+        if name.endswith("_total"):
+            telemetry.inc(f"llm_gateway_{name}", delta, model=self.model)
+
+    def _acquire(self):
+        """Wait for a concurrency slot and a rate-limit token."""
+        self._count("queue_depth")
+        try:
+            if not self._semaphore.acquire(timeout=self.queue_timeout):
+                self._count("errors_total")
+                raise LLMGatewayError("LLM gateway is busy, please try again in a moment")
+        finally:
+            self._count("queue_depth", -1)
+
+        self._rate_limiter.acquire()
+        self._count("in_flight")
+
+    def _release(self):
+        self._count("in_flight", -1)
+        self._semaphore.release()
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        if retry_after is not None:
+            return retry_after
+        delay = min(self.backoff_max, BACKOFF_BASE * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _send(self, payload: dict, stream: bool) -> requests.Response:
+        """
+        POST a chat completion with retries.
+
+        On success the concurrency slot is still held; the caller must call
+        _release() once it has consumed the response.
+        """
+        url = f"{self.base_url}/chat/completions"
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+
+        deadline = time.monotonic() + self.deadline
+        last_error = "unknown error"
+        for attempt in range(self.max_retries + 1):
+            self._acquire()
+            self._count("requests_total")
+            retry_after = None
+
+            try:
+                response = self._session.post(
+                    url, json=payload, headers=headers, timeout=self.timeout, stream=stream
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._release()
+                last_error = str(e)
+            else:
+                if response.status_code == 200:
+                    return response
+
+                self._release()
+                last_error = f"HTTP {response.status_code}: {response.text[:200]}"
+                response.close()
+
+                if response.status_code not in RETRY_STATUSES:
+                    self._count("errors_total")
+                    raise LLMGatewayError(f"LLM request failed ({last_error})")
+
+                if response.status_code == 429:
+                    self._count("rate_limited_total")
+                retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+
+            if attempt == self.max_retries:
+                break
+
+            delay = self._backoff(attempt, retry_after)
+            if time.monotonic() + delay > deadline:
+                # Don't hold a caller (and its thread) past the deadline
+                break
+            print(f"⚠️ LLM request failed ({last_error[:50]}), retrying in {delay:.1f}s")
+            self._count("retries_total")
+            time.sleep(delay)
+
+        self._count("errors_total")
+        raise LLMGatewayError(f"LLM request failed after {attempt + 1} attempts ({last_error})")
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given either in seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+        return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+# ----------------------------------------------------------
+# Process-wide gateway
+# ----------------------------------------------------------
+_gateway: Optional[LLMGateway] = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway(**kwargs) -> LLMGateway:
+    """
+    Get the process-wide LLM gateway, creating it on first use.
+
+    Configuration comes from OPENAI_API_KEY, OPENAI_BASE_URL and LLM_MODEL
+    unless overridden by keyword arguments on the first call.
+    """
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            kwargs.setdefault("api_key", os.getenv("OPENAI_API_KEY"))
+            kwargs.setdefault("base_url", os.getenv("OPENAI_BASE_URL", DEFAULT_BASE_URL))
+            kwargs.setdefault("model", os.getenv("LLM_MODEL", DEFAULT_MODEL))
+            _gateway = LLMGateway(**kwargs)
+        return _gateway
+
+
+# ----------------------------------------------------------
+# Default LLM for the app and API
+# ----------------------------------------------------------
+_default_llm = None
+_default_llm_lock = threading.Lock()
+
+
+def get_default_llm():
+    """
+    Get the process-wide LLM used by the app and API: the shared gateway
+    wrapped in the on-disk response cache, or the deterministic fake LLM
+    when USE_FAKE_LLM=1 (offline runs, no API key needed).
+    """
+    global _default_llm
+    with _default_llm_lock:
+        if _default_llm is None:
+            if os.getenv("USE_FAKE_LLM") == "1":
+                _default_llm = CachedLLM(FakeLLM(), DiskCacheBackend())
+            else:
+                _default_llm = CachedLLM(get_gateway(), DiskCacheBackend())
+        return _default_llm
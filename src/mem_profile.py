@@ -0,0 +1,201 @@
+# mem_profile.py
+"""
+Opt-in memory profiling of pipeline stages.
+
+When MEM_PROFILE=1, every profiled stage (get_transcript,
+process_transcript, get_answer, ...) takes a tracemalloc snapshot before
+and after it runs and records:
+    - net Python allocations and the top allocation sites that grew
+    - process RSS before and after
+    - any registered gauges (e.g. number of open indexes)
+
+Entries are appended to a JSON report per session in MEM_PROFILE_DIR
+(default ./mem_reports), so steady growth can be attributed to a stage.
+Snapshots are process-wide: stages running concurrently in other threads
+show up in each other's numbers.
+
+Configuration:
+    MEM_PROFILE=1            enable profiling
+    MEM_PROFILE_DIR=path     where reports are written
+    MEM_PROFILE_FRAMES=10    traceback depth kept by tracemalloc
+    MEM_PROFILE_TOP=15       allocation sites kept per stage
+"""
+
+import contextvars
+import functools
+import inspect
+import json
+import os
+import re
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+# Configuration
+ENABLED = os.getenv("MEM_PROFILE") == "1"
+REPORT_DIR = os.getenv("MEM_PROFILE_DIR", "./mem_reports")
+TRACE_FRAMES = int(os.getenv("MEM_PROFILE_FRAMES", "10"))
+TOP_SITES = int(os.getenv("MEM_PROFILE_TOP", "15"))
+MAX_ENTRIES = 500           # Per session; stage totals keep counting past this
+MAX_SESSIONS = 100          # Reports kept in memory; older ones are reloaded from disk when needed
+DEFAULT_SESSION = "process"
+
+_session: contextvars.ContextVar = contextvars.ContextVar("mem_profile_session", default=DEFAULT_SESSION)
+_gauges: Dict[str, Callable[[], float]] = {}
+_reports: "OrderedDict[str, dict]" = OrderedDict()   # Least recently written first
+_lock = threading.Lock()
+
+
+def rss_mb() -> float:
+    """Current resident set size of the process in MB."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    # No /proc (macOS): fall back to the peak, which is the best available
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def set_session(session_id: str):
+    """Attribute stages run from the current context to a session."""
+    _session.set(session_id)
+
+
+def register_gauge(name: str, fn: Callable[[], float]):
+    """Record fn() with every stage entry (e.g. cache sizes)."""
+    _gauges[name] = fn
+
+
+def _top_sites(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot) -> List[dict]:
+    stats = after.compare_to(before, "traceback")
+    sites = []
+    for stat in stats[:TOP_SITES]:
+        if stat.size_diff <= 0:
+            break
+        frames = [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback]
+        sites.append({
+            "size_diff_kb": round(stat.size_diff / 1024, 1),
+            "count_diff": stat.count_diff,
+            "site": frames[-1],  # Frames are oldest first
+            "traceback": frames,
+        })
+    return sites
+
+
+def _report_path(session_id: str) -> str:
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", session_id)
+    return os.path.join(REPORT_DIR, f"{safe_name}.json")
+
+
+def _load_report(session_id: str) -> dict:
+    """A session's report from disk (it may have been evicted from memory), or a new one."""
+    try:
+        with open(_report_path(session_id), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"session": session_id, "stages": {}, "entries": []}
+
+
+def _write_report(session_id: str, entry: dict):
+    with _lock:
+        report = _reports.get(session_id)
+        if report is None:
+            report = _reports[session_id] = _load_report(session_id)
+            while len(_reports) > MAX_SESSIONS:
+                _reports.popitem(last=False)
+        _reports.move_to_end(session_id)
+        report["entries"].append(entry)
+        del report["entries"][:-MAX_ENTRIES]
+
+        totals = report["stages"].setdefault(entry["stage"], {"calls": 0, "net_kb": 0.0, "rss_delta_mb": 0.0})
+        totals["calls"] += 1
+        totals["net_kb"] = round(totals["net_kb"] + entry["net_kb"], 1)
+        totals["rss_delta_mb"] = round(totals["rss_delta_mb"] + entry["rss_after_mb"] - entry["rss_before_mb"], 1)
+
+        os.makedirs(REPORT_DIR, exist_ok=True)
+        with open(_report_path(session_id), "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+@contextmanager
+def profile_stage(stage: str, **attrs) -> Iterator[None]:
+    """Snapshot memory around a block; a no-op unless MEM_PROFILE=1."""
+    if not ENABLED:
+        yield
+        return
+
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(TRACE_FRAMES)
+
+    session_id = _session.get()
+    before = tracemalloc.take_snapshot()
+    rss_before = rss_mb()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        after = tracemalloc.take_snapshot()
+        net = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+
+        entry = {
+            "stage": stage,
+            "time": time.time(),
+            "seconds": round(seconds, 4),
+            "rss_before_mb": rss_before,
+            "rss_after_mb": rss_mb(),
+            "net_kb": round(net / 1024, 1),
+            "traced_peak_mb": round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1),
+            "top_sites": _top_sites(before, after),
+            **attrs,
+        }
+        for name, fn in list(_gauges.items()):
+            try:
+                entry[name] = fn()
+            except Exception as e:
+                entry[name] = f"error: {e}"
+
+        _write_report(session_id, entry)
+
+
+def profiled(stage: str):
+    """
+    Decorator form of profile_stage. Generator functions are profiled
+    while they are consumed, not just when they are created.
+    """
+    def decorator(fn):
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def generator_wrapper(*args, **kwargs):
+                with profile_stage(stage):
+                    yield from fn(*args, **kwargs)
+            return generator_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with profile_stage(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def get_report(session_id: Optional[str] = None) -> Optional[dict]:
+    """Report for a session (defaults to the current one), or None if it has none."""
+    session_id = session_id or _session.get()
+    with _lock:
+        report = _reports.get(session_id)
+        if report is not None:
+            return json.loads(json.dumps(report))
+    if not os.path.exists(_report_path(session_id)):
+        return None
+    return _load_report(session_id)
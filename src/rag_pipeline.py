@@ -1,24 +1,193 @@
 # rag_pipeline.py
+#
+# Heavy dependencies (LangChain, Chroma, sentence-transformers/torch) are
+# imported inside the functions that need them, so importing this module
+# stays cheap and the UI can paint before anything is ingested or asked.
 
+from __future__ import annotations
+
+import hashlib
+import json
+import math
 import os
+import re
 import shutil
-from typing import List
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.vectorstores import Chroma
-from langchain_core.prompts import PromptTemplate
-from langchain_core.documents import Document
+import threading
+import time
+import unicodedata
+import uuid
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from conversation import ConversationMemory, condense_question
+from summarizer import cache_dir_for, map_reduce_summary
+from language import detect_language
+from singleflight import SingleFlight
+import mem_profile
+import telemetry
+import vector_backend
+from utils import extract_response_text, llm_model_name
+
+if TYPE_CHECKING:
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    from langchain_community.vectorstores import Chroma
+    from langchain_core.documents import Document
 
 # Configuration
-EMBED_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+EMBED_MODEL = "sentence-transformers/all-MiniLM-L6-v2"    # English transcripts
+MULTILINGUAL_EMBED_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+ENGLISH_LANGUAGES = ("en", "unknown")
+CROSS_LINGUAL_K_FACTOR = 2    # Extra chunks for a question in another language than an English-only index
 PERSIST_DIR = "./chroma_db"
+INDEX_ROOT = "./indexes"    # One persisted index per video
+EMBED_BATCH_SIZE = 64
+SPLIT_WINDOW_CHARS = 200_000    # Very long transcripts are chunked window by window
 CHUNK_SIZE = 1000
 CHUNK_OVERLAP = 200
 TOP_K_RESULTS = 4
+SUMMARY_FILE = "summary.txt"
+INDEX_META_FILE = "index.json"  # Written last; marks an index as complete
+SUMMARY_WORKERS = 2
+TREE_COLLECTION = "summary_tree"
+TOP_K_SECTIONS = 3
+RETRIEVAL_CONFIG_FILE = os.getenv("RETRIEVAL_CONFIG", "./retrieval_config.json")  # Written by retrieval_tuning.py
+MULTI_VIDEO_TOP_K = 8             # Chunks in a prompt spanning several videos
+MULTI_VIDEO_MIN_PER_VIDEO = 1     # Each video's best chunks, kept regardless of score
+MULTI_VIDEO_MAX_PER_VIDEO = 4     # So one video can't crowd out the others
+MULTI_VIDEO_CONTEXT_TOKENS = 3000
+RETRIEVAL_WORKERS = 8             # Concurrent per-video searches
+MAX_OPEN_INDEXES = int(os.getenv("MAX_OPEN_INDEXES", "64"))   # Least recently used ones are closed beyond this
+
+
+def load_retrieval_config(path: str = RETRIEVAL_CONFIG_FILE) -> Dict[str, int]:
+    """
+    Read tuned chunking/retrieval settings recommended by retrieval_tuning.py.
+    
+    Settings tuned with other embedding models (e.g. a fake-embedding dry
+    run) are ignored, since retrieval quality depends on the model.
+
+    Returns:
+        Dict with any of chunk_size, chunk_overlap and top_k; empty if the
+        file is missing or invalid
+    """
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        config = {key: int(data[key]) for key in ("chunk_size", "chunk_overlap", "top_k") if key in data}
+    except (OSError, ValueError, TypeError) as e:
+        print(f"⚠️ Ignoring retrieval config {path}: {e}")
+        return {}
+    
+    unknown_models = set(data.get("embed_models", [])) - {EMBED_MODEL, MULTILINGUAL_EMBED_MODEL}
+    if unknown_models:
+        print(f"⚠️ Ignoring retrieval config {path}: tuned with other embedding models {sorted(unknown_models)}")
+        return {}
+    if config.get("chunk_overlap", 0) >= config.get("chunk_size", CHUNK_SIZE):
+        print(f"⚠️ Ignoring retrieval config {path}: overlap must be smaller than chunk size")
+        return {}
+    return config
+
+
+_tuned = load_retrieval_config()
+CHUNK_SIZE = _tuned.get("chunk_size", CHUNK_SIZE)
+CHUNK_OVERLAP = _tuned.get("chunk_overlap", CHUNK_OVERLAP)
+TOP_K_RESULTS = _tuned.get("top_k", TOP_K_RESULTS)
+
+# Words and phrases that mark a question as asking for an overview; more
+# chunks are retrieved for these. Matched as whole words
+SUMMARY_KEYWORDS = [
+    'summarize', 'summarise', 'summary', 'overview', 'gist', 'brief',
+    'what is this video about', 'main topic', 'main topics', 'main points', 'key points',
+    'सारांश', 'संक्षेप', 'मुख्य बिंदु'
+]
+
+# Word boundaries for Devanagari, where \b splits words at vowel signs
+_HI_START = r'(?<![\u0900-\u097F])'
+_HI_END = r'(?![\u0900-\u097F])'
+_VIDEO = r'(video|talk|lecture)'
+_HI_TELL = r'( (बताओ|बताइए|बताएं|बताएँ|दो|दीजिए|दें))?'
+
+# Requests for a summary of the whole video, which are answered from the
+# precomputed summary without retrieval. Matched against the whole
+# normalized question (see _normalize_question)
+VIDEO_SUMMARY_PATTERNS = [
+    rf'^((please|can you|could you) )?(summarize|summarise|recap) (the|this) ((whole|entire) )?{_VIDEO}( for me)?( please)?$',
+    rf'^((give me|write|show me) )?(a |the )?((short|brief|quick) )?(summary|overview|recap|gist) of (the|this) ((whole|entire) )?{_VIDEO}( please)?$',
+    rf'^what is (the|this) {_VIDEO} about$',
+    r'^(summary|summarize|summarise|tl;?dr)$',
+    r'^((इस|पूरे) )?वीडियो (का|की) (सारांश|संक्षेप)' + _HI_TELL + '$',
+    r'^(यह|ये) वीडियो किस (बारे|विषय) में है$',
+    r'^सारांश' + _HI_TELL + '$',
+]
+
+# Patterns that mark a question as being about the video's sections; their
+# summaries are added to the retrieved chunks
+SECTION_PATTERNS = [
+    rf'\b(sections?|chapters?|segments?|parts?) of the {_VIDEO}\b',
+    r'\b(each|every) (section|chapter|segment)\b',
+    rf'\bwhat (topics|sections|chapters) does the {_VIDEO} cover\b',
+    _HI_START + r'(वीडियो के (किस|किन|हर) (भाग|हिस्से))' + _HI_END,
+    _HI_START + r'(अध्याय|अध्यायों)' + _HI_END,
+]
+
+# Explicit positional phrases mapped to the fraction of the video they
+# refer to; these questions are answered from section summaries alone
+POSITION_HINTS = {
+    r'\bfirst half\b': (0.0, 0.5),
+    r'\b(second|latter) half\b': (0.5, 1.0),
+    rf'\b(beginning|start|opening|intro|introduction) of the {_VIDEO}\b': (0.0, 0.25),
+    rf'\bmiddle of the {_VIDEO}\b': (0.33, 0.67),
+    rf'\b(end|ending|conclusion|last part|final part) of the {_VIDEO}\b': (0.75, 1.0),
+    r'\b(at|towards?|near) the end\b': (0.75, 1.0),
+    _HI_START + r'(पहले भाग|पहला भाग|पहले हिस्से|शुरुआत में|वीडियो की शुरुआत)' + _HI_END: (0.0, 0.5),
+    _HI_START + r'(दूसरे भाग|दूसरा भाग|दूसरे हिस्से|अंत में|वीडियो के अंत)' + _HI_END: (0.5, 1.0),
+}
+
+# "section 3", "chapter 2", "भाग 2": a section by its number
+SECTION_NUMBER_PATTERNS = [
+    r'\b(?:section|chapter|segment) (\d+)\b',
+    _HI_START + r'(?:भाग|अध्याय) (\d+)',
+]
+
+# Open indexes shared by all sessions, keyed by index directory, least
+# recently used first
+_open_indexes: "OrderedDict[str, Chroma]" = OrderedDict()
+_open_indexes_lock = threading.Lock()
+
+# Finalizers closing the Chroma clients of local stores, keyed by absolute
+# index directory (see _track_local_store)
+_local_clients: Dict[str, List[weakref.finalize]] = {}
+_local_clients_lock = threading.Lock()
+
+# Coarse layers of open indexes (None when an index is searched flat)
+_coarse_indexes: Dict[str, Optional[object]] = {}
+
+# Background summary jobs, keyed by index directory
+_summary_executor = ThreadPoolExecutor(max_workers=SUMMARY_WORKERS, thread_name_prefix="summary")
+_summary_jobs: Dict[str, Tuple[object, Future]] = {}
+_summary_lock = threading.Lock()
+
+# Per-video searches of multi-video questions
+_retrieval_executor = ThreadPoolExecutor(max_workers=RETRIEVAL_WORKERS, thread_name_prefix="retrieve")
+
+# Stored summaries already read from disk, keyed by index directory
+_stored_summaries: Dict[str, str] = {}
+
+# Answers and summaries being generated, keyed by (index directory,
+# normalized question, model); concurrent duplicates share one LLM call
+_flights = SingleFlight("singleflight")
+
+mem_profile.register_gauge("open_indexes", lambda: len(_open_indexes))
+mem_profile.register_gauge("summary_jobs", lambda: len(_summary_jobs))
+mem_profile.register_gauge("answers_in_flight", _flights.in_flight)
 
 # Optimized prompt template with multilingual support
-PROMPT_TEMPLATE = PromptTemplate(
-    template="""You are a helpful AI assistant analyzing a YouTube video transcript.
+# Filled with str.format(context=..., question=...)
+PROMPT_TEMPLATE = """You are a helpful AI assistant analyzing a YouTube video transcript.
 
 Your task is to answer questions based on the provided transcript context. Follow these rules:
 - Answer directly and concisely in the SAME LANGUAGE as the question
@@ -35,27 +204,340 @@ Context from video transcript:
 
 Question: {question}
 
-Answer:""",
-    input_variables=["context", "question"],
-)
+Answer:"""
+
+# Prompt for questions across several videos; context passages carry a
+# [Video <id> | Chunk <n>] label. Filled with str.format(videos=..., context=..., question=...)
+MULTI_VIDEO_PROMPT_TEMPLATE = """You are a helpful AI assistant analyzing the transcripts of several YouTube videos: {videos}.
+
+Your task is to answer questions based on the provided transcript context. Follow these rules:
+- Answer directly and concisely in the SAME LANGUAGE as the question
+- Use information ONLY from the context provided
+- Each passage is labeled with the video it comes from; say which video each point comes from
+- When the question asks to compare the videos, contrast what each one says
+- If a video does not cover the question, say so instead of guessing
+- If you cannot find specific information to answer the question, respond with: "I cannot find that specific information in the video transcripts."
+- Do not make assumptions or add external knowledge
+
+Context from video transcripts:
+{context}
+
+Question: {question}
+
+Answer:"""
 
 
-def clear_vector_store():
-    """Clear the persisted Chroma database."""
-    if os.path.exists(PERSIST_DIR):
+def _track_local_store(persist_dir: str, vector_store: Chroma):
+    """
+    Close a local store's Chroma client once the store is garbage collected,
+    i.e. once no cache, session or thread still uses it. Chroma keeps one
+    database per persist directory open until its last client is closed.
+    """
+    client = getattr(vector_store, "_client", None)
+    if client is None or not hasattr(client, "close"):
+        return
+    finalizer = weakref.finalize(vector_store, client.close)
+    key = os.path.abspath(persist_dir)
+    with _local_clients_lock:
+        finalizers = [f for f in _local_clients.get(key, []) if f.alive]
+        finalizers.append(finalizer)
+        _local_clients[key] = finalizers
+
+
+def _release_local_db(persist_dir: str):
+    """
+    Close every Chroma client of a directory whose index is being deleted.
+    If the directory were deleted under an open client, rebuilding the index
+    in the same place would fail with "attempt to write a readonly database".
+    """
+    with _local_clients_lock:
+        finalizers = _local_clients.pop(os.path.abspath(persist_dir), [])
+    for finalizer in finalizers:
         try:
-            shutil.rmtree(PERSIST_DIR)
-            print(f"✅ Cleared vector store at {PERSIST_DIR}")
+            finalizer()
+        except Exception as e:
+            print(f"⚠️ Could not close vector store at {persist_dir}: {e}")
+
+
+def clear_vector_store(persist_dir: str = PERSIST_DIR):
+    """Clear a persisted Chroma database."""
+    # Any summary still running for the old index must not be stored with the new one
+    with _summary_lock:
+        _summary_jobs.pop(persist_dir, None)
+        _stored_summaries.pop(persist_dir, None)
+    
+    with _open_indexes_lock:
+        _open_indexes.pop(persist_dir, None)
+        _coarse_indexes.pop(persist_dir, None)
+    
+    backend = vector_backend.get_backend()
+    if backend is not None:
+        for name in (vector_backend.DEFAULT_COLLECTION, TREE_COLLECTION):
+            try:
+                backend.delete_collection(vector_backend.collection_name(persist_dir, name))
+            except Exception as e:
+                print(f"⚠️ Could not delete collection {name}: {e}")
+    
+    if os.path.exists(persist_dir):
+        _release_local_db(persist_dir)
+        try:
+            shutil.rmtree(persist_dir)
+            print(f"✅ Cleared vector store at {persist_dir}")
         except Exception as e:
             print(f"⚠️ Could not clear vector store: {e}")
 
 
-def process_transcript(transcript: str) -> Chroma:
+def transcript_hash(transcript: str) -> str:
+    """Content hash of a transcript, computed window by window."""
+    hasher = hashlib.sha256()
+    for start in range(0, len(transcript), SPLIT_WINDOW_CHARS):
+        hasher.update(transcript[start:start + SPLIT_WINDOW_CHARS].encode("utf-8"))
+    return hasher.hexdigest()
+
+
+def iter_transcript_spans(
+    transcript: str,
+    chunk_size: Optional[int] = None,
+    chunk_overlap: Optional[int] = None,
+) -> Iterator[Tuple[int, str]]:
+    """
+    Split a transcript into chunks, one window of text at a time.
+    
+    The last chunk of each window is carried into the next one so chunks
+    never end at an arbitrary window boundary.
+    
+    Args:
+        transcript: Raw transcript text
+        chunk_size: Characters per chunk (defaults to CHUNK_SIZE)
+        chunk_overlap: Characters shared by neighbouring chunks (defaults
+            to CHUNK_OVERLAP)
+    
+    Yields:
+        (start_index, chunk) with start_index the chunk's character offset
+        in the transcript
+    """
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size or CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP if chunk_overlap is None else chunk_overlap,
+        length_function=len,
+        separators=["\n\n", "\n", ". ", " ", ""],
+        add_start_index=True,
+    )
+    
+    window_start = 0
+    for start in range(0, len(transcript), SPLIT_WINDOW_CHARS):
+        docs = text_splitter.create_documents([transcript[window_start:start + SPLIT_WINDOW_CHARS]])
+        if not docs:
+            window_start = start + SPLIT_WINDOW_CHARS
+            continue
+        
+        is_last_window = start + SPLIT_WINDOW_CHARS >= len(transcript)
+        if not is_last_window:
+            carry = docs.pop()
+        
+        for doc in docs:
+            yield window_start + doc.metadata["start_index"], doc.page_content
+        
+        if not is_last_window:
+            window_start += carry.metadata["start_index"]
+
+
+def iter_transcript_chunks(transcript: str) -> Iterator[str]:
+    """Split a transcript into chunks (see iter_transcript_spans)."""
+    for _, chunk in iter_transcript_spans(transcript):
+        yield chunk
+
+
+def index_dir_for(index_id: str) -> str:
+    """Get the directory the index for a video is persisted in."""
+    return os.path.join(INDEX_ROOT, index_id)
+
+
+def embed_model_for(language: str) -> str:
+    """
+    Pick the embedding model for a transcript language: English stays on
+    the small English model, anything else uses the multilingual one.
+    """
+    return EMBED_MODEL if language in ENGLISH_LANGUAGES else MULTILINGUAL_EMBED_MODEL
+
+
+def get_embeddings(model_name: str = EMBED_MODEL) -> HuggingFaceEmbeddings:
+    """Get an embedding model, loaded once per process and shared."""
+    # Concurrent ingest jobs must not both load the same model
+    with _embeddings_lock:
+        return _load_embeddings(model_name)
+
+
+_embeddings_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _load_embeddings(model_name: str) -> HuggingFaceEmbeddings:
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    
+    print(f"🧠 Loading embedding model {model_name}...")
+    return HuggingFaceEmbeddings(
+        model_name=model_name,
+        model_kwargs={'device': 'cpu'},
+        encode_kwargs={'normalize_embeddings': True}
+    )
+
+
+class LazyEmbeddings:
+    """
+    Embedding function that loads the shared model on first use.
+    
+    Opening an index only needs the embedding function to be set, so a
+    reopened index does not load torch until a question is embedded.
+    """
+    
+    def __init__(self, model_name: str = EMBED_MODEL):
+        self.model_name = model_name
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return get_embeddings(self.model_name).embed_documents(texts)
+    
+    def embed_query(self, text: str) -> List[float]:
+        return get_embeddings(self.model_name).embed_query(text)
+
+
+def read_index_meta(persist_dir: str) -> dict:
+    """Read the metadata written when an index was built (empty if missing)."""
+    try:
+        with open(os.path.join(persist_dir, INDEX_META_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def new_store(
+    persist_dir: str,
+    embedding_function,
+    collection: str = vector_backend.DEFAULT_COLLECTION,
+    collection_metadata: Optional[dict] = None,
+) -> Chroma:
+    """
+    Open a collection of an index: a local Chroma database, or a collection
+    on the shared index server when VECTOR_BACKEND=remote.
+    """
+    backend = vector_backend.get_backend()
+    if backend is not None:
+        os.makedirs(persist_dir, exist_ok=True)  # Still holds index.json and the summary
+        return vector_backend.BackendStore(
+            backend,
+            vector_backend.collection_name(persist_dir, collection),
+            embedding_function,
+            persist_dir,
+        )
+    
+    from langchain_community.vectorstores import Chroma
+    
+    store = Chroma(
+        collection_name=collection,
+        embedding_function=embedding_function,
+        persist_directory=persist_dir,
+        collection_metadata=collection_metadata,
+    )
+    _track_local_store(persist_dir, store)
+    return store
+
+
+def index_exists(index_id: str) -> bool:
+    """Whether a complete index exists for a video (cheap; nothing is loaded)."""
+    with _open_indexes_lock:
+        if index_dir_for(index_id) in _open_indexes:
+            return True
+    return os.path.exists(os.path.join(index_dir_for(index_id), INDEX_META_FILE))
+
+
+def open_index(index_id: str) -> Optional[Chroma]:
+    """
+    Get the vector store for a video, opening it from disk on first use.
+    
+    Open indexes are cached per process and shared read-only by all
+    sessions, which only need to keep the index ID.
+    
+    Args:
+        index_id: Index ID (the video ID)
+        
+    Returns:
+        Chroma vector store, or None if no complete index exists
+    """
+    persist_dir = index_dir_for(index_id)
+    
+    with _open_indexes_lock:
+        vector_store = _open_indexes.get(persist_dir)
+        if vector_store is not None:
+            _open_indexes.move_to_end(persist_dir)
+            return vector_store
+        
+        if not os.path.exists(os.path.join(persist_dir, INDEX_META_FILE)):
+            return None
+        
+        # Queries must be embedded with the model that built the index;
+        # indexes from before model routing have no tag and used EMBED_MODEL
+        meta = read_index_meta(persist_dir)
+        vector_store = new_store(persist_dir, LazyEmbeddings(meta.get("embed_model", EMBED_MODEL)))
+        evicted = _cache_index(persist_dir, vector_store)
+    
+    _close_indexes(evicted)
+    return vector_store
+
+
+def _cache_index(persist_dir: str, vector_store: Chroma) -> List[str]:
+    """
+    Add an open index to the cache. Call with _open_indexes_lock held.
+    
+    Returns:
+        Index directories evicted to stay within MAX_OPEN_INDEXES; pass
+        them to _close_indexes once the lock is released
+    """
+    _open_indexes[persist_dir] = vector_store
+    _open_indexes.move_to_end(persist_dir)
+    evicted = []
+    while len(_open_indexes) > MAX_OPEN_INDEXES:
+        index_dir, _ = _open_indexes.popitem(last=False)
+        _coarse_indexes.pop(index_dir, None)
+        evicted.append(index_dir)
+    return evicted
+
+
+def _close_indexes(index_dirs: List[str]):
+    """
+    Forget evicted indexes; they are reopened on next use. Sessions still
+    using an evicted store keep it working, and its Chroma client is closed
+    once the last of them is done (see _track_local_store).
+    """
+    with _summary_lock:
+        for index_dir in index_dirs:
+            _stored_summaries.pop(index_dir, None)
+
+
+@mem_profile.profiled("process_transcript")
+def process_transcript(
+    transcript: str,
+    llm=None,
+    persist_dir: str = PERSIST_DIR,
+    progress_callback: Optional[Callable[[str, int, int], None]] = None,
+    source: str = "youtube_transcript",
+    language: Optional[str] = None,
+) -> Chroma:
     """
     Process transcript into vector store.
     
     Args:
         transcript: Raw transcript text
+        llm: Optional language model; when given, a summary job is queued
+            in the background as soon as the index is built
+        persist_dir: Directory to persist the index in (replaced if it exists)
+        progress_callback: Optional callback called as (stage, done, total)
+            while chunks are embedded; total is an estimate until the
+            final "indexing" call
+        source: Source label stored in chunk metadata
+        language: Transcript language code; detected from the transcript
+            when not given. Selects the embedding model (see embed_model_for)
         
     Returns:
         Chroma vector store with embedded transcript chunks
@@ -64,151 +546,926 @@ def process_transcript(transcript: str) -> Chroma:
         raise ValueError("Transcript cannot be empty")
     
     # Clear old vector store
-    clear_vector_store()
-    
-    # Split transcript into chunks
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=CHUNK_SIZE,
-        chunk_overlap=CHUNK_OVERLAP,
-        length_function=len,
-        separators=["\n\n", "\n", ". ", " ", ""]
-    )
-    
-    chunks = text_splitter.split_text(transcript)
-    print(f"📄 Created {len(chunks)} chunks from transcript")
+    clear_vector_store(persist_dir)
     
-    # Create documents with metadata
-    documents = [
-        Document(
-            page_content=chunk,
-            metadata={"chunk_id": i, "source": "youtube_transcript"}
-        )
-        for i, chunk in enumerate(chunks)
-    ]
+    # Shared embedding model for the transcript's language
+    if language is None:
+        language = detect_language(transcript)
+    embed_model = embed_model_for(language)
+    embeddings = get_embeddings(embed_model)
     
-    # Initialize embeddings
-    embeddings = HuggingFaceEmbeddings(
-        model_name=EMBED_MODEL,
-        model_kwargs={'device': 'cpu'},
-        encode_kwargs={'normalize_embeddings': True}
+    # Create vector store, embedding in batches so progress can be reported.
+    # The collection is tagged with the model that built it.
+    print(f"🔄 Creating vector store (language: {language}, model: {embed_model})...")
+    vector_store = new_store(
+        persist_dir,
+        embeddings,
+        collection_metadata={"embed_model": embed_model, "language": language},
     )
     
-    # Create vector store
-    print("🔄 Creating vector store...")
-    vector_store = Chroma.from_documents(
-        documents=documents,
-        embedding=embeddings,
-        persist_directory=PERSIST_DIR,
+    # Chunks are produced lazily, so even huge transcripts are never held
+    # as a full list of chunks/documents in memory
+    estimated_total = max(1, math.ceil(len(transcript) / (CHUNK_SIZE - CHUNK_OVERLAP)))
+    stage_seconds = {"chunk": 0.0, "embed": 0.0, "index": 0.0}
+    total = index_spans(
+        vector_store,
+        embeddings,
+        iter_transcript_spans(transcript),
+        source=source,
+        stage_seconds=stage_seconds,
+        progress_callback=progress_callback,
+        estimated_total=estimated_total,
     )
+    print(f"📄 Created {total} chunks from transcript")
+    
+    telemetry.record("chunk", stage_seconds["chunk"], chars=len(transcript), chunks=total)
+    telemetry.record("embed", stage_seconds["embed"], chunks=total, model=embed_model, language=language)
+    telemetry.record("index", stage_seconds["index"], chunks=total)
+    
+    if progress_callback:
+        progress_callback("indexing", total, total)
     
     # Persist to disk
     vector_store.persist()
+    
+    # Long videos get a coarse layer so queries only search a few partitions
+    import coarse_index
+    with telemetry.span("coarse", chunks=total) as span:
+        coarse = coarse_index.build_for_store(vector_store, persist_dir)
+        span.set(partitions=coarse.partitions if coarse else 0)
+    
+    with open(os.path.join(persist_dir, INDEX_META_FILE), "w", encoding="utf-8") as f:
+        json.dump({
+            "embed_model": embed_model,
+            "language": language,
+            "chunks": total,
+            "chunk_size": CHUNK_SIZE,
+            "chunk_overlap": CHUNK_OVERLAP,
+            "coarse_partitions": coarse.partitions if coarse else 0,
+            "created_at": time.time(),
+        }, f)
     print("✅ Vector store created and persisted")
     
+    with _open_indexes_lock:
+        evicted = _cache_index(persist_dir, vector_store)
+        _coarse_indexes[persist_dir] = coarse
+    _close_indexes(evicted)
+    
+    if llm is not None:
+        queue_summary(vector_store, llm)
+    
     return vector_store
 
 
-def get_answer(question: str, vector_store: Chroma, llm) -> str:
+def index_spans(
+    vector_store: Chroma,
+    embeddings,
+    spans: Iterable[Tuple[int, str]],
+    source: str = "youtube_transcript",
+    stage_seconds: Optional[Dict[str, float]] = None,
+    progress_callback: Optional[Callable] = None,
+    estimated_total: int = 1,
+) -> int:
     """
-    Get answer to question using RAG pipeline.
+    Embed transcript chunks in batches and add them to an index.
+    
+    Args:
+        vector_store: Index to add the chunks to
+        embeddings: Embedding model to embed them with
+        spans: (start_index, chunk) pairs, e.g. from iter_transcript_spans
+        source: Source label stored in chunk metadata
+        stage_seconds: Optional dict the chunk/embed/index times are added to
+        progress_callback: Optional callback(stage, done, total) after each batch
+        estimated_total: Expected number of chunks, for progress reports
+        
+    Returns:
+        Number of chunks added
+    """
+    from langchain_core.documents import Document
+    
+    if stage_seconds is None:
+        stage_seconds = {}
+    for stage in ("chunk", "embed", "index"):
+        stage_seconds.setdefault(stage, 0.0)
+    
+    spans = iter(spans)
+    total = 0
+    batch: List[Document] = []
+    while True:
+        started = time.perf_counter()
+        span = next(spans, None)
+        stage_seconds["chunk"] += time.perf_counter() - started
+        if span is None:
+            break
+        
+        start_index, chunk = span
+        batch.append(Document(
+            page_content=chunk,
+            metadata={"chunk_id": total, "start_index": start_index, "source": source}
+        ))
+        total += 1
+        
+        if len(batch) == EMBED_BATCH_SIZE:
+            _add_batch(vector_store, embeddings, batch, stage_seconds)
+            batch = []
+            if progress_callback:
+                progress_callback("embedding", total, max(estimated_total, total))
+    
+    if batch:
+        _add_batch(vector_store, embeddings, batch, stage_seconds)
+    return total
+
+
+def _add_batch(vector_store: Chroma, embeddings, batch: List[Document], stage_seconds: Dict[str, float]):
+    """Embed a batch of chunks and add it to the index, timing each step separately."""
+    texts = [doc.page_content for doc in batch]
+    
+    started = time.perf_counter()
+    vectors = embeddings.embed_documents(texts)
+    stage_seconds["embed"] += time.perf_counter() - started
+    
+    started = time.perf_counter()
+    vector_store._collection.add(
+        ids=[str(uuid.uuid4()) for _ in batch],
+        embeddings=vectors,
+        documents=texts,
+        metadatas=[doc.metadata for doc in batch],
+    )
+    stage_seconds["index"] += time.perf_counter() - started
+
+
+def _index_dir(vector_store: Chroma) -> str:
+    """Get the directory an index is persisted in."""
+    return getattr(vector_store, "_persist_directory", None) or PERSIST_DIR
+
+
+def _as_stores(vector_store: Union[Chroma, Sequence[Chroma]]) -> List[Chroma]:
+    """The indexes a question is asked of: one store, or a list of them."""
+    if isinstance(vector_store, (list, tuple)):
+        return list(vector_store)
+    return [vector_store]
+
+
+def _video_label(vector_store: Chroma) -> str:
+    """Source label of an index in multi-video prompts (its video ID)."""
+    return os.path.basename(os.path.normpath(_index_dir(vector_store)))
+
+
+def _index_model(vector_store: Chroma) -> str:
+    """Name of the embedding model an index was built with."""
+    return getattr(vector_store._embedding_function, "model_name", EMBED_MODEL)
+
+
+def _is_summary_request(question: str) -> bool:
+    """Check if a question asks for an overview (of the video or a part of it)."""
+    if _is_video_summary_request(question):
+        return True
+    question = question.lower()
+    return any(re.search(rf'(?<![\w\u0900-\u097F]){re.escape(keyword)}(?![\w\u0900-\u097F])', question) for keyword in SUMMARY_KEYWORDS)
+
+
+def _is_video_summary_request(question: str) -> bool:
+    """Check if a question asks for nothing but a summary of the whole video."""
+    question = _normalize_question(question)
+    return any(re.search(pattern, question) for pattern in VIDEO_SUMMARY_PATTERNS)
+
+
+def _get_position_hint(question: str) -> Optional[Tuple[float, float]]:
+    """Get the fraction of the video a question refers to, if any."""
+    question = question.lower()
+    for pattern, span in POSITION_HINTS.items():
+        if re.search(pattern, question):
+            return span
+    return None
+
+
+def _get_section_number(question: str) -> Optional[int]:
+    """Get the (1-based) section a question names explicitly, if any."""
+    question = question.lower()
+    for pattern in SECTION_NUMBER_PATTERNS:
+        match = re.search(pattern, question)
+        if match:
+            return int(match.group(1))
+    return None
+
+
+def _is_positional_request(question: str) -> bool:
+    """Check if a question names a part of the video by position or number."""
+    return _get_position_hint(question) is not None or _get_section_number(question) is not None
+
+
+def _is_section_request(question: str) -> bool:
+    """Check if a question is about the video's sections rather than a detail."""
+    question = question.lower()
+    return any(re.search(pattern, question) for pattern in SECTION_PATTERNS)
+
+
+def queue_summary(vector_store: Chroma, llm) -> Future:
+    """
+    Queue a background job that summarizes the transcript and stores the
+    result next to the index.
     
     Args:
-        question: User's question
         vector_store: Chroma vector store with transcript
         llm: Language model instance
         
     Returns:
-        Answer string
+        Future resolving to the summary string
     """
-    if not question or not question.strip():
-        return "Please ask a valid question."
+    index_dir = _index_dir(vector_store)
+    token = object()
+    
+    # Hold the lock while submitting so the job cannot store its result
+    # before it is registered as the current job for this index
+    with _summary_lock:
+        future = _summary_executor.submit(_run_summary_job, vector_store, llm, index_dir, token)
+        _summary_jobs[index_dir] = (token, future)
     
+    print("🕒 Summary queued in background")
+    return future
+
+
+def _run_summary_job(vector_store: Chroma, llm, index_dir: str, token: object) -> Optional[str]:
+    """
+    Generate a summary and store it with the index it was built from,
+    along with the summary tree (section and video level) used for
+    coarse-grained retrieval.
+    """
+    result = _generate_summary_tree(vector_store, llm)
+    if result is None:
+        return None
+    
+    sections, summary, group_size = result
+    
+    def is_current() -> bool:
+        job = _summary_jobs.get(index_dir)
+        return job is not None and job[0] is token
+    
+    with _summary_lock:
+        if not is_current():
+            # The index was cleared or rebuilt while we were summarizing
+            return None
+    
+    # Embedding the tree takes a while; don't block other indexes' summaries meanwhile
     try:
-        # Check if this is a summary/overview request
-        summary_keywords = [
-            'summarize', 'summary', 'overview', 'gist', 'brief', 
-            'what is this video about', 'main topic', 'main points',
-            'सारांश', 'संक्षेप', 'मुख्य बिंदु', 'विषय', 'बारे में'
-        ]
-        
-        is_summary_request = any(keyword in question.lower() for keyword in summary_keywords)
-        
-        # For summary requests, get more chunks
-        k_results = 8 if is_summary_request else TOP_K_RESULTS
-        
-        # Retrieve relevant documents using invoke (newer LangChain API)
-        retriever = vector_store.as_retriever(
-            search_type="similarity",
-            search_kwargs={"k": k_results}
-        )
+        _build_summary_tree(vector_store, sections, summary, group_size)
+    except Exception as e:
+        print(f"⚠️ Could not build summary tree: {e}")
+    
+    with _summary_lock:
+        if not is_current():
+            return None
+        
+        try:
+            with open(os.path.join(index_dir, SUMMARY_FILE), "w", encoding="utf-8") as f:
+                f.write(summary)
+            _stored_summaries[index_dir] = summary
+            print("✅ Background summary stored with index")
+        except OSError as e:
+            print(f"⚠️ Could not store summary: {e}")
+    
+    return summary
+
+
+def _build_summary_tree(vector_store: Chroma, sections: List[str], summary: str, group_size: int):
+    """
+    Embed section summaries and the video summary into a separate
+    collection next to the chunk index.
+    
+    Args:
+        vector_store: Chroma vector store with transcript chunks
+        sections: Section summaries, in order, each covering group_size chunks
+        summary: Summary of the whole video
+        group_size: Number of chunks each section summarizes
+    """
+    num_chunks = vector_store._collection.count()
+    
+    texts = list(sections) + [summary]
+    metadatas = [
+        {
+            "level": "section",
+            "section_id": i,
+            "chunk_start": i * group_size,
+            "chunk_end": min((i + 1) * group_size, num_chunks) - 1,
+        }
+        for i in range(len(sections))
+    ]
+    metadatas.append({"level": "video", "section_id": -1})
+    
+    tree_store = open_summary_tree(vector_store)
+    tree_store.add_texts(texts=texts, metadatas=metadatas)
+    print(f"🌳 Summary tree built ({len(sections)} sections)")
+
+
+def open_summary_tree(vector_store: Chroma) -> Chroma:
+    """Open the summary tree collection stored alongside an index."""
+    return new_store(_index_dir(vector_store), vector_store._embedding_function, collection=TREE_COLLECTION)
+
+
+def get_stored_summary(vector_store: Chroma, wait: bool = True) -> Optional[str]:
+    """
+    Get the precomputed summary for an index.
+    
+    Args:
+        vector_store: Chroma vector store with transcript
+        wait: Wait for a summary job that is still running instead of
+            returning None
+        
+    Returns:
+        Summary string, or None if no summary is available
+    """
+    index_dir = _index_dir(vector_store)
+    summary_path = os.path.join(index_dir, SUMMARY_FILE)
+    
+    with _summary_lock:
+        summary = _stored_summaries.get(index_dir)
+    if summary is not None:
+        return summary
+    
+    if os.path.exists(summary_path):
+        try:
+            with open(summary_path, encoding="utf-8") as f:
+                summary = f.read()
+            with _summary_lock:
+                _stored_summaries[index_dir] = summary
+            return summary
+        except OSError:
+            pass
+    
+    with _summary_lock:
+        job = _summary_jobs.get(index_dir)
+    
+    if job is None:
+        return None
+    
+    future = job[1]
+    if not wait and not future.done():
+        return None
+    
+    try:
+        return future.result()
+    except Exception as e:
+        print(f"⚠️ Background summary failed: {e}")
+        return None
+
+
+def _build_context(question: str, vector_store: Chroma, is_summary_request: bool) -> Optional[str]:
+    """
+    Retrieve context for a question: section summaries alone for questions
+    that name a part of the video ("the second half", "section 3"), raw
+    chunks otherwise, with the closest section summaries added for
+    questions about the video's sections.
+    """
+    section_context = None
+    if _is_positional_request(question) or _is_section_request(question):
+        with telemetry.span("retrieve", level="section") as span:
+            section_context = _get_section_context(question, vector_store)
+            span.set(chars=len(section_context or ""))
+        if section_context and _is_positional_request(question):
+            return section_context
+    
+    # For summary requests, get more chunks
+    k_results = 8 if is_summary_request else TOP_K_RESULTS
+    
+    # An English-only model ranks questions in other languages poorly, so
+    # cast a wider net and let the LLM pick out what is relevant
+    question_language = detect_language(question)
+    if question_language not in ENGLISH_LANGUAGES and _index_model(vector_store) == EMBED_MODEL:
+        k_results *= CROSS_LINGUAL_K_FACTOR
+    
+    coarse = _get_coarse_index(vector_store)
+    with telemetry.span(
+        "retrieve", level="chunk", k=k_results, language=question_language,
+        search="coarse" if coarse is not None else "flat",
+    ) as span:
+        if coarse is not None:
+            relevant_docs = coarse_search(question, vector_store, coarse, k_results)
+        else:
+            # Retrieve relevant documents using invoke (newer LangChain API)
+            retriever = vector_store.as_retriever(
+                search_type="similarity",
+                search_kwargs={"k": k_results}
+            )
+            relevant_docs = retriever.invoke(question)
+        span.set(docs=len(relevant_docs))
+    
+    if not relevant_docs:
+        return section_context
+    
+    chunk_context = format_chunk_context(relevant_docs)
+    return f"{section_context}\n\n{chunk_context}" if section_context else chunk_context
+
+
+def _get_coarse_index(vector_store: Chroma):
+    """Coarse layer of an index, loaded once; None if it is searched flat."""
+    index_dir = _index_dir(vector_store)
+    with _open_indexes_lock:
+        if index_dir in _coarse_indexes:
+            return _coarse_indexes[index_dir]
+    
+    import coarse_index
+    coarse = coarse_index.load_for_dir(index_dir)
+    
+    with _open_indexes_lock:
+        _coarse_indexes[index_dir] = coarse
+    return coarse
+
+
+def coarse_search(question: str, vector_store: Chroma, coarse, k: int, nprobe: Optional[int] = None) -> List[Document]:
+    """
+    Retrieve the k chunks most similar to a question, searching only the
+    closest partitions of the coarse layer.
+    
+    Args:
+        question: User's question
+        vector_store: Chroma vector store with transcript
+        coarse: Coarse layer of the index (see coarse_index)
+        k: Number of chunks to return
+        nprobe: Partitions to search (defaults to coarse_index.NPROBE)
         
-        # Use invoke instead of get_relevant_documents
-        relevant_docs = retriever.invoke(question)
+    Returns:
+        Documents ordered by similarity, best first
+    """
+    import coarse_index
+    from langchain_core.documents import Document
+    
+    query_vector = vector_store._embedding_function.embed_query(question)
+    hits = coarse.search(query_vector, k, nprobe or coarse_index.NPROBE)
+    if not hits:
+        return []
+    
+    ids = [chunk_id for chunk_id, _ in hits]
+    found = vector_store._collection.get(ids=ids, include=["documents", "metadatas"])
+    by_id = {
+        chunk_id: Document(page_content=document, metadata=metadata or {})
+        for chunk_id, document, metadata in zip(found["ids"], found["documents"], found["metadatas"])
+    }
+    return [by_id[chunk_id] for chunk_id in ids if chunk_id in by_id]
+
+
+def format_chunk_context(docs: List[Document]) -> str:
+    """Combine retrieved chunks into the context block of the answer prompt."""
+    return "\n\n".join([
+        f"[Chunk {doc.metadata.get('chunk_id', 'N/A')}]: {doc.page_content}"
+        for doc in docs
+    ])
+
+
+# ----------------------------------------------------------
+# Questions across several videos
+# ----------------------------------------------------------
+def _scored_search(query_vector: List[float], vector_store: Chroma, k: int) -> List[Tuple[float, Document]]:
+    """
+    The k chunks of one index closest to a query vector, with their cosine
+    similarity, so that hits from different indexes can be ranked together.
+    """
+    import numpy as np
+    from langchain_core.documents import Document
+    
+    coarse = _get_coarse_index(vector_store)
+    if coarse is not None:
+        import coarse_index
+        hits = coarse.search(query_vector, k, coarse_index.NPROBE)
+        if not hits:
+            return []
+        found = vector_store._collection.get(ids=[chunk_id for chunk_id, _ in hits], include=["documents", "metadatas"])
+        by_id = {
+            chunk_id: Document(page_content=document, metadata=metadata or {})
+            for chunk_id, document, metadata in zip(found["ids"], found["documents"], found["metadatas"])
+        }
+        return [(float(score), by_id[chunk_id]) for chunk_id, score in hits if chunk_id in by_id]
+    
+    k = min(k, vector_store._collection.count())
+    if k <= 0:
+        return []
+    result = vector_store._collection.query(
+        query_embeddings=[query_vector],
+        n_results=k,
+        include=["documents", "metadatas", "embeddings"],
+    )
+    vectors = np.asarray(result["embeddings"][0], dtype=np.float32)
+    query = np.asarray(query_vector, dtype=np.float32)
+    scores = vectors @ query / np.maximum(np.linalg.norm(vectors, axis=1) * np.linalg.norm(query), 1e-12)
+    hits = [
+        (float(score), Document(page_content=document, metadata=metadata or {}))
+        for score, document, metadata in zip(scores, result["documents"][0], result["metadatas"][0])
+    ]
+    return sorted(hits, key=lambda hit: hit[0], reverse=True)
+
+
+def merge_video_hits(
+    hits: Dict[str, List[Tuple[float, Document]]],
+    k: int = MULTI_VIDEO_TOP_K,
+    min_per_video: int = MULTI_VIDEO_MIN_PER_VIDEO,
+    max_per_video: int = MULTI_VIDEO_MAX_PER_VIDEO,
+    max_tokens: int = MULTI_VIDEO_CONTEXT_TOKENS,
+) -> List[Tuple[str, float, Document]]:
+    """
+    Merge per-video hits into one ranked list under per-video quotas and a
+    token budget.
+    
+    Each video's best min_per_video chunks are considered first, then the
+    remaining chunks in global score order; a chunk is skipped if its video
+    already has max_per_video chunks or it doesn't fit the remaining budget.
+    
+    Args:
+        hits: (score, document) pairs per video label, best first
+        k: Maximum chunks to keep
+        min_per_video: Chunks per video considered before global ranking
+        max_per_video: Maximum chunks per video
+        max_tokens: Token budget for the chunks' text
         
-        if not relevant_docs:
-            return "I cannot find relevant information in the video transcript to answer your question."
+    Returns:
+        (label, score, document) triples, best score first
+    """
+    floor = [(label, score, doc) for label, video_hits in hits.items() for score, doc in video_hits[:min_per_video]]
+    rest = [(label, score, doc) for label, video_hits in hits.items() for score, doc in video_hits[min_per_video:]]
+    candidates = sorted(floor, key=lambda hit: hit[1], reverse=True) + sorted(rest, key=lambda hit: hit[1], reverse=True)
+    
+    selected = []
+    per_video: Dict[str, int] = {}
+    tokens = 0
+    for label, score, doc in candidates:
+        if len(selected) >= k:
+            break
+        doc_tokens = telemetry.approx_tokens(doc.page_content)
+        if per_video.get(label, 0) >= max_per_video or tokens + doc_tokens > max_tokens:
+            continue
+        selected.append((label, score, doc))
+        per_video[label] = per_video.get(label, 0) + 1
+        tokens += doc_tokens
+    
+    return sorted(selected, key=lambda hit: hit[1], reverse=True)
+
+
+def format_multi_video_context(hits: List[Tuple[str, float, Document]]) -> str:
+    """Combine merged chunks into a context block labeled with their sources."""
+    return "\n\n".join([
+        f"[Video {label} | Chunk {doc.metadata.get('chunk_id', 'N/A')}]: {doc.page_content}"
+        for label, _, doc in hits
+    ])
+
+
+def _build_multi_video_context(question: str, vector_stores: List[Chroma], is_summary_request: bool) -> Optional[str]:
+    """
+    Retrieve context for a question from several indexes at once.
+    
+    The question is embedded once per embedding model and the indexes are
+    searched concurrently, so this takes about as long as the slowest
+    single-video search.
+    """
+    labels = [_video_label(vector_store) for vector_store in vector_stores]
+    
+    # Whole-video summary requests use each video's precomputed summary when all have one
+    if _is_video_summary_request(question):
+        summaries = list(_retrieval_executor.map(get_stored_summary, vector_stores))
+        if all(summaries):
+            budget_chars = MULTI_VIDEO_CONTEXT_TOKENS * 4 // len(vector_stores)
+            return "\n\n".join(
+                f"[Video {label} | Summary]: {summary[:budget_chars]}" for label, summary in zip(labels, summaries)
+            )
+    
+    k_per_video = 8 if is_summary_request else MULTI_VIDEO_MAX_PER_VIDEO
+    question_language = detect_language(question)
+    
+    with telemetry.span("retrieve", level="multi", videos=len(vector_stores), language=question_language) as span:
+        # One query embedding per model, computed in parallel when indexes differ
+        models = {}
+        for vector_store in vector_stores:
+            models.setdefault(_index_model(vector_store), vector_store._embedding_function)
+        query_vectors = dict(zip(
+            models,
+            _retrieval_executor.map(lambda embeddings: embeddings.embed_query(question), models.values()),
+        ))
         
-        # Combine context from retrieved documents
-        context = "\n\n".join([
-            f"[Chunk {doc.metadata.get('chunk_id', 'N/A')}]: {doc.page_content}"
-            for doc in relevant_docs
-        ])
+        def search(vector_store: Chroma) -> List[Tuple[float, Document]]:
+            k = k_per_video
+            if question_language not in ENGLISH_LANGUAGES and _index_model(vector_store) == EMBED_MODEL:
+                k *= CROSS_LINGUAL_K_FACTOR
+            return _scored_search(query_vectors[_index_model(vector_store)], vector_store, k)
         
-        # Format prompt
+        hits = dict(zip(labels, _retrieval_executor.map(search, vector_stores)))
+        merged = merge_video_hits(
+            hits,
+            k=MULTI_VIDEO_TOP_K * (2 if is_summary_request else 1),
+            max_per_video=k_per_video,
+        )
+        span.set(
+            candidates=sum(len(video_hits) for video_hits in hits.values()),
+            docs=len(merged),
+            videos_used=len({label for label, _, _ in merged}),
+        )
+    
+    if not merged:
+        return None
+    return format_multi_video_context(merged)
+
+
+def _get_section_context(question: str, vector_store: Chroma) -> Optional[str]:
+    """
+    Build context from section summaries. Positional questions ("what does
+    the second half cover", "section 3") select sections by position; other
+    section questions use similarity search over the section level.
+    
+    Returns None when the summary tree has not been built yet.
+    """
+    tree_store = open_summary_tree(vector_store)
+    if tree_store._collection.count() == 0:
+        return None
+    
+    position = _get_position_hint(question)
+    section_number = _get_section_number(question)
+    if position or section_number is not None:
+        all_sections = tree_store.get(where={"level": "section"}, include=["documents", "metadatas"])
+        sections = sorted(
+            zip(all_sections["documents"], all_sections["metadatas"]),
+            key=lambda pair: pair[1]["section_id"],
+        )
+        if position:
+            start = int(position[0] * len(sections))
+            end = max(start + 1, round(position[1] * len(sections)))
+        else:
+            start = section_number - 1
+            end = section_number
+        selected = sections[start:end] if start >= 0 else []
+    else:
+        docs = tree_store.similarity_search(
+            question,
+            k=TOP_K_SECTIONS,
+            filter={"level": "section"},
+        )
+        selected = sorted(
+            [(doc.page_content, doc.metadata) for doc in docs],
+            key=lambda pair: pair[1]["section_id"],
+        )
+    
+    if not selected:
+        return None
+    
+    return "\n\n".join([
+        f"[Section {meta['section_id'] + 1}, chunks {meta['chunk_start']}-{meta['chunk_end']}]: {text}"
+        for text, meta in selected
+    ])
+
+
+def _prepare_answer(question: str, vector_store: Union[Chroma, Sequence[Chroma]]) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Run everything in the RAG pipeline that comes before the LLM call.
+    
+    Returns:
+        Tuple of (direct_answer, formatted_prompt); exactly one is set
+    """
+    # Check if this is a summary/overview request
+    is_summary_request = _is_summary_request(question)
+    
+    vector_stores = _as_stores(vector_store)
+    if len(vector_stores) > 1:
+        return _prepare_multi_video_answer(question, vector_stores, is_summary_request)
+    vector_store = vector_stores[0]
+    
+    # Answer whole-video summary requests from the precomputed summary when
+    # we have one; anything more specific, including summaries of a part of
+    # the video ("summarize the second half"), goes through retrieval
+    names_a_part = _is_positional_request(question) or _is_section_request(question)
+    if not names_a_part and _is_video_summary_request(question):
+        stored_summary = get_stored_summary(vector_store)
+        if stored_summary:
+            return stored_summary, None
+    
+    context = _build_context(question, vector_store, is_summary_request)
+    
+    if not context:
+        return "I cannot find relevant information in the video transcript to answer your question.", None
+    
+    # Format prompt
+    with telemetry.span("prompt") as span:
         formatted_prompt = PROMPT_TEMPLATE.format(
             context=context,
             question=question
         )
+        span.set(chars=len(formatted_prompt), prompt_tokens=telemetry.approx_tokens(formatted_prompt))
+    return None, formatted_prompt
+
+
+def _prepare_multi_video_answer(
+    question: str, vector_stores: List[Chroma], is_summary_request: bool
+) -> Tuple[Optional[str], Optional[str]]:
+    """_prepare_answer for a question across several videos."""
+    context = _build_multi_video_context(question, vector_stores, is_summary_request)
+    if not context:
+        return "I cannot find relevant information in the video transcripts to answer your question.", None
+    
+    with telemetry.span("prompt", videos=len(vector_stores)) as span:
+        formatted_prompt = MULTI_VIDEO_PROMPT_TEMPLATE.format(
+            videos=", ".join(_video_label(vector_store) for vector_store in vector_stores),
+            context=context,
+            question=question
+        )
+        span.set(chars=len(formatted_prompt), prompt_tokens=telemetry.approx_tokens(formatted_prompt))
+    return None, formatted_prompt
+
+
+def _remember(memory: Optional[ConversationMemory], question: str, answer: str):
+    """Record a question/answer exchange in the conversation memory."""
+    if memory is not None:
+        memory.add("user", question)
+        memory.add("assistant", answer)
+
+
+def _normalize_question(question: str) -> str:
+    """Fold case, width and whitespace so trivially different duplicates match."""
+    text = unicodedata.normalize("NFKC", question).casefold()
+    return re.sub(r"\s+", " ", text).strip(" ?!.,;:।")
+
+
+def _flight_key(vector_store: Union[Chroma, Sequence[Chroma]], question: str, llm) -> Tuple[str, str, str]:
+    """Single-flight key of a question: (index directories, normalized question, model)."""
+    index_dirs = "|".join(sorted(_index_dir(store) for store in _as_stores(vector_store)))
+    return index_dirs, _normalize_question(question), llm_model_name(llm)
+
+
+@mem_profile.profiled("get_answer")
+def get_answer(
+    question: str,
+    vector_store: Union[Chroma, Sequence[Chroma]],
+    llm,
+    memory: Optional[ConversationMemory] = None,
+    raise_errors: bool = False,
+) -> str:
+    """
+    Get answer to question using RAG pipeline.
+    
+    Concurrent calls asking the same (standalone) question of the same
+    index and model share one retrieval and LLM call.
+    
+    Args:
+        question: User's question
+        vector_store: Chroma vector store with transcript, or a list of
+            them to answer from several videos at once
+        llm: Language model instance
+        memory: Optional conversation memory; follow-up questions are
+            rewritten into standalone ones and the exchange is recorded
+        raise_errors: Raise retrieval and LLM errors instead of returning
+            them as the answer text (e.g. so batch runs can retry them)
+        
+    Returns:
+        Answer string
+    """
+    if not question or not question.strip():
+        return "Please ask a valid question."
+    
+    try:
+        standalone_question = condense_question(question, memory, llm)
+        
+        answer = _flights.call(
+            _flight_key(vector_store, standalone_question, llm),
+            lambda: _generate_answer(standalone_question, vector_store, llm),
+        )
         
-        # Get LLM response - using .invoke()
+        _remember(memory, question, answer)
+        return answer
+            
+    except Exception as e:
+        print(f"❌ Error generating answer: {e}")
+        if raise_errors:
+            raise
+        return f"An error occurred while processing your question: {str(e)}"
+
+
+def _generate_answer(question: str, vector_store: Union[Chroma, Sequence[Chroma]], llm) -> str:
+    """Answer a standalone question (retrieval and one LLM call)."""
+    direct_answer, formatted_prompt = _prepare_answer(question, vector_store)
+    if direct_answer is not None:
+        return direct_answer
+    
+    # Get LLM response - using .invoke()
+    with telemetry.span("llm", prompt_tokens=telemetry.approx_tokens(formatted_prompt)) as span:
         response = llm.invoke(formatted_prompt)
         
         # Extract content from response
-        if isinstance(response, str):
-            return response.strip()
-        elif hasattr(response, "content"):
-            return response.content.strip()
-        else:
-            return str(response).strip()
+        answer = extract_response_text(response)
+        span.set(completion_tokens=telemetry.approx_tokens(answer))
+    return answer
+
+
+@mem_profile.profiled("stream_answer")
+def stream_answer(
+    question: str, vector_store: Union[Chroma, Sequence[Chroma]], llm, memory: Optional[ConversationMemory] = None
+) -> Iterator[str]:
+    """
+    Streaming variant of get_answer that yields the answer as the LLM
+    generates it. Concurrent duplicates (streamed or not) share one LLM
+    stream, and late subscribers first receive what was already generated.
+    
+    Args:
+        question: User's question
+        vector_store: Chroma vector store with transcript, or a list of them
+        llm: Language model instance (must support .stream())
+        memory: Optional conversation memory (see get_answer)
+        
+    Yields:
+        Answer text fragments
+    """
+    if not question or not question.strip():
+        yield "Please ask a valid question."
+        return
+    
+    try:
+        standalone_question = condense_question(question, memory, llm)
+        
+        parts = []
+        for text in _flights.stream(
+            _flight_key(vector_store, standalone_question, llm),
+            lambda: _generate_answer_stream(standalone_question, vector_store, llm),
+        ):
+            parts.append(text)
+            yield text
+        
+        _remember(memory, question, "".join(parts))
             
     except Exception as e:
         print(f"❌ Error generating answer: {e}")
-        return f"An error occurred while processing your question: {str(e)}"
+        yield f"An error occurred while processing your question: {str(e)}"
+
+
+def _generate_answer_stream(question: str, vector_store: Union[Chroma, Sequence[Chroma]], llm) -> Iterator[str]:
+    """Streaming variant of _generate_answer."""
+    direct_answer, formatted_prompt = _prepare_answer(question, vector_store)
+    if direct_answer is not None:
+        yield direct_answer
+        return
+    
+    parts = []
+    with telemetry.span("llm", prompt_tokens=telemetry.approx_tokens(formatted_prompt), streamed=True) as span:
+        for chunk in llm.stream(formatted_prompt):
+            text = chunk if isinstance(chunk, str) else getattr(chunk, "content", str(chunk))
+            if text:
+                if not parts:
+                    span.set(first_token_seconds=round(time.time() - span.start, 4))
+                parts.append(text)
+                yield text
+        span.set(completion_tokens=telemetry.approx_tokens("".join(parts)))
 
 
+@mem_profile.profiled("get_transcript_summary")
 def get_transcript_summary(vector_store: Chroma, llm, max_chunks: int = 10) -> str:
     """
     Generate a summary of the transcript.
     
+    Returns the precomputed background summary when one is available (or
+    still running), and only calls the LLM directly otherwise; concurrent
+    requests for the same index and model share that call.
+    
     Args:
         vector_store: Chroma vector store with transcript
         llm: Language model instance
-        max_chunks: Maximum chunks to use for summary
+        max_chunks: Maximum chunks sent to the LLM in a single call
         
     Returns:
         Summary string
     """
-    try:
-        # Get first few chunks
-        all_docs = vector_store.get()
-        sample_docs = all_docs['documents'][:max_chunks]
-        context = "\n\n".join(sample_docs)
-        
-        summary_prompt = f"""Provide a concise summary of this YouTube video transcript:
+    stored_summary = get_stored_summary(vector_store)
+    if stored_summary:
+        return stored_summary
+    
+    def generate() -> str:
+        summary = _generate_summary(vector_store, llm, max_chunks)
+        return summary if summary is not None else "Could not generate summary."
+    
+    return _flights.call(("summary", _index_dir(vector_store), llm_model_name(llm), max_chunks), generate)
 
-{context}
 
-Summary:"""
-        
-        response = llm.invoke(summary_prompt)
-        
-        if isinstance(response, str):
-            return response.strip()
-        elif hasattr(response, "content"):
-            return response.content.strip()
-        else:
-            return str(response).strip()
+def _get_ordered_chunks(vector_store: Chroma) -> List[str]:
+    """Get all transcript chunks from the index in their original order."""
+    all_docs = vector_store.get(include=["documents", "metadatas"])
+    pairs = zip(all_docs["documents"], all_docs["metadatas"])
+    ordered = sorted(pairs, key=lambda pair: (pair[1] or {}).get("chunk_id", 0))
+    return [document for document, _ in ordered]
+
+
+def _generate_summary(vector_store: Chroma, llm, max_chunks: int = 10) -> Optional[str]:
+    """Summarize the whole transcript with map-reduce. Returns None on failure."""
+    result = _generate_summary_tree(vector_store, llm, max_chunks)
+    return result[1] if result else None
+
+
+def _generate_summary_tree(vector_store: Chroma, llm, max_chunks: int = 10) -> Optional[Tuple[List[str], str, int]]:
+    """
+    Summarize the whole transcript with map-reduce.
+    
+    Returns:
+        Tuple of (section_summaries, summary, chunks_per_section), or None on failure
+    """
+    try:
+        chunks = _get_ordered_chunks(vector_store)
+        sections, summary = map_reduce_summary(
+            chunks,
+            llm,
+            cache_dir=cache_dir_for(_video_label(vector_store)),
+            group_size=max_chunks,
+        )
+        return sections, summary, max_chunks
             
     except Exception as e:
         print(f"❌ Error generating summary: {e}")
-        return "Could not generate summary."
\ No newline at end of file
+        return None
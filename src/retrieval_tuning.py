@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Offline evaluation and auto-tuning of chunk size, overlap and top-k.
+
+Sweeps chunking/retrieval settings over a labeled dataset and reports, for
+each (chunk_size, chunk_overlap, top_k):
+    recall@k        share of the supporting span covered by the top-k chunks
+    mrr             mean reciprocal rank of the first chunk holding the span
+    chunks/video    index size
+    ingest_s        chunking + embedding + indexing time per video
+    prompt_tokens   average size of the answer prompt
+
+The Pareto-optimal settings are listed and the recommended one is written
+to retrieval_config.json, which rag_pipeline loads at startup (dry runs
+with --embeddings fake only write it when --output is given).
+
+Usage:
+    python retrieval_tuning.py --dataset fixtures/retrieval_eval.json
+    python retrieval_tuning.py --dataset my_eval.json --chunk-sizes 500,1000 --top-ks 2,4,8
+
+Dataset format (paths relative to the dataset file):
+    {"videos": [{"id": "...", "transcript_file": "video.txt",   # or "transcript": "..."
+                 "questions": [{"question": "...", "support": "exact quote"},
+                               {"question": "...", "span": [start, end]}]}]}
+"""
+
+import sys
+import os
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import argparse
+import json
+import shutil
+import statistics
+import tempfile
+import time
+import uuid
+from typing import Callable, List, Tuple
+from langchain_community.vectorstores import Chroma
+from langchain_core.documents import Document
+import rag_pipeline
+from rag_pipeline import (
+    PROMPT_TEMPLATE,
+    embed_model_for,
+    format_chunk_context,
+    get_embeddings,
+    index_spans,
+    iter_transcript_spans,
+)
+from language import detect_language
+from telemetry import approx_tokens
+
+# Sweep defaults
+DEFAULT_CHUNK_SIZES = [500, 750, 1000, 1500]
+DEFAULT_OVERLAPS = [0, 100, 200]
+DEFAULT_TOP_KS = [2, 4, 6, 8]
+RECALL_TOLERANCE = 0.02     # Recall given up for a cheaper config
+MIN_SPAN_SHARE = 0.5        # Share of the span (or chunk) a chunk must hold to count as a hit
+
+# (metric, higher_is_better) used for Pareto dominance
+OBJECTIVES = [
+    ("recall", True),
+    ("mrr", True),
+    ("prompt_tokens", False),
+    ("chunks_per_video", False),
+    ("ingest_s", False),
+]
+
+
+# ----------------------------------------------------------
+# Dataset
+# ----------------------------------------------------------
+def load_dataset(path: str) -> List[dict]:
+    """
+    Load a labeled dataset, resolving supporting quotes to character spans.
+
+    Returns:
+        List of {"id", "transcript", "questions": [{"question", "span"}]}
+    """
+    base_dir = os.path.dirname(os.path.abspath(path))
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+
+    videos = []
+    for video in data["videos"]:
+        if "transcript_file" in video:
+            with open(os.path.join(base_dir, video["transcript_file"]), encoding="utf-8") as f:
+                transcript = f.read()
+        else:
+            transcript = video["transcript"]
+
+        questions = []
+        for item in video["questions"]:
+            if "span" in item:
+                span = tuple(item["span"])
+            else:
+                start = transcript.find(item["support"])
+                if start < 0:
+                    print(f"⚠️ {video['id']}: supporting text not found for {item['question']!r}, skipping")
+                    continue
+                span = (start, start + len(item["support"]))
+            questions.append({"question": item["question"], "span": span})
+
+        videos.append({"id": video["id"], "transcript": transcript, "questions": questions})
+    return videos
+
+
+# ----------------------------------------------------------
+# Scoring
+# ----------------------------------------------------------
+def _overlap(start: int, end: int, span: Tuple[int, int]) -> int:
+    return max(0, min(end, span[1]) - max(start, span[0]))
+
+
+def score_ranking(docs: List[Document], span: Tuple[int, int], k: int) -> Tuple[float, float]:
+    """
+    Score the top-k retrieved chunks against a supporting span.
+
+    Returns:
+        (recall, reciprocal_rank): recall is the share of span characters
+        covered by the top-k chunks; the rank is that of the first chunk
+        holding at least MIN_SPAN_SHARE of the span (or of itself)
+    """
+    span_len = max(1, span[1] - span[0])
+    covered = []
+    reciprocal_rank = 0.0
+
+    for rank, doc in enumerate(docs[:k], start=1):
+        start = doc.metadata["start_index"]
+        end = start + len(doc.page_content)
+        overlap = _overlap(start, end, span)
+        if overlap:
+            covered.append((max(start, span[0]), min(end, span[1])))
+        if not reciprocal_rank and overlap >= MIN_SPAN_SHARE * min(span_len, end - start):
+            reciprocal_rank = 1.0 / rank
+
+    # Union of covered ranges (neighbouring chunks overlap)
+    covered_chars = 0
+    current_end = span[0]
+    for start, end in sorted(covered):
+        start = max(start, current_end)
+        if end > start:
+            covered_chars += end - start
+            current_end = end
+
+    return covered_chars / span_len, reciprocal_rank
+
+
+def evaluate_chunking(
+    videos: List[dict],
+    embeddings_for: Callable[[str], object],
+    chunk_size: int,
+    chunk_overlap: int,
+    top_ks: List[int],
+) -> List[dict]:
+    """
+    Build an index per video with one chunking setting and score every top-k.
+    
+    embeddings_for maps a transcript to the embedding model to index it
+    with, so each video uses the model rag_pipeline would route it to.
+    """
+    max_k = max(top_ks)
+    per_k = {k: {"recall": [], "mrr": [], "prompt_tokens": []} for k in top_ks}
+    chunk_counts = []
+    ingest_times = []
+
+    for video in videos:
+        embeddings = embeddings_for(video["transcript"])
+        persist_dir = tempfile.mkdtemp(prefix="tune_index_")
+        try:
+            started = time.perf_counter()
+            store = Chroma(
+                collection_name=f"tune-{uuid.uuid4().hex[:8]}",
+                embedding_function=embeddings,
+                persist_directory=persist_dir,
+            )
+            total = index_spans(store, embeddings, iter_transcript_spans(video["transcript"], chunk_size, chunk_overlap))
+            ingest_times.append(time.perf_counter() - started)
+            chunk_counts.append(total)
+
+            for item in video["questions"]:
+                docs = store.similarity_search(item["question"], k=min(max_k, total))
+                for k in top_ks:
+                    recall, reciprocal_rank = score_ranking(docs, item["span"], k)
+                    prompt = PROMPT_TEMPLATE.format(context=format_chunk_context(docs[:k]), question=item["question"])
+                    per_k[k]["recall"].append(recall)
+                    per_k[k]["mrr"].append(reciprocal_rank)
+                    per_k[k]["prompt_tokens"].append(approx_tokens(prompt))
+        finally:
+            shutil.rmtree(persist_dir, ignore_errors=True)
+
+    rows = []
+    for k in top_ks:
+        rows.append({
+            "chunk_size": chunk_size,
+            "chunk_overlap": chunk_overlap,
+            "top_k": k,
+            "recall": round(statistics.mean(per_k[k]["recall"]), 4),
+            "mrr": round(statistics.mean(per_k[k]["mrr"]), 4),
+            "prompt_tokens": round(statistics.mean(per_k[k]["prompt_tokens"]), 1),
+            "chunks_per_video": round(statistics.mean(chunk_counts), 1),
+            "ingest_s": round(statistics.mean(ingest_times), 4),
+        })
+    return rows
+
+
+# ----------------------------------------------------------
+# Selection
+# ----------------------------------------------------------
+def _dominates(a: dict, b: dict) -> bool:
+    at_least_as_good = all((a[m] >= b[m]) if higher else (a[m] <= b[m]) for m, higher in OBJECTIVES)
+    strictly_better = any((a[m] > b[m]) if higher else (a[m] < b[m]) for m, higher in OBJECTIVES)
+    return at_least_as_good and strictly_better
+
+
+def pareto_front(rows: List[dict]) -> List[dict]:
+    """Configs not dominated by any other on all objectives."""
+    return [row for row in rows if not any(_dominates(other, row) for other in rows)]
+
+
+def recommend(front: List[dict], tolerance: float = RECALL_TOLERANCE) -> dict:
+    """
+    Pick from the Pareto front: the smallest prompt among configs within
+    tolerance of the best recall, then the best MRR, then the fastest ingest.
+    """
+    best_recall = max(row["recall"] for row in front)
+    candidates = [row for row in front if row["recall"] >= best_recall - tolerance]
+    return min(candidates, key=lambda row: (row["prompt_tokens"], -row["mrr"], row["ingest_s"]))
+
+
+def _parse_ints(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate and tune chunk size, overlap and top-k")
+    parser.add_argument("--dataset", required=True, help="Labeled dataset JSON (see module docstring)")
+    parser.add_argument("--chunk-sizes", default=",".join(map(str, DEFAULT_CHUNK_SIZES)))
+    parser.add_argument("--overlaps", default=",".join(map(str, DEFAULT_OVERLAPS)))
+    parser.add_argument("--top-ks", default=",".join(map(str, DEFAULT_TOP_KS)))
+    parser.add_argument("--tolerance", type=float, default=RECALL_TOLERANCE,
+                        help="Recall that may be traded for a smaller prompt")
+    parser.add_argument("--embeddings", choices=["real", "fake"], default="real",
+                        help="Real embedding model, or deterministic fake vectors for a dry run")
+    parser.add_argument("--output",
+                        help="Recommended config file (default: the one rag_pipeline loads; "
+                             "not written for fake-embedding runs unless given)")
+    parser.add_argument("--report", help="Optional JSON file with every evaluated config")
+    args = parser.parse_args()
+
+    videos = load_dataset(args.dataset)
+    questions = sum(len(video["questions"]) for video in videos)
+    print(f"📋 {len(videos)} videos, {questions} labeled questions")
+
+    if args.embeddings == "fake":
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        fake = DeterministicFakeEmbedding(size=384)
+        embeddings_for = lambda transcript: fake
+    else:
+        embeddings_for = lambda transcript: get_embeddings(embed_model_for(detect_language(transcript)))
+
+    top_ks = _parse_ints(args.top_ks)
+    rows = []
+    for chunk_size in _parse_ints(args.chunk_sizes):
+        for chunk_overlap in _parse_ints(args.overlaps):
+            if chunk_overlap >= chunk_size:
+                continue
+            print(f"⏱️ chunk_size={chunk_size} overlap={chunk_overlap}")
+            rows.extend(evaluate_chunking(videos, embeddings_for, chunk_size, chunk_overlap, top_ks))
+
+    front = pareto_front(rows)
+    best = recommend(front, args.tolerance)
+
+    print(f"\n{'size':>6} {'overlap':>7} {'k':>3} {'recall':>7} {'mrr':>6} {'tokens':>7} {'chunks':>7} {'ingest_s':>9}")
+    for row in sorted(front, key=lambda r: (-r["recall"], r["prompt_tokens"])):
+        marker = " ⭐" if row is best else ""
+        print(f"{row['chunk_size']:>6} {row['chunk_overlap']:>7} {row['top_k']:>3} {row['recall']:>7.3f} "
+              f"{row['mrr']:>6.3f} {row['prompt_tokens']:>7.0f} {row['chunks_per_video']:>7.1f} {row['ingest_s']:>9.3f}{marker}")
+    print(f"({len(front)} Pareto-optimal of {len(rows)} configs)")
+
+    config = {
+        "chunk_size": best["chunk_size"],
+        "chunk_overlap": best["chunk_overlap"],
+        "top_k": best["top_k"],
+        "metrics": {name: best[name] for name, _ in OBJECTIVES},
+        "embed_models": (
+            sorted({embed_model_for(detect_language(video["transcript"])) for video in videos})
+            if args.embeddings == "real" else ["fake"]
+        ),
+        "dataset": os.path.abspath(args.dataset),
+        "created_at": time.time(),
+    }
+    output = args.output or (rag_pipeline.RETRIEVAL_CONFIG_FILE if args.embeddings == "real" else None)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(config, f, indent=2)
+        print(f"💾 Recommended config written to {output}")
+    else:
+        print("ℹ️ Dry run with fake embeddings: recommended config not written (pass --output to keep it)")
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump({"configs": rows, "pareto": front, "recommended": config}, f, indent=2)
+        print(f"💾 Full report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
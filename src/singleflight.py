@@ -0,0 +1,171 @@
+# singleflight.py
+"""
+In-flight request coalescing.
+
+Concurrent calls with the same key share one computation: the first caller
+starts it and everyone who arrives while it is running receives the same
+result. Streaming subscribers receive every chunk, including those
+produced before they joined. Once a computation finishes its key is
+released, so later calls start afresh (repeats are then served by the LLM
+response cache).
+
+Blocking and streaming calls with the same key share a flight, so a
+streamed answer also serves blocking callers and vice versa.
+"""
+
+import contextvars
+import threading
+from typing import Callable, Dict, Hashable, Iterator, List, Optional
+import telemetry
+
+
+class _Flight:
+    """One in-flight computation and the text chunks it has produced so far."""
+
+    def __init__(self):
+        self.parts: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 1
+        self.cond = threading.Condition()
+
+    def publish(self, text: str):
+        with self.cond:
+            self.parts.append(text)
+            self.cond.notify_all()
+
+    def finish(self, error: Optional[BaseException] = None):
+        with self.cond:
+            self.error = error
+            self.done = True
+            self.cond.notify_all()
+
+    def result(self) -> str:
+        with self.cond:
+            self.cond.wait_for(lambda: self.done)
+            if self.error is not None:
+                raise self.error
+            return "".join(self.parts)
+
+    def follow(self) -> Iterator[str]:
+        """All chunks, from the first one, as they are produced."""
+        seen = 0
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: self.done or len(self.parts) > seen)
+                new_parts = self.parts[seen:]
+                seen += len(new_parts)
+                finished = self.done and seen == len(self.parts)
+                error = self.error
+            yield from new_parts
+            if finished:
+                if error is not None:
+                    raise error
+                return
+
+
+class SingleFlight:
+    """Registry of in-flight computations, keyed by any hashable key."""
+
+    def __init__(self, name: str = "singleflight"):
+        self.name = name
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def _join(self, key: Hashable):
+        """Get the flight for a key. Returns (flight, is_leader)."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                with flight.cond:
+                    flight.subscribers += 1
+                leader = False
+            else:
+                flight = self._flights[key] = _Flight()
+                leader = True
+        # A joined call is a "hit": it costs no retrieval or LLM call
+        telemetry.count_cache(self.name, hit=not leader)
+        return flight, leader
+
+    def _release(self, key: Hashable, flight: _Flight):
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def _leave(self, key: Hashable, flight: _Flight):
+        """
+        Drop a subscriber. The last one out releases the key in the same
+        step, so nobody can join a flight whose producer is about to stop.
+        """
+        with self._lock:
+            with flight.cond:
+                flight.subscribers -= 1
+                abandoned = flight.subscribers <= 0
+            if abandoned and self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._flights)
+
+    def call(self, key: Hashable, fn: Callable[[], str]) -> str:
+        """
+        Run fn() unless a computation with the same key is in flight, in
+        which case wait for it and return its result (or raise its error).
+        """
+        flight, leader = self._join(key)
+        if not leader:
+            return flight.result()
+
+        try:
+            text = fn()
+        except BaseException as e:
+            self._release(key, flight)
+            flight.finish(e)
+            raise
+        flight.publish(text)
+        self._release(key, flight)
+        flight.finish()
+        return text
+
+    def stream(self, key: Hashable, fn: Callable[[], Iterator[str]]) -> Iterator[str]:
+        """
+        Stream fn()'s chunks, sharing one run of fn among concurrent
+        subscribers with the same key.
+
+        The run happens on its own thread (in a copy of the first caller's
+        context), so a subscriber that stops early does not cut off the
+        others; it only stops once every subscriber has gone.
+        """
+        flight, leader = self._join(key)
+        if leader:
+            context = contextvars.copy_context()
+            threading.Thread(
+                target=context.run,
+                args=(self._produce, key, flight, fn),
+                name=f"{self.name}-producer",
+                daemon=True,
+            ).start()
+
+        try:
+            yield from flight.follow()
+        finally:
+            self._leave(key, flight)
+
+    def _produce(self, key: Hashable, flight: _Flight, fn: Callable[[], Iterator[str]]):
+        error = None
+        chunks = fn()
+        try:
+            for text in chunks:
+                flight.publish(text)
+                with flight.cond:
+                    if flight.subscribers <= 0:
+                        break  # Everyone stopped listening (and the key is already released)
+        except BaseException as e:
+            error = e
+        finally:
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+            self._release(key, flight)
+            flight.finish(error)
@@ -0,0 +1,167 @@
+# summarizer.py
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+import telemetry
+from utils import extract_response_text, llm_model_name
+
+# Configuration
+GROUP_SIZE = 10         # Transcript chunks summarized together in the map step
+REDUCE_FAN_IN = 4       # Partial summaries combined per reduce call
+MAX_CONCURRENCY = 8     # Maximum LLM calls in flight at once
+CACHE_FILE = "summary_cache.json"
+CACHE_ROOT = os.getenv("SUMMARY_CACHE_DIR", "./summary_cache")   # Outside the indexes, which re-ingests delete
+
+MAP_PROMPT = """Summarize this part of a YouTube video transcript in a few sentences.
+Keep the key facts, names and numbers. Write in the same language as the transcript.
+
+{text}
+
+Summary of this part:"""
+
+REDUCE_PROMPT = """Combine these consecutive partial summaries of a YouTube video transcript into one concise summary.
+Keep the order in which topics appear. Write in the same language as the summaries.
+
+{text}
+
+Combined summary:"""
+
+
+def cache_dir_for(index_id: str) -> str:
+    """Summary cache directory of a video, kept across re-ingests of its index."""
+    return os.path.join(CACHE_ROOT, index_id)
+
+
+class SummaryCache:
+    """
+    Cache of intermediate summaries for one video, stored as JSON so
+    re-summarizing only calls the LLM for groups that changed. Entries are
+    keyed by model and prompt, so changing LLM_MODEL re-summarizes.
+    """
+    
+    def __init__(self, cache_dir: Optional[str] = None, model: str = ""):
+        self.path = os.path.join(cache_dir, CACHE_FILE) if cache_dir else None
+        self.model = model
+        self._entries: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Could not read summary cache: {e}")
+    
+    def key(self, prompt: str) -> str:
+        return hashlib.sha256(f"{self.model}|{prompt}".encode("utf-8")).hexdigest()
+    
+    def get(self, prompt: str) -> Optional[str]:
+        with self._lock:
+            summary = self._entries.get(self.key(prompt))
+        telemetry.count_cache("summary", hit=summary is not None)
+        return summary
+    
+    def set(self, prompt: str, summary: str):
+        with self._lock:
+            self._entries[self.key(prompt)] = summary
+    
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            entries = dict(self._entries)
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(entries, f, ensure_ascii=False)
+        except OSError as e:
+            print(f"⚠️ Could not write summary cache: {e}")
+
+
+async def _summarize(llm, prompt: str, cache: SummaryCache, semaphore: asyncio.Semaphore) -> str:
+    """Run one map or reduce call, reusing a cached result when available."""
+    cached = cache.get(prompt)
+    if cached is not None:
+        return cached
+    
+    async with semaphore:
+        if hasattr(llm, "ainvoke"):
+            response = await llm.ainvoke(prompt)
+        else:
+            response = await asyncio.to_thread(llm.invoke, prompt)
+    
+    summary = extract_response_text(response)
+    cache.set(prompt, summary)
+    return summary
+
+
+async def amap_reduce_summary(
+    chunks: List[str],
+    llm,
+    cache_dir: Optional[str] = None,
+    group_size: int = GROUP_SIZE,
+    fan_in: int = REDUCE_FAN_IN,
+    max_concurrency: int = MAX_CONCURRENCY,
+) -> Tuple[List[str], str]:
+    """
+    Summarize a whole transcript with a hierarchical map-reduce.
+    
+    Chunk groups are summarized concurrently (map), then the partial
+    summaries are combined level by level in a tree (reduce), so the
+    number of sequential LLM round-trips grows only logarithmically with
+    video length.
+    
+    Args:
+        chunks: Transcript chunks in order
+        llm: Language model instance
+        cache_dir: Directory to cache intermediate summaries in (per video,
+            see cache_dir_for)
+        group_size: Chunks per map call
+        fan_in: Partial summaries per reduce call
+        max_concurrency: Maximum concurrent LLM calls
+        
+    Returns:
+        Tuple of (section_summaries, final_summary)
+    """
+    if not chunks:
+        raise ValueError("Nothing to summarize")
+    
+    cache = SummaryCache(cache_dir, llm_model_name(llm))
+    semaphore = asyncio.Semaphore(max_concurrency)
+    
+    groups = [
+        "\n\n".join(chunks[i:i + group_size])
+        for i in range(0, len(chunks), group_size)
+    ]
+    
+    try:
+        print(f"🧩 Summarizing {len(chunks)} chunks in {len(groups)} groups...")
+        sections = await asyncio.gather(*[
+            _summarize(llm, MAP_PROMPT.format(text=group), cache, semaphore)
+            for group in groups
+        ])
+        cache.save()
+        
+        level = list(sections)
+        while len(level) > 1:
+            batches = [
+                "\n\n".join(level[i:i + fan_in])
+                for i in range(0, len(level), fan_in)
+            ]
+            level = await asyncio.gather(*[
+                _summarize(llm, REDUCE_PROMPT.format(text=batch), cache, semaphore)
+                for batch in batches
+            ])
+    finally:
+        cache.save()
+    
+    return list(sections), level[0]
+
+
+def map_reduce_summary(chunks: List[str], llm, cache_dir: Optional[str] = None, **kwargs) -> Tuple[List[str], str]:
+    """Synchronous wrapper around amap_reduce_summary."""
+    return asyncio.run(amap_reduce_summary(chunks, llm, cache_dir=cache_dir, **kwargs))
@@ -0,0 +1,306 @@
+# telemetry.py
+"""
+Per-stage tracing and metrics for the RAG pipeline.
+
+Pipeline stages (fetch, normalize, chunk, embed, index, retrieve, prompt,
+llm) are wrapped in spans that carry timings, sizes, token counts and cache
+hits/misses. Finished spans are aggregated into Prometheus-style counters
+and histograms, and optionally written as JSON lines. Other components add
+their own counters and gauges (e.g. the LLM gateway's queue depth).
+
+Configuration:
+    METRICS_PORT=9464         serve /metrics on 127.0.0.1:9464 (see
+                              start_metrics_server; the API also serves
+                              /metrics itself)
+    TELEMETRY_LOG=spans.jsonl append every span as a JSON line ("-" for stderr)
+"""
+
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+# Configuration
+TELEMETRY_LOG = os.getenv("TELEMETRY_LOG")
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Span attributes that become metric labels, and numeric attributes that
+# are summed into rag_stage_<name>_total counters
+LABEL_ATTRS = ("provider",)
+SIZE_ATTRS = ("chars", "chunks", "docs", "prompt_tokens", "completion_tokens")
+
+
+def approx_tokens(text: Optional[str]) -> int:
+    """Rough token count (about 4 characters per token)."""
+    return len(text or "") // 4
+
+
+class Span:
+    """One timed pipeline stage; attributes can be added while it runs."""
+
+    def __init__(self, stage: str, parent: Optional["Span"] = None, **attrs):
+        self.stage = stage
+        self.attrs = dict(attrs)
+        self.parent = parent
+        self.status = "ok"
+        self.start = time.time()
+        self.seconds = 0.0
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def to_dict(self) -> dict:
+        return {
+            "stage": self.stage,
+            "parent": self.parent.stage if self.parent else None,
+            "start": round(self.start, 6),
+            "seconds": round(self.seconds, 6),
+            "status": self.status,
+            **self.attrs,
+        }
+
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+
+# ----------------------------------------------------------
+# Metrics registry
+# ----------------------------------------------------------
+class _Registry:
+    """In-process counters, gauges and histograms rendered in Prometheus text format."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DURATION_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Tuple], float] = {}
+        self._histograms: Dict[Tuple[str, Tuple], list] = {}
+        self._gauges: Dict[Tuple[str, Tuple], Callable[[], float]] = {}
+
+    def inc(self, name: str, labels: Dict[str, str], value: float = 1.0):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def observe(self, name: str, labels: Dict[str, str], value: float):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            # [bucket counts..., sum, count]
+            state = self._histograms.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def gauge(self, name: str, labels: Dict[str, str], fn: Callable[[], float]):
+        """Report fn() as a gauge, read at every scrape (replaces an earlier one)."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._gauges[key] = fn
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self) -> str:
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, list(state)) for key, state in self._histograms.items())
+            gauges = sorted(self._gauges.items())
+
+        lines = []
+        typed = set()
+        for (name, labels), value in counters:
+            if name not in typed:
+                lines.append(f"# TYPE {name} counter")
+                typed.add(name)
+            lines.append(f"{name}{_labels(labels)} {_number(value)}")
+
+        for (name, labels), fn in gauges:
+            try:
+                value = float(fn())
+            except Exception:
+                continue  # A broken gauge must not break the scrape
+            if name not in typed:
+                lines.append(f"# TYPE {name} gauge")
+                typed.add(name)
+            lines.append(f"{name}{_labels(labels)} {_number(value)}")
+
+        for (name, labels), state in histograms:
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            for bound, count in zip(self.buckets, state):
+                lines.append(f"{name}_bucket{_labels(labels + (('le', _number(bound)),))} {count}")
+            lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {state[-1]}")
+            lines.append(f"{name}_sum{_labels(labels)} {_number(state[-2])}")
+            lines.append(f"{name}_count{_labels(labels)} {state[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels: Tuple) -> str:
+    if not labels:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in labels)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+registry = _Registry()
+_log_lock = threading.Lock()
+
+
+def render_metrics() -> str:
+    """All metrics in Prometheus text exposition format."""
+    return registry.render()
+
+
+def register_gauge(name: str, fn: Callable[[], float], **labels):
+    """Export fn() as a gauge in /metrics (e.g. a queue depth)."""
+    registry.gauge(name, {key: str(value) for key, value in labels.items()}, fn)
+
+
+def inc(name: str, value: float = 1.0, **labels):
+    """Add to a counter exported in /metrics."""
+    registry.inc(name, {key: str(v) for key, v in labels.items()}, value)
+
+
+# ----------------------------------------------------------
+# Spans
+# ----------------------------------------------------------
+def _finish(span: Span):
+    labels = {"stage": span.stage}
+    labels.update({name: str(span.attrs[name]) for name in LABEL_ATTRS if name in span.attrs})
+
+    registry.observe("rag_stage_duration_seconds", labels, span.seconds)
+    registry.inc("rag_stage_total", dict(labels, status=span.status))
+    for name in SIZE_ATTRS:
+        value = span.attrs.get(name)
+        if isinstance(value, (int, float)):
+            registry.inc(f"rag_stage_{name}_total", labels, value)
+
+    if TELEMETRY_LOG:
+        line = json.dumps(span.to_dict(), ensure_ascii=False, default=str)
+        with _log_lock:
+            if TELEMETRY_LOG == "-":
+                print(line, file=sys.stderr)
+            else:
+                with open(TELEMETRY_LOG, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+
+
+@contextmanager
+def span(stage: str, **attrs) -> Iterator[Span]:
+    """
+    Time a pipeline stage.
+
+    Usage:
+        with span("retrieve", k=4) as s:
+            docs = retriever.invoke(question)
+            s.set(docs=len(docs))
+
+    Exceptions mark the span as failed and are re-raised.
+    """
+    current = Span(stage, parent=_current_span.get(), **attrs)
+    token = _current_span.set(current)
+    started = time.perf_counter()
+    try:
+        yield current
+    except GeneratorExit:
+        current.status = "cancelled"  # A streaming consumer stopped early
+        raise
+    except BaseException as e:
+        current.status = "error"
+        current.attrs.setdefault("error", type(e).__name__)
+        raise
+    finally:
+        current.seconds = time.perf_counter() - started
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            # Generators can be resumed from another context (e.g. Starlette
+            # iterating a streaming response in a worker thread)
+            _current_span.set(current.parent)
+        _finish(current)
+
+
+def record(stage: str, seconds: float, status: str = "ok", **attrs):
+    """Record a stage that was timed elsewhere (e.g. summed over batches)."""
+    finished = Span(stage, parent=_current_span.get(), **attrs)
+    finished.start = time.time() - seconds
+    finished.seconds = seconds
+    finished.status = status
+    _finish(finished)
+
+
+def annotate(**attrs):
+    """Add attributes to the innermost running span, if any."""
+    current = _current_span.get()
+    if current is not None:
+        current.set(**attrs)
+
+
+def count_cache(cache: str, hit: bool):
+    """Count a cache lookup and tag the running span with its result."""
+    result = "hit" if hit else "miss"
+    current = _current_span.get()
+    stage = current.stage if current is not None else "none"
+    registry.inc("rag_cache_lookups_total", {"cache": cache, "result": result, "stage": stage})
+    annotate(cache=result)
+
+
+# ----------------------------------------------------------
+# Local /metrics endpoint
+# ----------------------------------------------------------
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_metrics().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes would flood the console
+
+
+_metrics_server: Optional[ThreadingHTTPServer] = None
+_metrics_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: Optional[int] = None, host: str = "127.0.0.1") -> Optional[ThreadingHTTPServer]:
+    """
+    Serve /metrics on a background thread (once per process).
+
+    Args:
+        port: Port to listen on; defaults to the METRICS_PORT environment
+            variable, and nothing is started when neither is set
+
+    Returns:
+        The running server, or None when metrics export is disabled
+    """
+    global _metrics_server
+    if port is None:
+        if not os.getenv("METRICS_PORT"):
+            return None
+        port = int(os.getenv("METRICS_PORT"))
+
+    with _metrics_server_lock:
+        if _metrics_server is None:
+            _metrics_server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            threading.Thread(target=_metrics_server.serve_forever, daemon=True).start()
+            print(f"📈 Metrics on http://{host}:{_metrics_server.server_address[1]}/metrics")
+        return _metrics_server
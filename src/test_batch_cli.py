@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Tests for batch mode: resumed runs skip answered pairs, and failures are
+written as error records and retried on the next run. The videos are
+indexed up front with deterministic fake embeddings and answered by
+FakeLLM, so no network access is needed. Run directly or with pytest:
+    python test_batch_cli.py
+    pytest test_batch_cli.py
+"""
+
+import sys
+import os
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import json
+import shutil
+import tempfile
+from langchain_core.embeddings import DeterministicFakeEmbedding
+import batch_cli
+import rag_pipeline
+from fake_llm import FakeLLM
+
+EMBEDDINGS = DeterministicFakeEmbedding(size=16)
+VIDEO_IDS = ["batch-video-1", "batch-video-2"]
+QUESTIONS = ["What is the first topic?", "Who is speaking?"]
+TRANSCRIPT = " ".join(f"Sentence {i} is about topic {i % 5}." for i in range(40))
+
+_saved = None
+_root = None
+
+
+class FailingLLM(FakeLLM):
+    """FakeLLM that fails every call about one question."""
+
+    def invoke(self, prompt: str) -> str:
+        if QUESTIONS[1] in prompt:
+            raise RuntimeError("LLM unavailable")
+        return super().invoke(prompt)
+
+
+def setup_module(module=None):
+    """Index the test videos in a temporary index root."""
+    global _saved, _root
+    _saved = (rag_pipeline.INDEX_ROOT, rag_pipeline.get_embeddings, batch_cli.FakeLLM, batch_cli.get_transcript)
+    _root = tempfile.mkdtemp(prefix="batch_cli_")
+    rag_pipeline.INDEX_ROOT = os.path.join(_root, "indexes")
+    rag_pipeline.get_embeddings = lambda model_name=rag_pipeline.EMBED_MODEL: EMBEDDINGS
+    batch_cli.get_transcript = lambda video_id: (None, None)
+
+    for video_id in VIDEO_IDS:
+        rag_pipeline.process_transcript(TRANSCRIPT, persist_dir=rag_pipeline.index_dir_for(video_id), language="en")
+
+    with open(os.path.join(_root, "urls.txt"), "w", encoding="utf-8") as f:
+        f.write("\n".join(VIDEO_IDS) + "\n")
+    with open(os.path.join(_root, "questions.txt"), "w", encoding="utf-8") as f:
+        f.write("# Comments are ignored\n" + "\n".join(QUESTIONS) + "\n")
+
+
+def teardown_module(module=None):
+    rag_pipeline.INDEX_ROOT, rag_pipeline.get_embeddings, batch_cli.FakeLLM, batch_cli.get_transcript = _saved
+    rag_pipeline._open_indexes.clear()
+    shutil.rmtree(_root, ignore_errors=True)
+
+
+def _run(output_name: str, llm_class=FakeLLM, urls_name: str = "urls.txt") -> list:
+    """Run batch mode and return every record in its output file."""
+    output = os.path.join(_root, output_name)
+    batch_cli.FakeLLM = llm_class
+    argv = sys.argv
+    sys.argv = [
+        "batch_cli.py", "--fake-llm", "--urls", os.path.join(_root, urls_name),
+        "--questions", os.path.join(_root, "questions.txt"), "--output", output,
+    ]
+    try:
+        batch_cli.main()
+    finally:
+        sys.argv = argv
+        batch_cli.FakeLLM = _saved[2]
+
+    records = []
+    with open(output, encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue  # Partial line left by a crashed run
+    return records
+
+
+# ----------------------------------------------------------
+# Resume
+# ----------------------------------------------------------
+def test_every_pair_is_answered_once():
+    records = _run("answered.jsonl")
+    assert sorted((r["video_id"], r["question"]) for r in records) == sorted(
+        (video_id, question) for video_id in VIDEO_IDS for question in QUESTIONS
+    )
+    assert all(r["answer"].startswith("Fake answer") for r in records)
+
+    # Second run has nothing left to do
+    assert len(_run("answered.jsonl")) == len(records)
+
+
+def test_existing_indexes_are_marked_as_skipped():
+    for record in _run("timings.jsonl"):
+        assert record["timings"]["ingest"] == "skipped"
+        assert "fetch_s" not in record["timings"] and "index_s" not in record["timings"]
+        assert record["timings"]["answer_s"] >= 0
+
+
+def test_partial_line_from_a_crashed_run_is_retried():
+    output = os.path.join(_root, "crashed.jsonl")
+    answered = {"video_id": VIDEO_IDS[0], "question": QUESTIONS[0], "answer": "Earlier answer"}
+    with open(output, "w", encoding="utf-8") as f:
+        f.write(json.dumps(answered) + "\n" + '{"video_id": "batch-vid')
+
+    records = _run("crashed.jsonl")
+    new_pairs = [(r["video_id"], r["question"]) for r in records[1:]]
+    assert (VIDEO_IDS[0], QUESTIONS[0]) not in new_pairs
+    assert len(new_pairs) == len(VIDEO_IDS) * len(QUESTIONS) - 1
+
+
+# ----------------------------------------------------------
+# Error records
+# ----------------------------------------------------------
+def test_llm_errors_are_recorded_and_retried():
+    records = _run("errors.jsonl", llm_class=FailingLLM)
+    failed = [r for r in records if "error" in r]
+    assert sorted(r["video_id"] for r in failed) == sorted(VIDEO_IDS)
+    assert all(r["question"] == QUESTIONS[1] and "LLM unavailable" in r["error"] for r in failed)
+    assert not any("answer" in r for r in failed)
+
+    retried = _run("errors.jsonl")[len(records):]
+    assert sorted((r["video_id"], r["question"]) for r in retried) == sorted(
+        (video_id, QUESTIONS[1]) for video_id in VIDEO_IDS
+    )
+    assert all("answer" in r for r in retried)
+
+
+def test_ingest_errors_are_recorded_for_every_question():
+    with open(os.path.join(_root, "missing.txt"), "w", encoding="utf-8") as f:
+        f.write("batch-missing\n")
+
+    records = _run("missing.jsonl", urls_name="missing.txt")
+    assert sorted(r["question"] for r in records) == sorted(QUESTIONS)
+    assert all(r["video_id"] == "batch-missing" and "Could not fetch transcript" in r["error"] for r in records)
+
+
+def main():
+    tests = [(name, fn) for name, fn in sorted(globals().items()) if name.startswith("test_") and callable(fn)]
+    failed = 0
+    setup_module()
+    try:
+        for name, fn in tests:
+            try:
+                fn()
+                print(f"✅ PASS - {name}")
+            except Exception as e:
+                failed += 1
+                print(f"❌ FAIL - {name}: {type(e).__name__}: {e}")
+    finally:
+        teardown_module()
+
+    print(f"\nTotal: {len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Tests for the coarse (IVF-style) retrieval layer: on small corpora its
+results match exact search, it finds the same neighbours when only the
+closest partitions are probed on clustered data, and short videos are
+searched flat. Uses deterministic fake embeddings, so no model download
+or network access is needed. Run directly or with pytest:
+    python test_coarse_index.py
+    pytest test_coarse_index.py
+"""
+
+import sys
+import os
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import shutil
+import tempfile
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding
+import coarse_index
+import rag_pipeline
+from coarse_index import CoarseIndex, kmeans, normalize
+
+EMBEDDINGS = DeterministicFakeEmbedding(size=16)
+QUESTIONS = [f"What happens in part {i} about topic {i % 7}?" for i in range(10)]
+
+_saved = None
+_root = None
+
+
+def setup_module(module=None):
+    global _saved, _root
+    _saved = (rag_pipeline.INDEX_ROOT, rag_pipeline.get_embeddings, rag_pipeline.CHUNK_SIZE, rag_pipeline.CHUNK_OVERLAP)
+    _root = tempfile.mkdtemp(prefix="coarse_index_")
+    rag_pipeline.INDEX_ROOT = os.path.join(_root, "indexes")
+    rag_pipeline.get_embeddings = lambda model_name=rag_pipeline.EMBED_MODEL: EMBEDDINGS
+
+
+def teardown_module(module=None):
+    rag_pipeline.INDEX_ROOT, rag_pipeline.get_embeddings, rag_pipeline.CHUNK_SIZE, rag_pipeline.CHUNK_OVERLAP = _saved
+    rag_pipeline._open_indexes.clear()
+    rag_pipeline._coarse_indexes.clear()
+    shutil.rmtree(_root, ignore_errors=True)
+
+
+def _exact_search(ids, vectors, query, k: int):
+    """Brute-force cosine search: the reference the coarse layer is checked against."""
+    scores = normalize(np.asarray(vectors, dtype=np.float32)) @ normalize(np.asarray(query, dtype=np.float32))
+    best = np.argsort(-scores, kind="stable")[:k]
+    return [(str(ids[i]), float(scores[i])) for i in best]
+
+
+def _clustered_corpus(clusters: int = 10, per_cluster: int = 50, dim: int = 32, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    centers = normalize(rng.normal(size=(clusters, dim)))
+    vectors = np.repeat(centers, per_cluster, axis=0) + 0.05 * rng.normal(size=(clusters * per_cluster, dim))
+    ids = [f"chunk-{i}" for i in range(len(vectors))]
+    return ids, vectors.astype(np.float32), centers
+
+
+# ----------------------------------------------------------
+# Coarse layer on its own
+# ----------------------------------------------------------
+def test_kmeans_partitions_every_vector():
+    _, vectors, _ = _clustered_corpus()
+    vectors = normalize(vectors)
+    centroids, labels = kmeans(vectors, 10)
+    assert centroids.shape == (10, vectors.shape[1])
+    assert np.allclose(np.linalg.norm(centroids, axis=1), 1.0, atol=1e-5)
+    assert np.all(np.bincount(labels, minlength=10) > 0)
+    # Converged: every vector sits in the partition of its closest centroid
+    assert np.array_equal(labels, np.argmax(vectors @ centroids.T, axis=1))
+
+
+def test_probing_every_partition_matches_exact_search():
+    rng = np.random.default_rng(7)
+    vectors = rng.normal(size=(300, 16)).astype(np.float32)
+    ids = [f"chunk-{i}" for i in range(len(vectors))]
+    coarse = CoarseIndex.build(ids, vectors)
+    assert coarse.offsets[-1] == len(ids) and sorted(coarse.ids) == sorted(ids)
+
+    for _ in range(20):
+        query = rng.normal(size=16)
+        hits = coarse.search(query, 5, nprobe=coarse.partitions)
+        exact = _exact_search(ids, vectors, query, 5)
+        assert [chunk_id for chunk_id, _ in hits] == [chunk_id for chunk_id, _ in exact]
+        assert np.allclose([score for _, score in hits], [score for _, score in exact], atol=1e-5)
+
+
+def test_closest_partitions_find_the_exact_neighbours_on_clustered_data():
+    ids, vectors, centers = _clustered_corpus()
+    coarse = CoarseIndex.build(ids, vectors, partitions=10)
+    rng = np.random.default_rng(3)
+
+    for center in centers:
+        query = center + 0.05 * rng.normal(size=center.shape)
+        hits = coarse.search(query, 5, nprobe=2)
+        assert [chunk_id for chunk_id, _ in hits] == [chunk_id for chunk_id, _ in _exact_search(ids, vectors, query, 5)]
+
+
+def test_saved_layer_searches_the_same():
+    ids, vectors, centers = _clustered_corpus()
+    coarse = CoarseIndex.build(ids, vectors, partitions=10)
+    path = os.path.join(_root, "saved.npz")
+    coarse.save(path)
+    loaded = CoarseIndex.load(path)
+    assert loaded.search(centers[4], 5, nprobe=2) == coarse.search(centers[4], 5, nprobe=2)
+
+
+# ----------------------------------------------------------
+# Coarse layer in the pipeline
+# ----------------------------------------------------------
+def test_long_index_search_matches_exact_search():
+    rag_pipeline.CHUNK_SIZE, rag_pipeline.CHUNK_OVERLAP = 100, 20
+    try:
+        transcript = " ".join(f"Sentence {i} is about topic {i % 9}." for i in range(2000))
+        vector_store = rag_pipeline.process_transcript(
+            transcript, persist_dir=rag_pipeline.index_dir_for("coarse-long"), language="en"
+        )
+    finally:
+        rag_pipeline.CHUNK_SIZE, rag_pipeline.CHUNK_OVERLAP = _saved[2], _saved[3]
+
+    coarse = rag_pipeline._get_coarse_index(vector_store)
+    assert coarse is not None and coarse.partitions > 1
+    everything = vector_store._collection.get(include=["embeddings"])
+    assert len(everything["ids"]) >= coarse_index.MIN_CHUNKS
+
+    for question in QUESTIONS:
+        exact = _exact_search(everything["ids"], everything["embeddings"], EMBEDDINGS.embed_query(question), 4)
+        docs = rag_pipeline.coarse_search(question, vector_store, coarse, 4, nprobe=coarse.partitions)
+        by_chunk = vector_store._collection.get(ids=[chunk_id for chunk_id, _ in exact], include=["metadatas"])
+        expected = {chunk_id: metadata["chunk_id"] for chunk_id, metadata in zip(by_chunk["ids"], by_chunk["metadatas"])}
+        assert [doc.metadata["chunk_id"] for doc in docs] == [expected[chunk_id] for chunk_id, _ in exact]
+
+        # Default probing returns k chunks from the closest partitions
+        assert len(rag_pipeline.coarse_search(question, vector_store, coarse, 4)) == 4
+
+
+def test_short_videos_are_searched_flat():
+    vector_store = rag_pipeline.process_transcript(
+        " ".join(f"Sentence {i} is about topic {i % 9}." for i in range(100)),
+        persist_dir=rag_pipeline.index_dir_for("coarse-short"),
+        language="en",
+    )
+    assert vector_store._collection.count() < coarse_index.MIN_CHUNKS
+    assert coarse_index.load_for_dir(rag_pipeline.index_dir_for("coarse-short")) is None
+    assert rag_pipeline._get_coarse_index(vector_store) is None
+
+    _, prompt = rag_pipeline._prepare_answer("Which sentence is about topic 3?", vector_store)
+    assert prompt.count("[Chunk ") == rag_pipeline.TOP_K_RESULTS
+
+
+def main():
+    tests = [(name, fn) for name, fn in sorted(globals().items()) if name.startswith("test_") and callable(fn)]
+    failed = 0
+    setup_module()
+    try:
+        for name, fn in tests:
+            try:
+                fn()
+                print(f"✅ PASS - {name}")
+            except Exception as e:
+                failed += 1
+                print(f"❌ FAIL - {name}: {type(e).__name__}: {e}")
+    finally:
+        teardown_module()
+
+    print(f"\nTotal: {len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Tests for conversation memory: follow-up detection, the bounded history,
+and condensing follow-ups into standalone questions, alone and inside
+get_answer. Uses deterministic fake embeddings and the fake LLM, so no
+model download or network access is needed. Run directly or with pytest:
+    python test_conversation.py
+    pytest test_conversation.py
+"""
+
+import sys
+import os
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import shutil
+import tempfile
+from langchain_core.embeddings import DeterministicFakeEmbedding
+import rag_pipeline
+from conversation import ConversationMemory, condense_question, is_follow_up
+from fake_llm import FakeLLM, fake_completion
+
+EMBEDDINGS = DeterministicFakeEmbedding(size=16)
+TRANSCRIPT = " ".join(f"Neurons in layer {i % 7} learn feature {i} during training." for i in range(200))
+
+_saved = None
+_root = None
+
+
+class RecordingLLM(FakeLLM):
+    """FakeLLM that keeps every prompt it was sent."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.prompts = []
+
+    def invoke(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        return super().invoke(prompt)
+
+
+class BrokenLLM(FakeLLM):
+    def invoke(self, prompt: str) -> str:
+        raise RuntimeError("LLM unavailable")
+
+
+def setup_module(module=None):
+    global _saved, _root
+    _saved = (rag_pipeline.INDEX_ROOT, rag_pipeline.get_embeddings)
+    _root = tempfile.mkdtemp(prefix="conversation_")
+    rag_pipeline.INDEX_ROOT = os.path.join(_root, "indexes")
+    rag_pipeline.get_embeddings = lambda model_name=rag_pipeline.EMBED_MODEL: EMBEDDINGS
+
+
+def teardown_module(module=None):
+    rag_pipeline.INDEX_ROOT, rag_pipeline.get_embeddings = _saved
+    rag_pipeline._open_indexes.clear()
+    shutil.rmtree(_root, ignore_errors=True)
+
+
+def _memory_with(*turns) -> ConversationMemory:
+    memory = ConversationMemory()
+    for question, answer in turns:
+        memory.add("user", question)
+        memory.add("assistant", answer)
+    return memory
+
+
+# ----------------------------------------------------------
+# Follow-up detection
+# ----------------------------------------------------------
+def test_follow_ups_are_detected():
+    for question in (
+        "And why?",
+        "What about the output layer?",
+        "How does it learn?",
+        "Tell me more",
+        "why?",
+        "इसका मतलब क्या है?",
+        "और बताओ",
+    ):
+        assert is_follow_up(question), question
+
+
+def test_standalone_questions_are_not_follow_ups():
+    for question in (
+        "What is a neuron and how does it learn?",
+        "Define bias",
+        "What does this video say about gradient descent?",
+        "How are the weights of layer 3 initialised?",
+        "न्यूरॉन क्या है?",
+    ):
+        assert not is_follow_up(question), question
+
+
+# ----------------------------------------------------------
+# Bounded history
+# ----------------------------------------------------------
+def test_history_stays_within_its_budget():
+    memory = ConversationMemory(token_budget=200, recent_messages=4)
+    for i in range(50):
+        memory.add("user", f"Question {i} about layer {i}. " + "padding words " * 100)
+        memory.add("assistant", f"Answer {i}. " + "more padding " * 100)
+
+    assert len(memory.messages) == 4
+    assert len(memory.render()) <= 200 * 4 + 100    # Budget in characters, plus role labels
+    assert memory.last_user_question().startswith("Question 49")
+    assert memory.digest.startswith("…")
+
+    memory.clear()
+    assert memory.render() == "" and memory.last_user_question() is None
+
+
+# ----------------------------------------------------------
+# Condensing
+# ----------------------------------------------------------
+def test_standalone_questions_skip_the_llm():
+    memory = _memory_with(("What is a neuron?", "A unit that sums its inputs."))
+    llm = FakeLLM()
+    assert condense_question("What is backpropagation?", memory, llm) == "What is backpropagation?"
+    assert condense_question("How does it learn?", None, llm) == "How does it learn?"
+    assert condense_question("How does it learn?", ConversationMemory(), llm) == "How does it learn?"
+    assert llm.calls == 0
+
+
+def test_follow_ups_are_rewritten_with_the_history():
+    memory = _memory_with(("What is a neuron?", "A unit that sums its inputs."))
+    llm = RecordingLLM()
+    standalone = condense_question("How does it learn?", memory, llm)
+
+    assert llm.calls == 1
+    assert standalone == fake_completion(llm.prompts[0])
+    assert "What is a neuron?" in llm.prompts[0] and "How does it learn?" in llm.prompts[0]
+
+
+def test_llm_failure_falls_back_to_the_previous_question():
+    memory = _memory_with(("What is a neuron?", "A unit that sums its inputs."))
+    assert condense_question("How does it learn?", memory, BrokenLLM()) == "How does it learn? (regarding: What is a neuron?)"
+    assert condense_question("How does it learn?", memory) == "How does it learn? (regarding: What is a neuron?)"
+
+
+def test_get_answer_condenses_follow_ups_and_records_turns():
+    vector_store = rag_pipeline.process_transcript(
+        TRANSCRIPT, persist_dir=rag_pipeline.index_dir_for("conversation-video"), language="en"
+    )
+    memory = ConversationMemory()
+    llm = RecordingLLM()
+
+    first = rag_pipeline.get_answer("What do neurons in layer 3 learn?", vector_store, llm, memory=memory)
+    assert llm.calls == 1
+    assert [m["role"] for m in memory.messages] == ["user", "assistant"]
+    assert memory.messages[1]["content"] == first
+
+    rag_pipeline.get_answer("And why?", vector_store, llm, memory=memory)
+    assert llm.calls == 3       # Condense, then answer the standalone question
+    condensed = fake_completion(llm.prompts[1])
+    assert f"Question: {condensed}" in llm.prompts[2]
+    assert memory.last_user_question() == "And why?"
+
+
+def main():
+    tests = [(name, fn) for name, fn in sorted(globals().items()) if name.startswith("test_") and callable(fn)]
+    failed = 0
+    setup_module()
+    try:
+        for name, fn in tests:
+            try:
+                fn()
+                print(f"✅ PASS - {name}")
+            except Exception as e:
+                failed += 1
+                print(f"❌ FAIL - {name}: {type(e).__name__}: {e}")
+    finally:
+        teardown_module()
+
+    print(f"\nTotal: {len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Tests for single-file index bundles: an export/import round trip keeps
+vectors, metadata, the summary tree and the coarse layer, and corrupted
+bundles are rejected. Uses deterministic fake embeddings, so no model
+download or network access is needed. Run directly or with pytest:
+    python test_index_bundle.py
+    pytest test_index_bundle.py
+"""
+
+import sys
+import os
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import shutil
+import tempfile
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding
+import coarse_index
+import rag_pipeline
+import summarizer
+from fake_llm import FakeLLM
+from index_bundle import IndexBundle, export_bundle, import_bundle
+
+EMBEDDINGS = DeterministicFakeEmbedding(size=16)
+# Small chunks, so the index is long enough to get a coarse layer
+TRANSCRIPT = " ".join(f"Sentence {i} is about topic {i % 9}." for i in range(2000))
+
+_saved = None
+_root = None
+_bundle_path = None
+
+
+def setup_module(module=None):
+    """Build one index with a summary tree and coarse layer, and export it."""
+    global _saved, _root, _bundle_path
+    _saved = (
+        rag_pipeline.INDEX_ROOT, rag_pipeline.get_embeddings, rag_pipeline.CHUNK_SIZE,
+        rag_pipeline.CHUNK_OVERLAP, summarizer.CACHE_ROOT,
+    )
+    _root = tempfile.mkdtemp(prefix="index_bundle_")
+    rag_pipeline.INDEX_ROOT = os.path.join(_root, "indexes")
+    rag_pipeline.get_embeddings = lambda model_name=rag_pipeline.EMBED_MODEL: EMBEDDINGS
+    rag_pipeline.CHUNK_SIZE, rag_pipeline.CHUNK_OVERLAP = 100, 20
+    summarizer.CACHE_ROOT = os.path.join(_root, "summary_cache")
+
+    vector_store = rag_pipeline.process_transcript(
+        TRANSCRIPT, persist_dir=rag_pipeline.index_dir_for("bundle-source"), language="en"
+    )
+    rag_pipeline.queue_summary(vector_store, FakeLLM()).result()
+    _bundle_path = os.path.join(_root, "bundle-source.ytrag")
+    export_bundle("bundle-source", _bundle_path)
+
+
+def teardown_module(module=None):
+    (
+        rag_pipeline.INDEX_ROOT, rag_pipeline.get_embeddings, rag_pipeline.CHUNK_SIZE,
+        rag_pipeline.CHUNK_OVERLAP, summarizer.CACHE_ROOT,
+    ) = _saved
+    rag_pipeline._open_indexes.clear()
+    shutil.rmtree(_root, ignore_errors=True)
+
+
+def _records(collection) -> dict:
+    found = collection.get(include=["documents", "metadatas", "embeddings"])
+    return {
+        chunk_id: (document, metadata, np.asarray(vector))
+        for chunk_id, document, metadata, vector in zip(found["ids"], found["documents"], found["metadatas"], found["embeddings"])
+    }
+
+
+def _corrupt_copy(name: str, edit) -> str:
+    with open(_bundle_path, "rb") as f:
+        data = bytearray(f.read())
+    data = edit(data)
+    path = os.path.join(_root, name)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+# ----------------------------------------------------------
+# Round trip
+# ----------------------------------------------------------
+def test_round_trip_keeps_vectors_metadata_and_summaries():
+    import_bundle(_bundle_path, "bundle-copy")
+    source = rag_pipeline.open_index("bundle-source")
+    copy = rag_pipeline.open_index("bundle-copy")
+
+    source_records = _records(source._collection)
+    copy_records = _records(copy._collection)
+    assert len(source_records) >= coarse_index.MIN_CHUNKS
+    assert source_records.keys() == copy_records.keys()
+    for chunk_id, (document, metadata, vector) in source_records.items():
+        copy_document, copy_metadata, copy_vector = copy_records[chunk_id]
+        assert copy_document == document
+        assert copy_metadata == metadata
+        assert np.allclose(copy_vector, vector)
+
+    source_tree = _records(rag_pipeline.open_summary_tree(source)._collection)
+    copy_tree = _records(rag_pipeline.open_summary_tree(copy)._collection)
+    assert source_tree.keys() == copy_tree.keys() and len(copy_tree) > 1
+    assert rag_pipeline.get_stored_summary(copy) == rag_pipeline.get_stored_summary(source)
+
+    source_meta = rag_pipeline.read_index_meta(rag_pipeline.index_dir_for("bundle-source"))
+    copy_meta = rag_pipeline.read_index_meta(rag_pipeline.index_dir_for("bundle-copy"))
+    assert copy_meta["embed_model"] == source_meta["embed_model"]
+    assert copy_meta["chunks"] == source_meta["chunks"]
+    assert copy_meta["imported_from"] == os.path.basename(_bundle_path)
+
+
+def test_round_trip_keeps_the_coarse_layer():
+    import_bundle(_bundle_path, "bundle-coarse")
+    source = coarse_index.load_for_dir(rag_pipeline.index_dir_for("bundle-source"))
+    copy = coarse_index.load_for_dir(rag_pipeline.index_dir_for("bundle-coarse"))
+    assert source is not None and copy is not None
+    assert list(copy.ids) == list(source.ids)
+    assert np.allclose(copy.vectors, source.vectors, atol=1e-6)
+
+    query = EMBEDDINGS.embed_query("topic 4")
+    assert [chunk_id for chunk_id, _ in copy.search(query, 5)] == [chunk_id for chunk_id, _ in source.search(query, 5)]
+
+
+def test_opened_bundle_maps_its_vectors():
+    bundle = IndexBundle.open(_bundle_path)
+    assert bundle.header["index_id"] == "bundle-source"
+    assert bundle.array("vectors").shape == (len(bundle.header["chunks"]["ids"]), EMBEDDINGS.size)
+
+
+# ----------------------------------------------------------
+# Corrupted bundles
+# ----------------------------------------------------------
+def _assert_rejected(path: str):
+    try:
+        import_bundle(path, "bundle-rejected")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError(f"{path} was imported")
+    assert not rag_pipeline.index_exists("bundle-rejected")
+
+
+def test_flipped_byte_is_rejected():
+    def flip(data: bytearray) -> bytearray:
+        data[len(data) // 2] ^= 0xFF
+        return data
+    _assert_rejected(_corrupt_copy("flipped.ytrag", flip))
+
+
+def test_truncated_bundle_is_rejected():
+    _assert_rejected(_corrupt_copy("truncated.ytrag", lambda data: data[: len(data) - 100]))
+
+
+def test_other_files_are_rejected():
+    _assert_rejected(_corrupt_copy("not-a-bundle.ytrag", lambda data: bytearray(b"PK\x03\x04") + data[4:]))
+
+
+def main():
+    tests = [(name, fn) for name, fn in sorted(globals().items()) if name.startswith("test_") and callable(fn)]
+    failed = 0
+    setup_module()
+    try:
+        for name, fn in tests:
+            try:
+                fn()
+                print(f"✅ PASS - {name}")
+            except Exception as e:
+                failed += 1
+                print(f"❌ FAIL - {name}: {type(e).__name__}: {e}")
+    finally:
+        teardown_module()
+
+    print(f"\nTotal: {len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Tests for background ingestion jobs: progress, reattaching to a job by
+its ID (as the app does from the `job` query parameter after a refresh),
+dedupe of concurrent submits, failures and expiry, and pasted transcripts
+(hash-keyed reuse, large pastes chunked window by window). Transcripts are served
+locally and embedded with deterministic fake embeddings, so no model
+download or network access is needed. Run directly or with pytest:
+    python test_ingest_jobs.py
+    pytest test_ingest_jobs.py
+"""
+
+import sys
+import os
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import hashlib
+import shutil
+import tempfile
+import threading
+import time
+from langchain_core.embeddings import DeterministicFakeEmbedding
+import ingest_jobs
+import rag_pipeline
+from ingest_jobs import DONE, FAILED, FETCHING, get_job, submit_ingest, submit_manual_ingest
+
+EMBEDDINGS = DeterministicFakeEmbedding(size=16)
+TRANSCRIPT = " ".join(f"In part {i} of the lecture, the teacher explains idea {i % 11}." for i in range(500))
+TIMEOUT = 30
+
+_saved = None
+_root = None
+_embedded_batches = []
+_fetches = []
+_fetch_gate = threading.Event()
+
+
+class CountingEmbeddings:
+    """EMBEDDINGS, recording how many texts each embed_documents call gets."""
+
+    def embed_documents(self, texts):
+        _embedded_batches.append(len(texts))
+        return EMBEDDINGS.embed_documents(texts)
+
+    def embed_query(self, text):
+        return EMBEDDINGS.embed_query(text)
+
+
+def _fetch(video_id: str):
+    """Stand-in for get_transcript: waits for the gate, then serves TRANSCRIPT."""
+    _fetches.append(video_id)
+    _fetch_gate.wait(TIMEOUT)
+    if video_id.startswith("no-captions"):
+        return None, None
+    return TRANSCRIPT, "en"
+
+
+def setup_module(module=None):
+    global _saved, _root
+    _saved = (rag_pipeline.INDEX_ROOT, rag_pipeline.get_embeddings, ingest_jobs.get_transcript)
+    _root = tempfile.mkdtemp(prefix="ingest_jobs_")
+    rag_pipeline.INDEX_ROOT = os.path.join(_root, "indexes")
+    rag_pipeline.get_embeddings = lambda model_name=rag_pipeline.EMBED_MODEL: CountingEmbeddings()
+    ingest_jobs.get_transcript = _fetch
+    _fetch_gate.set()
+
+
+def teardown_module(module=None):
+    rag_pipeline.INDEX_ROOT, rag_pipeline.get_embeddings, ingest_jobs.get_transcript = _saved
+    _fetch_gate.set()
+    _forget_jobs()
+    rag_pipeline._open_indexes.clear()
+    shutil.rmtree(_root, ignore_errors=True)
+
+
+def _forget_jobs():
+    """Empty the job registry, as after a restart."""
+    with ingest_jobs._jobs_lock:
+        ingest_jobs._jobs.clear()
+        ingest_jobs._job_by_video.clear()
+
+
+def _wait_until_finished(job_id: str) -> dict:
+    deadline = time.time() + TIMEOUT
+    while time.time() < deadline:
+        job = get_job(job_id)
+        if job.finished:
+            return job.snapshot()
+        time.sleep(0.02)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+# ----------------------------------------------------------
+# Progress and reattaching
+# ----------------------------------------------------------
+def test_job_reports_progress_until_done():
+    job_id = submit_ingest("progress-video")
+    progress = _wait_until_finished(job_id)
+
+    assert progress["status"] == DONE and progress["error"] is None
+    assert progress["video_id"] == "progress-video"
+    assert progress["transcript_chars"] == len(TRANSCRIPT)
+    assert progress["detected_language"] == "en"
+    assert progress["chunks_total"] > 0 and progress["chunks_done"] == progress["chunks_total"]
+    assert get_job(job_id).transcript_preview == TRANSCRIPT[:ingest_jobs.PREVIEW_CHARS]
+    assert rag_pipeline.index_exists("progress-video")
+
+
+def test_job_link_reattaches_to_the_running_job():
+    _fetch_gate.clear()
+    try:
+        job_id = submit_ingest("reattach-video")
+
+        # A refreshed page only has the job ID from its URL (?job=...)
+        deadline = time.time() + TIMEOUT
+        while get_job(job_id).status != FETCHING and time.time() < deadline:
+            time.sleep(0.01)
+        reattached = get_job(job_id)
+        assert reattached is not None and reattached.snapshot()["status"] == FETCHING
+
+        # Loading the same video again joins the running job instead of starting another
+        assert submit_ingest("reattach-video") == job_id
+    finally:
+        _fetch_gate.set()
+
+    assert _wait_until_finished(job_id)["status"] == DONE
+    assert _fetches.count("reattach-video") == 1
+
+    # Finished jobs stay reachable through their link until they expire
+    assert get_job(job_id).snapshot()["status"] == DONE
+    assert submit_ingest("reattach-video") == job_id
+
+
+def test_unknown_and_expired_job_links_are_dropped():
+    assert get_job("not-a-job") is None
+
+    job_id = submit_ingest("expiring-video")
+    _wait_until_finished(job_id)
+    get_job(job_id).updated_at -= ingest_jobs.JOB_TTL_SECONDS + 1
+
+    assert get_job(job_id) is None
+    assert "expiring-video" not in ingest_jobs._job_by_video
+
+
+def test_existing_index_is_reused_after_a_restart():
+    first_id = submit_ingest("restart-video")
+    _wait_until_finished(first_id)
+    fetches = len(_fetches)
+
+    _forget_jobs()
+    job_id = submit_ingest("restart-video")
+    progress = _wait_until_finished(job_id)
+    assert job_id != first_id
+    assert progress["status"] == DONE and progress["detected_language"] == "en"
+    assert get_job(job_id).transcript_preview
+    assert len(_fetches) == fetches
+
+
+# ----------------------------------------------------------
+# Failures
+# ----------------------------------------------------------
+def test_failed_job_keeps_its_error_and_can_be_retried():
+    job_id = submit_ingest("no-captions-video")
+    progress = _wait_until_finished(job_id)
+    assert progress["status"] == FAILED
+    assert "Could not fetch transcript" in progress["error"]
+    assert not rag_pipeline.index_exists("no-captions-video")
+
+    # The failure stays visible through the link, and loading again starts a new job
+    assert get_job(job_id).status == FAILED
+    retry_id = submit_ingest("no-captions-video")
+    assert retry_id != job_id
+    assert _wait_until_finished(retry_id)["status"] == FAILED
+
+
+# ----------------------------------------------------------
+# Pasted transcripts
+# ----------------------------------------------------------
+def _large_paste(chars: int) -> str:
+    sentences = []
+    i = 0
+    while sum(map(len, sentences)) < chars:
+        sentences.append(f"Pasted line {i} says that the model improves on topic {i % 13}. ")
+        i += 1
+    return "".join(sentences)
+
+
+def test_windowed_chunking_matches_splitting_in_one_go():
+    transcript = _large_paste(60_000)
+    saved = rag_pipeline.SPLIT_WINDOW_CHARS
+    try:
+        rag_pipeline.SPLIT_WINDOW_CHARS = len(transcript)
+        whole = list(rag_pipeline.iter_transcript_spans(transcript))
+        rag_pipeline.SPLIT_WINDOW_CHARS = 7_000
+        windowed = list(rag_pipeline.iter_transcript_spans(transcript))
+        window_hash = rag_pipeline.transcript_hash(transcript)
+    finally:
+        rag_pipeline.SPLIT_WINDOW_CHARS = saved
+
+    assert windowed == whole
+    assert all(transcript[start:start + len(chunk)] == chunk for start, chunk in windowed)
+    assert windowed[-1][0] + len(windowed[-1][1]) >= len(transcript.rstrip())
+    assert window_hash == hashlib.sha256(transcript.encode("utf-8")).hexdigest()
+
+
+def test_large_paste_is_embedded_in_batches():
+    transcript = _large_paste(400_000)
+    del _embedded_batches[:]
+    fetches = len(_fetches)
+
+    job_id = submit_manual_ingest(transcript)
+    progress = _wait_until_finished(job_id)
+    video_id = f"manual-{rag_pipeline.transcript_hash(transcript)[:16]}"
+
+    assert progress["status"] == DONE and progress["video_id"] == video_id
+    assert progress["transcript_chars"] == len(transcript)
+    assert progress["chunks_done"] == progress["chunks_total"] == sum(_embedded_batches)
+    assert len(_embedded_batches) > 2 and max(_embedded_batches) == rag_pipeline.EMBED_BATCH_SIZE
+    assert len(_fetches) == fetches
+
+    meta = rag_pipeline.read_index_meta(rag_pipeline.index_dir_for(video_id))
+    assert meta["chunks"] == progress["chunks_total"]
+    first = rag_pipeline.open_index(video_id).get(where={"chunk_id": 0}, include=["metadatas"])["metadatas"][0]
+    assert first["source"] == "manual_transcript"
+
+
+def test_same_paste_reuses_its_job_and_index():
+    transcript = _large_paste(20_000)
+    job_id = submit_manual_ingest(transcript)
+    video_id = _wait_until_finished(job_id)["video_id"]
+    assert submit_manual_ingest(transcript) == job_id
+
+    # After a restart the job is gone, but the hash-keyed index is reused without embedding again
+    _forget_jobs()
+    del _embedded_batches[:]
+    again_id = submit_manual_ingest(transcript)
+    progress = _wait_until_finished(again_id)
+    assert again_id != job_id
+    assert progress["status"] == DONE and progress["video_id"] == video_id
+    assert _embedded_batches == []
+
+    # A different paste gets its own index
+    other_id = submit_manual_ingest(transcript + " One more line.")
+    assert _wait_until_finished(other_id)["video_id"] != video_id
+
+
+def main():
+    tests = [(name, fn) for name, fn in sorted(globals().items()) if name.startswith("test_") and callable(fn)]
+    failed = 0
+    setup_module()
+    try:
+        for name, fn in tests:
+            try:
+                fn()
+                print(f"✅ PASS - {name}")
+            except Exception as e:
+                failed += 1
+                print(f"❌ FAIL - {name}: {type(e).__name__}: {e}")
+    finally:
+        teardown_module()
+
+    print(f"\nTotal: {len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
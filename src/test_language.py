@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Tests for language detection and embedding model routing: which model a
+transcript is indexed with, that reopened indexes embed queries with the
+same model, the wider search for cross-lingual questions, and that each
+model is loaded once per process. Uses deterministic fake embeddings, so
+no model download or network access is needed. Run directly or with pytest:
+    python test_language.py
+    pytest test_language.py
+"""
+
+import sys
+import os
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import shutil
+import tempfile
+import threading
+import langchain_community.embeddings
+from langchain_core.embeddings import DeterministicFakeEmbedding
+import rag_pipeline
+from language import detect_language
+from rag_pipeline import EMBED_MODEL, MULTILINGUAL_EMBED_MODEL, embed_model_for
+
+EMBEDDINGS = DeterministicFakeEmbedding(size=16)
+ENGLISH = " ".join(f"In step {i} the network learns what the input is for." for i in range(120))
+HINDI = " ".join(f"चरण {i} में नेटवर्क यह सीखता है कि इनपुट किस लिए है।" for i in range(120))
+
+_saved = None
+_root = None
+_models_requested = []
+
+
+class NamedFakeEmbeddings:
+    """EMBEDDINGS under a model's name, like the HuggingFace models it stands in for."""
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+
+    def embed_documents(self, texts):
+        return EMBEDDINGS.embed_documents(texts)
+
+    def embed_query(self, text):
+        return EMBEDDINGS.embed_query(text)
+
+
+def _get_embeddings(model_name: str = EMBED_MODEL):
+    _models_requested.append(model_name)
+    return NamedFakeEmbeddings(model_name)
+
+
+def setup_module(module=None):
+    global _saved, _root
+    _saved = (rag_pipeline.INDEX_ROOT, rag_pipeline.get_embeddings)
+    _root = tempfile.mkdtemp(prefix="language_")
+    rag_pipeline.INDEX_ROOT = os.path.join(_root, "indexes")
+    rag_pipeline.get_embeddings = _get_embeddings
+
+
+def teardown_module(module=None):
+    rag_pipeline.INDEX_ROOT, rag_pipeline.get_embeddings = _saved
+    rag_pipeline._open_indexes.clear()
+    shutil.rmtree(_root, ignore_errors=True)
+
+
+def _chunks_in_prompt(question: str, vector_store) -> int:
+    _, prompt = rag_pipeline._prepare_answer(question, vector_store)
+    return prompt.count("[Chunk ")
+
+
+# ----------------------------------------------------------
+# Detection
+# ----------------------------------------------------------
+def test_languages_are_detected():
+    for text, language in (
+        (ENGLISH, "en"),
+        (HINDI, "hi"),
+        ("¿Qué es una red neuronal y cómo aprende de los datos?", "es"),
+        ("Qu'est-ce que le réseau apprend dans les couches cachées?", "fr"),
+        ("یہ ویڈیو کس بارے میں ہے؟", "ur"),
+        ("هذا الفيديو عن الشبكات العصبية", "ar"),
+        ("このビデオは何について話していますか", "ja"),
+        ("这个视频讲的是神经网络", "zh"),
+        ("Что такое нейронная сеть?", "ru"),
+    ):
+        assert detect_language(text) == language, text
+
+
+def test_short_or_ambiguous_text_is_unknown():
+    for text in ("", "ok", "42 + 17", "Backpropagation gradient tensor"):
+        assert detect_language(text) == "unknown", text
+
+
+# ----------------------------------------------------------
+# Routing
+# ----------------------------------------------------------
+def test_english_stays_on_the_small_model():
+    assert embed_model_for("en") == EMBED_MODEL
+    assert embed_model_for("unknown") == EMBED_MODEL
+    for language in ("hi", "es", "ja", "ur"):
+        assert embed_model_for(language) == MULTILINGUAL_EMBED_MODEL
+
+
+def test_transcripts_are_indexed_with_their_languages_model():
+    for video_id, transcript, language, model in (
+        ("routed-en", ENGLISH, "en", EMBED_MODEL),
+        ("routed-hi", HINDI, "hi", MULTILINGUAL_EMBED_MODEL),
+    ):
+        del _models_requested[:]
+        vector_store = rag_pipeline.process_transcript(transcript, persist_dir=rag_pipeline.index_dir_for(video_id))
+        assert _models_requested == [model]
+
+        meta = rag_pipeline.read_index_meta(rag_pipeline.index_dir_for(video_id))
+        assert (meta["language"], meta["embed_model"]) == (language, model)
+        assert vector_store._collection.metadata["embed_model"] == model
+
+        # A reopened index embeds queries with the model that built it
+        rag_pipeline._open_indexes.clear()
+        reopened = rag_pipeline.open_index(video_id)
+        assert rag_pipeline._index_model(reopened) == model
+        del _models_requested[:]
+        reopened.similarity_search("what does the network learn?", k=1)
+        assert _models_requested == [model]
+
+
+def test_cross_lingual_questions_search_wider_on_english_indexes():
+    english = rag_pipeline.process_transcript(ENGLISH, persist_dir=rag_pipeline.index_dir_for("wide-en"))
+    hindi = rag_pipeline.process_transcript(HINDI, persist_dir=rag_pipeline.index_dir_for("wide-hi"))
+    hindi_question = "नेटवर्क क्या सीखता है?"
+
+    assert _chunks_in_prompt("What does the network learn?", english) == rag_pipeline.TOP_K_RESULTS
+    assert _chunks_in_prompt(hindi_question, english) == rag_pipeline.TOP_K_RESULTS * rag_pipeline.CROSS_LINGUAL_K_FACTOR
+    # The multilingual model already ranks Hindi questions well
+    assert _chunks_in_prompt(hindi_question, hindi) == rag_pipeline.TOP_K_RESULTS
+
+
+# ----------------------------------------------------------
+# Shared model instances
+# ----------------------------------------------------------
+class _CountingModel:
+    loads = []
+
+    def __init__(self, model_name: str, **kwargs):
+        _CountingModel.loads.append(model_name)
+        self.model_name = model_name
+
+
+def test_each_model_is_loaded_once_and_shared():
+    saved_class = langchain_community.embeddings.HuggingFaceEmbeddings
+    rag_pipeline._load_embeddings.cache_clear()
+    langchain_community.embeddings.HuggingFaceEmbeddings = _CountingModel
+    get_embeddings = _saved[1]     # The real one; setup_module replaced it
+    try:
+        loaded = []
+        threads = [
+            threading.Thread(target=lambda model=model: loaded.append(get_embeddings(model)))
+            for model in [EMBED_MODEL, MULTILINGUAL_EMBED_MODEL] * 4
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        langchain_community.embeddings.HuggingFaceEmbeddings = saved_class
+        rag_pipeline._load_embeddings.cache_clear()
+
+    assert sorted(_CountingModel.loads) == sorted([EMBED_MODEL, MULTILINGUAL_EMBED_MODEL])
+    assert len({id(model) for model in loaded}) == 2
+
+
+def main():
+    tests = [(name, fn) for name, fn in sorted(globals().items()) if name.startswith("test_") and callable(fn)]
+    failed = 0
+    setup_module()
+    try:
+        for name, fn in tests:
+            try:
+                fn()
+                print(f"✅ PASS - {name}")
+            except Exception as e:
+                failed += 1
+                print(f"❌ FAIL - {name}: {type(e).__name__}: {e}")
+    finally:
+        teardown_module()
+
+    print(f"\nTotal: {len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Tests for the LLM gateway against the local fake OpenAI server: 429
+retries with Retry-After, the concurrency cap, streaming and exported
+metrics. No network access or API key is needed. Run directly or with pytest:
+    python test_llm_gateway.py
+    pytest test_llm_gateway.py
+"""
+
+import sys
+import os
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import threading
+import time
+import telemetry
+from fake_llm import fake_completion
+from fake_openai_server import start_fake_server
+from llm_gateway import LLMGateway, LLMGatewayError
+
+PROMPT = "Summarize the video about neural networks."
+
+
+def _gateway(base_url: str, **kwargs) -> LLMGateway:
+    kwargs.setdefault("requests_per_minute", 6000)
+    return LLMGateway(base_url=base_url, model="fake-model", **kwargs)
+
+
+def test_rate_limited_requests_are_retried_after_retry_after():
+    server, state, base_url = start_fake_server(fail_first=2, retry_after=0.2)
+    try:
+        gateway = _gateway(base_url)
+        started = time.monotonic()
+        answer = gateway.invoke(PROMPT)
+        elapsed = time.monotonic() - started
+
+        assert answer == fake_completion(PROMPT)
+        assert state.requests == 3
+        assert elapsed >= 0.4
+        metrics = gateway.metrics()
+        assert metrics["retries_total"] == 2
+        assert metrics["rate_limited_total"] == 2
+        assert metrics["in_flight"] == 0
+    finally:
+        server.shutdown()
+
+
+def test_retry_after_past_the_deadline_fails_right_away():
+    server, state, base_url = start_fake_server(fail_first=1, retry_after=3600)
+    try:
+        gateway = _gateway(base_url, backoff_max=0.2)
+        started = time.monotonic()
+        try:
+            gateway.invoke(PROMPT)
+        except LLMGatewayError:
+            pass
+        else:
+            raise AssertionError("Retried before the server's Retry-After")
+        assert time.monotonic() - started < 1
+        assert state.requests == 1
+    finally:
+        server.shutdown()
+
+
+def test_metrics_are_exported():
+    server, state, base_url = start_fake_server(fail_first=1, retry_after=0.1)
+    try:
+        gateway = LLMGateway(base_url=base_url, model="exported-model", requests_per_minute=6000)
+        gateway.invoke(PROMPT)
+        text = telemetry.render_metrics()
+        assert 'llm_gateway_retries_total{model="exported-model"} 1' in text
+        assert 'llm_gateway_rate_limited_total{model="exported-model"} 1' in text
+        assert 'llm_gateway_queue_depth{model="exported-model"} 0' in text
+        assert 'llm_gateway_in_flight{model="exported-model"} 0' in text
+    finally:
+        server.shutdown()
+
+
+def test_retries_stop_at_the_deadline():
+    server, state, base_url = start_fake_server(fail_first=100, retry_after=10)
+    try:
+        gateway = _gateway(base_url, deadline=1.0)
+        started = time.monotonic()
+        try:
+            gateway.invoke(PROMPT)
+        except LLMGatewayError:
+            pass
+        else:
+            raise AssertionError("Request succeeded despite failing server")
+        assert time.monotonic() - started < 2
+        assert state.requests == 1
+        assert gateway.metrics()["in_flight"] == 0
+    finally:
+        server.shutdown()
+
+
+def test_concurrency_is_capped():
+    server, state, base_url = start_fake_server(latency=0.2)
+    try:
+        gateway = _gateway(base_url, max_concurrency=2)
+        answers = []
+        threads = [
+            threading.Thread(target=lambda i=i: answers.append(gateway.invoke(f"{PROMPT} {i}")))
+            for i in range(6)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(answers) == 6
+        assert state.max_in_flight == 2
+        assert gateway.metrics()["in_flight"] == 0
+    finally:
+        server.shutdown()
+
+
+def test_streaming_yields_the_full_completion():
+    server, state, base_url = start_fake_server()
+    try:
+        gateway = _gateway(base_url)
+        parts = list(gateway.stream(PROMPT))
+        assert len(parts) > 1
+        assert "".join(parts).strip() == fake_completion(PROMPT).strip()
+        assert gateway.metrics()["in_flight"] == 0
+    finally:
+        server.shutdown()
+
+
+def main():
+    tests = [(name, fn) for name, fn in sorted(globals().items()) if name.startswith("test_") and callable(fn)]
+    failed = 0
+    for name, fn in tests:
+        try:
+            fn()
+            print(f"✅ PASS - {name}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ FAIL - {name}: {type(e).__name__}: {e}")
+
+    print(f"\nTotal: {len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
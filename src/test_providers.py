@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Offline tests for transcript provider parsing and fallback behavior.
+
+Replays recorded provider traffic from fixtures/http, so no network access
+is needed. Run directly or with pytest:
+    python test_providers.py
+    pytest test_providers.py
+"""
+
+import sys
+import os
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import json
+import utils
+from utils import (
+    get_transcript,
+    parse_caption_tracks,
+    parse_library_entries,
+    parse_service_transcript,
+    parse_timedtext_xml,
+    select_caption_url,
+    _fetch_direct_from_youtube,
+    _fetch_from_youtube_transcript_api_service,
+)
+from http_replay import CASSETTE_DIR, Cassette, replaying
+
+VIDEO_ID = "aircAruvnKk"
+
+# Providers that only use the pluggable transport (the library provider
+# makes its own requests)
+OFFLINE_PROVIDERS = [_fetch_from_youtube_transcript_api_service, _fetch_direct_from_youtube]
+
+_saved_delays = None
+
+
+def setup_module(module=None):
+    """No real sleeping between providers in tests."""
+    global _saved_delays
+    _saved_delays = (utils.PROVIDER_DELAY, utils.CAPTION_DELAY)
+    utils.PROVIDER_DELAY = 0
+    utils.CAPTION_DELAY = 0
+
+
+def teardown_module(module=None):
+    utils.PROVIDER_DELAY, utils.CAPTION_DELAY = _saved_delays
+
+
+def _recorded_body(cassette: str, url_part: str) -> str:
+    """Body of the first recorded response whose URL contains url_part."""
+    for interaction in Cassette(os.path.join(CASSETTE_DIR, f"{cassette}.json")).interactions:
+        if url_part in interaction["request"]["url"]:
+            return interaction["response"]["body"]
+    raise KeyError(url_part)
+
+
+# ----------------------------------------------------------
+# Parsing (pure functions)
+# ----------------------------------------------------------
+def test_parse_service_list():
+    text = parse_service_transcript(json.loads(_recorded_body("service_list", "onrender")))
+    assert text.startswith("Welcome back everyone.")
+    assert "  " not in text
+
+
+def test_parse_service_snippet_and_text():
+    snippet = parse_service_transcript(json.loads(_recorded_body("service_snippet", "vercel")))
+    plain = parse_service_transcript(json.loads(_recorded_body("service_text", "onrender")))
+    assert snippet == plain
+
+
+def test_parse_service_unusable():
+    assert parse_service_transcript({"error": "not found"}) is None
+    assert parse_service_transcript({"text": ""}) is None
+    assert parse_service_transcript([]) is None
+
+
+def test_parse_library_entries():
+    with open(os.path.join(CASSETTE_DIR, "library_entries.json"), encoding="utf-8") as f:
+        entries = json.load(f)
+    assert parse_library_entries(entries).startswith("Welcome back everyone.")
+    assert parse_library_entries([{"text": " "}, {"start": 1.0}]) is None
+
+
+def test_parse_caption_tracks_and_select_english():
+    tracks = parse_caption_tracks(_recorded_body("direct_timedtext", "youtube.com/watch"))
+    assert [t["languageCode"] for t in tracks] == ["hi", "en"]
+    assert select_caption_url(tracks).endswith("&lang=en")
+    assert select_caption_url(tracks, language="fr").endswith("&lang=hi&kind=asr")
+    assert parse_caption_tracks(_recorded_body("direct_no_captions", "youtube.com/watch")) is None
+
+
+def test_parse_timedtext_xml_unescapes_entities():
+    text = parse_timedtext_xml(_recorded_body("direct_timedtext", "timedtext"))
+    assert text.endswith('[Music] &amp; "thanks"')
+    assert "<text" not in text
+    assert parse_timedtext_xml("<transcript></transcript>") is None
+
+
+# ----------------------------------------------------------
+# Fetching and fallback (replayed traffic)
+# ----------------------------------------------------------
+def test_service_first_success():
+    with replaying("service_list", realtime=False) as transport:
+        transcript, lang = get_transcript(VIDEO_ID, providers=OFFLINE_PROVIDERS)
+    assert transcript.startswith("Welcome back everyone.") and lang == "en"
+    assert len(transport.calls) == 1
+
+
+def test_service_falls_back_to_second_service():
+    with replaying("service_snippet", realtime=False) as transport:
+        transcript, _ = get_transcript(VIDEO_ID, providers=OFFLINE_PROVIDERS)
+    assert transcript
+    assert [call["outcome"] for call in transport.calls] == [502, 200]
+
+
+def test_falls_back_to_direct_captions():
+    with replaying("direct_timedtext", realtime=False) as transport:
+        transcript, _ = get_transcript(VIDEO_ID, providers=OFFLINE_PROVIDERS)
+    assert transcript.startswith("Welcome back everyone.")
+    assert [call["outcome"] for call in transport.calls] == [503, 503, 200, 200]
+
+
+def test_all_providers_fail():
+    with replaying("direct_no_captions", realtime=False):
+        assert get_transcript(VIDEO_ID, providers=OFFLINE_PROVIDERS) == (None, None)
+
+
+def test_slow_provider_times_out_and_falls_back():
+    # onrender answers in 30s, past the 10s timeout; vercel has no recording
+    with replaying("service_list", latency={"onrender": 30.0}, realtime=False) as transport:
+        transcript, _ = get_transcript(VIDEO_ID, providers=OFFLINE_PROVIDERS)
+    assert transcript is None
+    assert transport.calls[0]["outcome"] == "timeout"
+    assert transport.simulated_seconds == utils.PROVIDER_TIMEOUT
+
+
+def test_latency_within_timeout_is_accumulated():
+    with replaying("direct_timedtext", latency={"youtube.com": 1.5}, realtime=False) as transport:
+        transcript, _ = get_transcript(VIDEO_ID, providers=OFFLINE_PROVIDERS)
+    assert transcript
+    assert transport.simulated_seconds == 3.0  # Watch page + timedtext
+
+
+def test_injected_failures():
+    with replaying("direct_timedtext", failures={"youtube.com/watch": "connection"}, realtime=False):
+        assert get_transcript(VIDEO_ID, providers=OFFLINE_PROVIDERS) == (None, None)
+    with replaying("service_list", failures={"onrender": 429}, realtime=False) as transport:
+        assert get_transcript(VIDEO_ID, providers=OFFLINE_PROVIDERS) == (None, None)
+    assert transport.calls[0]["outcome"] == 429
+
+
+def main():
+    tests = [(name, fn) for name, fn in sorted(globals().items()) if name.startswith("test_") and callable(fn)]
+    failed = 0
+    setup_module()
+    try:
+        for name, fn in tests:
+            try:
+                fn()
+                print(f"✅ PASS - {name}")
+            except Exception as e:
+                failed += 1
+                print(f"❌ FAIL - {name}: {type(e).__name__}: {e}")
+    finally:
+        teardown_module()
+
+    print(f"\nTotal: {len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
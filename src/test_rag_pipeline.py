@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Tests for the RAG pipeline: which questions are answered from the
+precomputed summary and which go through retrieval, and the open-index
+cache. Uses deterministic fake embeddings and the fake LLM, so no model download
+or network access is needed. Run directly or with pytest:
+    python test_rag_pipeline.py
+    pytest test_rag_pipeline.py
+"""
+
+import sys
+import os
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import gc
+import shutil
+import tempfile
+from langchain_core.embeddings import DeterministicFakeEmbedding
+import rag_pipeline
+import summarizer
+from fake_llm import FakeLLM
+
+EMBEDDINGS = DeterministicFakeEmbedding(size=16)
+TRANSCRIPT = " ".join(f"Step {i} of training adjusts the weights by backpropagation of error {i}." for i in range(300))
+STORED_SUMMARY = "WHOLE VIDEO SUMMARY"
+
+_saved = None
+_root = None
+
+
+def setup_module(module=None):
+    """Build indexes under a temporary root with fake embeddings."""
+    global _saved, _root
+    _saved = (rag_pipeline.INDEX_ROOT, rag_pipeline.get_embeddings, summarizer.CACHE_ROOT)
+    _root = tempfile.mkdtemp(prefix="rag_pipeline_")
+    rag_pipeline.INDEX_ROOT = os.path.join(_root, "indexes")
+    rag_pipeline.get_embeddings = lambda model_name=rag_pipeline.EMBED_MODEL: EMBEDDINGS
+    summarizer.CACHE_ROOT = os.path.join(_root, "summary_cache")
+
+
+def teardown_module(module=None):
+    rag_pipeline.INDEX_ROOT, rag_pipeline.get_embeddings, summarizer.CACHE_ROOT = _saved
+    rag_pipeline._open_indexes.clear()
+    shutil.rmtree(_root, ignore_errors=True)
+
+
+def _index_with_summary(video_id: str):
+    """An index whose stored summary is STORED_SUMMARY."""
+    persist_dir = rag_pipeline.index_dir_for(video_id)
+    vector_store = rag_pipeline.process_transcript(TRANSCRIPT, persist_dir=persist_dir, language="en")
+    with open(os.path.join(persist_dir, rag_pipeline.SUMMARY_FILE), "w", encoding="utf-8") as f:
+        f.write(STORED_SUMMARY)
+    return vector_store
+
+
+# ----------------------------------------------------------
+# Summary intent
+# ----------------------------------------------------------
+def test_specific_questions_are_not_answered_with_the_stored_summary():
+    vector_store = _index_with_summary("summary-false-positives")
+    for question in (
+        "Can you briefly explain backpropagation?",
+        "बैकप्रोपेगेशन के बारे में क्या कहा गया?",
+        "What is the main topic of step 12?",
+        "What does the video say about the brief pause in training?",
+    ):
+        answer = rag_pipeline.get_answer(question, vector_store, FakeLLM())
+        assert answer != STORED_SUMMARY, question
+        assert answer.startswith("Fake answer"), answer
+
+
+def test_whole_video_summary_requests_use_the_stored_summary():
+    vector_store = _index_with_summary("summary-true-positives")
+    llm = FakeLLM()
+    for question in (
+        "Summarize the video",
+        "Can you summarize this video?",
+        "Give me a brief summary of the video.",
+        "What is this video about?",
+        "वीडियो का सारांश",
+        "यह वीडियो किस बारे में है?",
+    ):
+        assert rag_pipeline.get_answer(question, vector_store, llm) == STORED_SUMMARY, question
+    assert llm.calls == 0
+
+
+def test_summary_keywords_match_whole_words():
+    assert rag_pipeline._is_summary_request("Give me an overview of the results")
+    assert rag_pipeline._is_summary_request("मुख्य बिंदु क्या हैं?")
+    assert not rag_pipeline._is_summary_request("Can you briefly explain backpropagation?")
+    assert not rag_pipeline._is_summary_request("What was the debriefing about?")
+
+
+# ----------------------------------------------------------
+# Position and section intent
+# ----------------------------------------------------------
+def test_summary_of_a_part_of_the_video_uses_its_sections():
+    vector_store = _index_with_summary("summary-of-a-part")
+    rag_pipeline.queue_summary(vector_store, FakeLLM()).result()  # Builds the summary tree
+    tree = rag_pipeline.open_summary_tree(vector_store).get(where={"level": "section"})
+    sections = len(tree["ids"])
+    assert sections >= 2
+
+    direct_answer, prompt = rag_pipeline._prepare_answer("Summarize the second half of the video", vector_store)
+    assert direct_answer is None
+    assert f"[Section {sections}," in prompt
+    assert "[Section 1," not in prompt
+    assert "[Chunk" not in prompt
+
+    direct_answer, prompt = rag_pipeline._prepare_answer("Give me a summary of section 2", vector_store)
+    assert direct_answer is None and "[Section 2," in prompt
+
+    answer = rag_pipeline.get_answer("Summarize the end of the video", vector_store, FakeLLM())
+    assert answer.startswith("Fake answer"), answer
+
+
+# ----------------------------------------------------------
+# Open-index cache
+# ----------------------------------------------------------
+def test_evicted_index_keeps_working_until_its_users_are_done():
+    saved_max = rag_pipeline.MAX_OPEN_INDEXES
+    try:
+        rag_pipeline.MAX_OPEN_INDEXES = 1
+        for video_id in ("evict-a", "evict-b"):
+            rag_pipeline.process_transcript(TRANSCRIPT, persist_dir=rag_pipeline.index_dir_for(video_id), language="en")
+        rag_pipeline._open_indexes.clear()
+
+        in_use = rag_pipeline.open_index("evict-a")
+        rag_pipeline.open_index("evict-b")  # Evicts evict-a
+        assert list(rag_pipeline._open_indexes) == [rag_pipeline.index_dir_for("evict-b")]
+        assert len(in_use.similarity_search("weights", k=2)) == 2
+
+        key = os.path.abspath(rag_pipeline.index_dir_for("evict-a"))
+        finalizers = list(rag_pipeline._local_clients[key])
+        assert any(finalizer.alive for finalizer in finalizers)
+        del in_use
+        gc.collect()
+        assert not any(finalizer.alive for finalizer in finalizers)
+
+        # Reopened on next use
+        assert len(rag_pipeline.open_index("evict-a").similarity_search("weights", k=2)) == 2
+    finally:
+        rag_pipeline.MAX_OPEN_INDEXES = saved_max
+
+
+def main():
+    tests = [(name, fn) for name, fn in sorted(globals().items()) if name.startswith("test_") and callable(fn)]
+    failed = 0
+    setup_module()
+    try:
+        for name, fn in tests:
+            try:
+                fn()
+                print(f"✅ PASS - {name}")
+            except Exception as e:
+                failed += 1
+                print(f"❌ FAIL - {name}: {type(e).__name__}: {e}")
+    finally:
+        teardown_module()
+
+    print(f"\nTotal: {len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
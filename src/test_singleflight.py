@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Tests for in-flight request coalescing with FakeLLM: concurrent callers
+share one LLM call, late stream subscribers replay earlier chunks, errors
+reach every subscriber, abandoned streams release their key, and blocking
+and streaming callers share flights. Run directly or with pytest:
+    python test_singleflight.py
+    pytest test_singleflight.py
+"""
+
+import sys
+import os
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from fake_llm import FakeLLM, fake_completion
+from singleflight import SingleFlight
+
+PROMPT = "Context: a test video\n\nQuestion: What is shared?"
+TIMEOUT = 10
+
+
+def _wait_for(condition, timeout: float = TIMEOUT):
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            raise AssertionError("Timed out waiting for condition")
+        time.sleep(0.005)
+
+
+def _subscribers(flights: SingleFlight, key) -> int:
+    flight = flights._flights.get(key)
+    return flight.subscribers if flight else 0
+
+
+def _gated_stream(llm: FakeLLM, gate: threading.Event, after: int = 3, error: BaseException = None, closed=None):
+    """Stream llm's answer, pausing after `after` chunks until the gate opens."""
+    def generate():
+        try:
+            for i, chunk in enumerate(llm.stream(PROMPT)):
+                if i == after:
+                    gate.wait(TIMEOUT)
+                    if error is not None:
+                        raise error
+                yield chunk
+        finally:
+            if closed is not None:
+                closed.set()
+    return generate
+
+
+# ----------------------------------------------------------
+# Blocking calls
+# ----------------------------------------------------------
+def test_concurrent_calls_run_fn_once():
+    flights = SingleFlight("test")
+    llm = FakeLLM()
+    gate = threading.Event()
+    callers = 8
+
+    def fn():
+        gate.wait(TIMEOUT)
+        return llm.invoke(PROMPT)
+
+    with ThreadPoolExecutor(max_workers=callers) as executor:
+        futures = [executor.submit(flights.call, "key", fn) for _ in range(callers)]
+        _wait_for(lambda: _subscribers(flights, "key") == callers)
+        gate.set()
+        results = [future.result(TIMEOUT) for future in futures]
+
+    assert llm.calls == 1
+    assert results == [fake_completion(PROMPT)] * callers
+    assert flights.in_flight() == 0
+
+    # The key is released: the next call runs fn again
+    gate.set()
+    assert flights.call("key", fn) == fake_completion(PROMPT)
+    assert llm.calls == 2
+
+
+def test_call_error_reaches_every_caller():
+    flights = SingleFlight("test")
+    gate = threading.Event()
+
+    def fn():
+        gate.wait(TIMEOUT)
+        raise RuntimeError("LLM unavailable")
+
+    def call():
+        try:
+            flights.call("key", fn)
+        except RuntimeError as e:
+            return str(e)
+        return None
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(call) for _ in range(4)]
+        _wait_for(lambda: _subscribers(flights, "key") == 4)
+        gate.set()
+        assert [future.result(TIMEOUT) for future in futures] == ["LLM unavailable"] * 4
+    assert flights.in_flight() == 0
+
+
+# ----------------------------------------------------------
+# Streams
+# ----------------------------------------------------------
+def test_late_stream_subscriber_gets_every_earlier_chunk():
+    flights = SingleFlight("test")
+    llm = FakeLLM()
+    gate = threading.Event()
+    fn = _gated_stream(llm, gate)
+
+    first = flights.stream("key", fn)
+    early = [next(first) for _ in range(3)]
+
+    late = flights.stream("key", fn)
+    late_chunks = [next(late)]          # Joins the running flight
+    assert _subscribers(flights, "key") == 2
+    gate.set()
+    late_chunks.extend(late)
+    first_chunks = early + list(first)
+
+    assert llm.calls == 1
+    assert "".join(first_chunks) == "".join(late_chunks) == fake_completion(PROMPT)
+    assert late_chunks == first_chunks
+    assert flights.in_flight() == 0
+
+
+def test_stream_error_reaches_every_subscriber():
+    flights = SingleFlight("test")
+    llm = FakeLLM()
+    gate = threading.Event()
+    fn = _gated_stream(llm, gate, after=2, error=RuntimeError("stream broke"))
+
+    def consume(stream, received):
+        try:
+            for chunk in stream:
+                received.append(chunk)
+        except RuntimeError as e:
+            return str(e)
+        return None
+
+    streams = [flights.stream("key", fn) for _ in range(3)]
+    received = [[] for _ in streams]
+    with ThreadPoolExecutor(max_workers=len(streams)) as executor:
+        futures = [executor.submit(consume, stream, chunks) for stream, chunks in zip(streams, received)]
+        _wait_for(lambda: _subscribers(flights, "key") == len(streams))
+        gate.set()
+        errors = [future.result(TIMEOUT) for future in futures]
+
+    assert errors == ["stream broke"] * len(streams)
+    assert all(len(chunks) == 2 for chunks in received)
+    assert llm.calls == 1
+    assert flights.in_flight() == 0
+
+
+def test_abandoned_stream_releases_its_key_and_stops_the_producer():
+    flights = SingleFlight("test")
+    llm = FakeLLM()
+    gate = threading.Event()
+    closed = threading.Event()
+
+    stream = flights.stream("key", _gated_stream(llm, gate, after=1, closed=closed))
+    next(stream)
+    stream.close()
+    assert flights.in_flight() == 0
+
+    gate.set()
+    assert closed.wait(TIMEOUT), "producer kept running after every subscriber left"
+
+    # A new subscriber starts a fresh run instead of joining the dead one
+    assert "".join(flights.stream("key", _gated_stream(llm, gate))) == fake_completion(PROMPT)
+    assert llm.calls == 2
+
+
+# ----------------------------------------------------------
+# Mixed blocking and streaming callers
+# ----------------------------------------------------------
+def test_blocking_call_joins_a_running_stream():
+    flights = SingleFlight("test")
+    llm = FakeLLM()
+    gate = threading.Event()
+
+    stream = flights.stream("key", _gated_stream(llm, gate))
+    first = next(stream)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        blocking = executor.submit(flights.call, "key", lambda: llm.invoke(PROMPT))
+        _wait_for(lambda: _subscribers(flights, "key") == 2)
+        gate.set()
+        streamed = first + "".join(stream)
+        assert blocking.result(TIMEOUT) == streamed == fake_completion(PROMPT)
+    assert llm.calls == 1
+
+
+def test_stream_joins_a_running_blocking_call():
+    flights = SingleFlight("test")
+    llm = FakeLLM()
+    gate = threading.Event()
+
+    def fn():
+        gate.wait(TIMEOUT)
+        return llm.invoke(PROMPT)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        blocking = executor.submit(flights.call, "key", fn)
+        _wait_for(lambda: flights.in_flight() == 1)
+        streamed = executor.submit(lambda: list(flights.stream("key", _gated_stream(llm, gate))))
+        _wait_for(lambda: _subscribers(flights, "key") == 2)
+        gate.set()
+        assert "".join(streamed.result(TIMEOUT)) == blocking.result(TIMEOUT) == fake_completion(PROMPT)
+    assert llm.calls == 1
+    assert flights.in_flight() == 0
+
+
+def main():
+    tests = [(name, fn) for name, fn in sorted(globals().items()) if name.startswith("test_") and callable(fn)]
+    failed = 0
+    for name, fn in tests:
+        try:
+            fn()
+            print(f"✅ PASS - {name}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ FAIL - {name}: {type(e).__name__}: {e}")
+
+    print(f"\nTotal: {len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
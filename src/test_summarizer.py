@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Tests for the map-reduce summarizer with FakeLLM: the number of map and
+reduce calls, the concurrency cap, and the per-video cache of
+intermediate summaries. Runs offline. Run directly or with pytest:
+    python test_summarizer.py
+    pytest test_summarizer.py
+"""
+
+import sys
+import os
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import shutil
+import tempfile
+import threading
+from fake_llm import FakeLLM
+from summarizer import map_reduce_summary
+from utils import llm_model_name
+
+CHUNKS = [f"Chunk {i} explains step {i} of the recipe." for i in range(45)]
+# 45 chunks in groups of 5: 9 map calls, then 9 -> 3 -> 1 with a fan-in of 3
+OPTIONS = {"group_size": 5, "fan_in": 3}
+MAP_CALLS = 9
+REDUCE_CALLS = 4
+
+_root = None
+
+
+class CountingLLM(FakeLLM):
+    """FakeLLM that counts map and reduce calls and the most run at once."""
+
+    def __init__(self, **kwargs):
+        super().__init__(latency=0.02, **kwargs)
+        self.map_calls = 0
+        self.reduce_calls = 0
+        self.active = 0
+        self.max_active = 0
+        self._counts_lock = threading.Lock()
+
+    async def ainvoke(self, prompt: str) -> str:
+        with self._counts_lock:
+            if prompt.startswith("Summarize this part"):
+                self.map_calls += 1
+            else:
+                self.reduce_calls += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            return await super().ainvoke(prompt)
+        finally:
+            with self._counts_lock:
+                self.active -= 1
+
+
+def setup_module(module=None):
+    global _root
+    _root = tempfile.mkdtemp(prefix="summarizer_")
+
+
+def teardown_module(module=None):
+    shutil.rmtree(_root, ignore_errors=True)
+
+
+def _cache_dir(name: str) -> str:
+    return os.path.join(_root, name)
+
+
+# ----------------------------------------------------------
+# Map and reduce calls
+# ----------------------------------------------------------
+def test_map_and_reduce_call_counts():
+    llm = CountingLLM()
+    sections, summary = map_reduce_summary(CHUNKS, llm, cache_dir=None, **OPTIONS)
+
+    assert len(sections) == MAP_CALLS
+    assert llm.map_calls == MAP_CALLS
+    assert llm.reduce_calls == REDUCE_CALLS
+    assert summary.startswith("Fake answer")
+
+
+def test_concurrent_calls_stay_under_the_cap():
+    llm = CountingLLM()
+    map_reduce_summary(CHUNKS, llm, cache_dir=None, max_concurrency=3, **OPTIONS)
+    assert llm.max_active == 3       # The 9 map calls overlap, but never more than 3 at once
+
+    llm = CountingLLM()
+    map_reduce_summary(CHUNKS, llm, cache_dir=None, max_concurrency=1, **OPTIONS)
+    assert llm.max_active == 1
+
+
+def test_single_group_needs_no_reduce():
+    llm = CountingLLM()
+    sections, summary = map_reduce_summary(CHUNKS[:3], llm, cache_dir=None, **OPTIONS)
+    assert llm.map_calls == 1 and llm.reduce_calls == 0
+    assert sections == [summary]
+
+
+# ----------------------------------------------------------
+# Cache of intermediate summaries
+# ----------------------------------------------------------
+def test_second_run_hits_the_cache():
+    cache_dir = _cache_dir("repeat")
+    first = map_reduce_summary(CHUNKS, CountingLLM(), cache_dir=cache_dir, **OPTIONS)
+
+    llm = CountingLLM()
+    assert map_reduce_summary(CHUNKS, llm, cache_dir=cache_dir, **OPTIONS) == first
+    assert llm.calls == 0
+
+
+def test_changed_chunk_only_redoes_its_path():
+    cache_dir = _cache_dir("changed")
+    map_reduce_summary(CHUNKS, CountingLLM(), cache_dir=cache_dir, **OPTIONS)
+
+    changed = list(CHUNKS)
+    changed[7] = "Chunk 7 now explains something else."
+    llm = CountingLLM()
+    map_reduce_summary(changed, llm, cache_dir=cache_dir, **OPTIONS)
+    assert llm.map_calls == 1       # Only the group holding chunk 7
+    assert llm.reduce_calls == 2    # Its reduce batch, then the root
+
+
+def test_cache_is_per_video_and_per_model():
+    map_reduce_summary(CHUNKS, CountingLLM(), cache_dir=_cache_dir("video-a"), **OPTIONS)
+
+    other_video = CountingLLM()
+    map_reduce_summary(CHUNKS, other_video, cache_dir=_cache_dir("video-b"), **OPTIONS)
+    assert other_video.calls == MAP_CALLS + REDUCE_CALLS
+
+    other_model = CountingLLM(model="other-model")
+    map_reduce_summary(CHUNKS, other_model, cache_dir=_cache_dir("video-a"), **OPTIONS)
+    assert other_model.calls == MAP_CALLS + REDUCE_CALLS
+
+
+def test_model_name_of_llm_clients():
+    assert llm_model_name(FakeLLM(model="gpt-test")) == "gpt-test"
+
+    class NamedByModelName:
+        model_name = "legacy-model"
+
+    assert llm_model_name(NamedByModelName()) == "legacy-model"
+    assert llm_model_name(object()) == "object"
+
+
+def main():
+    tests = [(name, fn) for name, fn in sorted(globals().items()) if name.startswith("test_") and callable(fn)]
+    failed = 0
+    setup_module()
+    try:
+        for name, fn in tests:
+            try:
+                fn()
+                print(f"✅ PASS - {name}")
+            except Exception as e:
+                failed += 1
+                print(f"❌ FAIL - {name}: {type(e).__name__}: {e}")
+    finally:
+        teardown_module()
+
+    print(f"\nTotal: {len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
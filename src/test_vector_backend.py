@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Tests for the vector store backends, with the index server running on
+localhost. Uses deterministic fake embeddings, so no model download or
+network access is needed. Run directly or with pytest:
+    python test_vector_backend.py
+    pytest test_vector_backend.py
+"""
+
+import sys
+import os
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import shutil
+import tempfile
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+import index_server
+import rag_pipeline
+import vector_backend
+from fake_llm import FakeLLM
+from vector_backend import BackendStore, LocalBackend, RemoteBackend
+
+EMBEDDINGS = DeterministicFakeEmbedding(size=16)
+TEXTS = [f"Sentence {i} is about topic {i % 5}." for i in range(40)]
+COLLECTION = "test-video/langchain"
+
+_server = None
+_server_root = None
+
+
+def _remote() -> RemoteBackend:
+    """Client for an index server shared by all tests in this module."""
+    global _server, _server_root
+    if _server is None:
+        _server_root = tempfile.mkdtemp(prefix="index_server_")
+        _server = index_server.serve_in_background(_server_root)
+    return RemoteBackend(f"http://127.0.0.1:{_server.server_address[1]}")
+
+
+def _fill(backend, collection: str = COLLECTION):
+    backend.delete_collection(collection)
+    backend.add(
+        collection,
+        ids=[f"chunk-{i}" for i in range(len(TEXTS))],
+        embeddings=EMBEDDINGS.embed_documents(TEXTS),
+        documents=TEXTS,
+        metadatas=[{"chunk_id": i, "topic": i % 5} for i in range(len(TEXTS))],
+    )
+
+
+# ----------------------------------------------------------
+# Backend protocol
+# ----------------------------------------------------------
+def test_local_and_remote_return_the_same_hits():
+    local_root = tempfile.mkdtemp(prefix="local_backend_")
+    try:
+        local = LocalBackend(local_root)
+        remote = _remote()
+        _fill(local)
+        _fill(remote)
+
+        queries = EMBEDDINGS.embed_documents([TEXTS[3], TEXTS[17]])
+        local_hits = local.query(COLLECTION, queries, k=4)
+        remote_hits = remote.query(COLLECTION, queries, k=4)
+        assert [[hit["id"] for hit in hits] for hits in local_hits] == [[hit["id"] for hit in hits] for hits in remote_hits]
+        assert remote_hits[0][0]["id"] == "chunk-3"
+        assert remote_hits[0][0]["document"] == TEXTS[3]
+        assert remote_hits[0][0]["distance"] <= remote_hits[0][1]["distance"]
+    finally:
+        shutil.rmtree(local_root, ignore_errors=True)
+
+
+def test_get_by_id_filter_and_count():
+    remote = _remote()
+    _fill(remote)
+    assert remote.count(COLLECTION) == len(TEXTS)
+
+    found = remote.get(COLLECTION, ids=["chunk-5", "chunk-7"])
+    assert sorted(found["ids"]) == ["chunk-5", "chunk-7"]
+    assert {meta["chunk_id"] for meta in found["metadatas"]} == {5, 7}
+
+    filtered = remote.get(COLLECTION, where={"topic": 2}, include=["metadatas", "embeddings"])
+    assert len(filtered["ids"]) == len(TEXTS) // 5
+    assert len(filtered["embeddings"][0]) == EMBEDDINGS.size
+
+    hits = remote.query(COLLECTION, EMBEDDINGS.embed_documents([TEXTS[2]]), k=3, where={"topic": 2})[0]
+    assert all(hit["metadata"]["topic"] == 2 for hit in hits)
+
+
+def test_delete_collection():
+    remote = _remote()
+    _fill(remote, "to-delete/langchain")
+    remote.delete_collection("to-delete/langchain")
+    assert remote.count("to-delete/langchain") == 0
+    remote.delete_collection("never-created/langchain")  # No error
+
+
+def test_batched_queries_use_few_requests():
+    remote = _remote()
+    _fill(remote)
+    before = dict(_server.stats)
+
+    queries = EMBEDDINGS.embed_documents(TEXTS)
+    hits = remote.query(COLLECTION, queries, k=2)
+
+    assert len(hits) == len(TEXTS)
+    assert [hits_for_query[0]["id"] for hits_for_query in hits] == [f"chunk-{i}" for i in range(len(TEXTS))]
+    expected_requests = -(-len(TEXTS) // vector_backend.QUERY_BATCH_SIZE)
+    assert _server.stats["requests"] - before["requests"] == expected_requests
+    assert _server.stats["query_vectors"] - before["query_vectors"] == len(TEXTS)
+
+
+def test_connections_are_pooled():
+    remote = _remote()
+    remote.count(COLLECTION)  # Open a connection
+    before = dict(_server.stats)
+    for _ in range(10):
+        remote.count(COLLECTION)
+    assert _server.stats["requests"] - before["requests"] == 10
+    assert _server.stats["connections"] == before["connections"]
+
+
+def test_invalid_requests_are_rejected():
+    remote = _remote()
+    for collection in ("../escape/langchain", "bad name/langchain"):
+        try:
+            remote.count(collection)
+        except RuntimeError as e:
+            assert "400" in str(e)
+        else:
+            raise AssertionError(f"{collection!r} was accepted")
+
+
+# ----------------------------------------------------------
+# Pipeline over the remote backend
+# ----------------------------------------------------------
+def test_pipeline_ingests_and_answers_through_the_index_server():
+    remote = _remote()
+    saved = (vector_backend.VECTOR_BACKEND, vector_backend._backend, rag_pipeline.INDEX_ROOT, rag_pipeline.get_embeddings)
+    index_root = tempfile.mkdtemp(prefix="remote_indexes_")
+    try:
+        vector_backend.VECTOR_BACKEND = "remote"
+        vector_backend._backend = remote
+        rag_pipeline.INDEX_ROOT = index_root
+        rag_pipeline.get_embeddings = lambda model_name=rag_pipeline.EMBED_MODEL: EMBEDDINGS
+
+        transcript = " ".join(TEXTS * 10)
+        rag_pipeline.process_transcript(transcript, persist_dir=rag_pipeline.index_dir_for("remote-video"))
+        assert remote.count("remote-video/langchain") > 0
+
+        # A fresh replica only needs the index metadata and the server
+        rag_pipeline._open_indexes.clear()
+        vector_store = rag_pipeline.open_index("remote-video")
+        assert isinstance(vector_store, BackendStore)
+        docs = vector_store.as_retriever(search_kwargs={"k": 3}).invoke("topic 3")
+        assert len(docs) == 3 and "chunk_id" in docs[0].metadata
+
+        answer = rag_pipeline.get_answer("What is sentence 12 about?", vector_store, FakeLLM())
+        assert answer and not answer.startswith("An error occurred")
+
+        rag_pipeline.clear_vector_store(rag_pipeline.index_dir_for("remote-video"))
+        assert remote.count("remote-video/langchain") == 0
+    finally:
+        vector_backend.VECTOR_BACKEND, vector_backend._backend, rag_pipeline.INDEX_ROOT, rag_pipeline.get_embeddings = saved
+        rag_pipeline._open_indexes.clear()
+        shutil.rmtree(index_root, ignore_errors=True)
+
+
+def test_local_index_can_be_rebuilt_in_place():
+    saved = (rag_pipeline.INDEX_ROOT, rag_pipeline.get_embeddings)
+    index_root = tempfile.mkdtemp(prefix="local_indexes_")
+    try:
+        rag_pipeline.INDEX_ROOT = index_root
+        rag_pipeline.get_embeddings = lambda model_name=rag_pipeline.EMBED_MODEL: EMBEDDINGS
+        persist_dir = rag_pipeline.index_dir_for("rebuilt-video")
+
+        rag_pipeline.process_transcript(" ".join(TEXTS * 10), persist_dir=persist_dir)
+        assert rag_pipeline.open_index("rebuilt-video")._collection.count() > 0
+
+        # The first index is still open in this process while it is replaced
+        rag_pipeline.process_transcript(" ".join(TEXTS * 5), persist_dir=persist_dir)
+        vector_store = rag_pipeline.open_index("rebuilt-video")
+        assert len(vector_store.similarity_search("topic 3", k=2)) == 2
+    finally:
+        rag_pipeline.INDEX_ROOT, rag_pipeline.get_embeddings = saved
+        rag_pipeline._open_indexes.clear()
+        shutil.rmtree(index_root, ignore_errors=True)
+
+
+# ----------------------------------------------------------
+# Questions across several videos
+# ----------------------------------------------------------
+def _hits(label: str, scores) -> list:
+    return [(score, Document(page_content=f"{label} chunk {i}", metadata={"chunk_id": i})) for i, score in enumerate(scores)]
+
+
+def test_merged_hits_keep_per_video_quotas():
+    hits = {
+        "loud": _hits("loud", [0.99, 0.98, 0.97, 0.96, 0.95, 0.94]),
+        "quiet": _hits("quiet", [0.30, 0.20]),
+    }
+    merged = rag_pipeline.merge_video_hits(hits, k=5, min_per_video=1, max_per_video=3)
+
+    labels = [label for label, _, _ in merged]
+    assert labels.count("loud") == 3          # Capped, though its 4th chunk outscores "quiet"
+    assert labels.count("quiet") == 2
+    assert [score for _, score, _ in merged] == sorted((score for _, score, _ in merged), reverse=True)
+
+    # The floor keeps each video's best chunk even when the others fill k
+    merged = rag_pipeline.merge_video_hits(hits, k=2, min_per_video=1, max_per_video=3)
+    assert [(label, doc.metadata["chunk_id"]) for label, _, doc in merged] == [("loud", 0), ("quiet", 0)]
+
+    # Chunks that don't fit the token budget are skipped
+    merged = rag_pipeline.merge_video_hits(hits, k=5, min_per_video=1, max_per_video=3, max_tokens=4)
+    assert len(merged) == 1
+
+
+def _ask_two_videos():
+    """Index two videos, then check a question across both is routed to each and merged."""
+    first = rag_pipeline.process_transcript(
+        " ".join(TEXTS * 10), persist_dir=rag_pipeline.index_dir_for("multi-first"), language="en"
+    )
+    second = rag_pipeline.process_transcript(
+        " ".join(f"Paragraph {i} covers subject {i % 3}." for i in range(400)),
+        persist_dir=rag_pipeline.index_dir_for("multi-second"),
+        language="en",
+    )
+
+    direct_answer, prompt = rag_pipeline._prepare_answer("Which sentence covers topic 3?", [first, second])
+    assert direct_answer is None
+    chunk_labels = [line.split(" |")[0] for line in prompt.splitlines() if line.startswith("[Video ")]
+    for label in ("[Video multi-first", "[Video multi-second"):
+        assert 1 <= chunk_labels.count(label) <= rag_pipeline.MULTI_VIDEO_MAX_PER_VIDEO
+    assert len(chunk_labels) <= rag_pipeline.MULTI_VIDEO_TOP_K
+
+    llm = FakeLLM()
+    answer = rag_pipeline.get_answer("Which sentence covers topic 3?", [first, second], llm)
+    assert answer.startswith("Fake answer") and llm.calls == 1
+
+
+def test_question_across_local_indexes():
+    saved = (rag_pipeline.INDEX_ROOT, rag_pipeline.get_embeddings)
+    index_root = tempfile.mkdtemp(prefix="multi_local_")
+    try:
+        rag_pipeline.INDEX_ROOT = index_root
+        rag_pipeline.get_embeddings = lambda model_name=rag_pipeline.EMBED_MODEL: EMBEDDINGS
+        _ask_two_videos()
+    finally:
+        rag_pipeline.INDEX_ROOT, rag_pipeline.get_embeddings = saved
+        rag_pipeline._open_indexes.clear()
+        shutil.rmtree(index_root, ignore_errors=True)
+
+
+def test_question_across_index_server_collections():
+    remote = _remote()
+    saved = (vector_backend.VECTOR_BACKEND, vector_backend._backend, rag_pipeline.INDEX_ROOT, rag_pipeline.get_embeddings)
+    index_root = tempfile.mkdtemp(prefix="multi_remote_")
+    try:
+        vector_backend.VECTOR_BACKEND = "remote"
+        vector_backend._backend = remote
+        rag_pipeline.INDEX_ROOT = index_root
+        rag_pipeline.get_embeddings = lambda model_name=rag_pipeline.EMBED_MODEL: EMBEDDINGS
+        _ask_two_videos()
+    finally:
+        vector_backend.VECTOR_BACKEND, vector_backend._backend, rag_pipeline.INDEX_ROOT, rag_pipeline.get_embeddings = saved
+        rag_pipeline._open_indexes.clear()
+        shutil.rmtree(index_root, ignore_errors=True)
+
+
+def main():
+    tests = [(name, fn) for name, fn in sorted(globals().items()) if name.startswith("test_") and callable(fn)]
+    failed = 0
+    for name, fn in tests:
+        try:
+            fn()
+            print(f"✅ PASS - {name}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ FAIL - {name}: {type(e).__name__}: {e}")
+
+    print(f"\nTotal: {len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
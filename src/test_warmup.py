@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Tests for warm-start preloading: recency-weighted manifest ranking, the
+memory cap, no re-ingest unless WARM_INGEST is set, and a startup that
+never waits for the manifest. Runs offline. Run directly or with pytest:
+    python test_warmup.py
+    pytest test_warmup.py
+"""
+
+import sys
+import os
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import json
+import shutil
+import tempfile
+import threading
+import time
+import ingest_jobs
+import mem_profile
+import rag_pipeline
+import warmup
+
+NOW = 1_700_000_000.0
+DAY = 86400
+
+_saved = None
+_root = None
+
+
+def setup_module(module=None):
+    global _saved, _root
+    _saved = (
+        warmup.ACCESS_LOG, warmup.WARM_INGEST, warmup.WARM_BUNDLE_DIR, warmup.ENABLED, warmup.load_manifest,
+        warmup._warm_video, mem_profile.rss_mb, ingest_jobs.submit_ingest, rag_pipeline.INDEX_ROOT,
+    )
+    _root = tempfile.mkdtemp(prefix="warmup_")
+    warmup.ACCESS_LOG = os.path.join(_root, "access_log.jsonl")
+    warmup.WARM_BUNDLE_DIR = None
+    rag_pipeline.INDEX_ROOT = os.path.join(_root, "indexes")
+
+
+def teardown_module(module=None):
+    (
+        warmup.ACCESS_LOG, warmup.WARM_INGEST, warmup.WARM_BUNDLE_DIR, warmup.ENABLED, warmup.load_manifest,
+        warmup._warm_video, mem_profile.rss_mb, ingest_jobs.submit_ingest, rag_pipeline.INDEX_ROOT,
+    ) = _saved
+    _reset_warmup()
+    shutil.rmtree(_root, ignore_errors=True)
+
+
+def _reset_warmup():
+    """Forget any earlier warm-up in this process."""
+    warmup._thread = None
+    warmup._ready.clear()
+    warmup._set_status(state=warmup.IDLE, total=0, done=0, warmed=[], skipped=[], started_at=None, seconds=None)
+
+
+def _write_log(path: str, accesses):
+    with open(path, "w", encoding="utf-8") as f:
+        for video_id, age_days in accesses:
+            f.write(json.dumps({"time": NOW - age_days * DAY, "video_id": video_id, "event": "ask"}) + "\n")
+
+
+# ----------------------------------------------------------
+# Manifest
+# ----------------------------------------------------------
+def test_recent_accesses_outrank_older_ones():
+    log_path = os.path.join(_root, "ranking.jsonl")
+    # 5 hits 9 days ago (3 half-lives) count less than 2 hits today
+    _write_log(log_path, [("old-favourite", 9)] * 5 + [("new-hit", 0)] * 2 + [("one-off", 1)])
+    manifest = warmup.build_manifest(log_path, top_n=10, now=NOW)
+
+    assert [entry["video_id"] for entry in manifest["videos"]] == ["new-hit", "one-off", "old-favourite"]
+    scores = {entry["video_id"]: entry["score"] for entry in manifest["videos"]}
+    assert abs(scores["new-hit"] - 2.0) < 1e-3
+    assert abs(scores["old-favourite"] - 5 * 0.125) < 1e-3
+    assert {entry["video_id"]: entry["hits"] for entry in manifest["videos"]}["old-favourite"] == 5
+
+
+def test_manifest_reads_the_rotated_log_and_drops_stale_accesses():
+    log_path = os.path.join(_root, "rotated.jsonl")
+    _write_log(log_path + ".1", [("rotated", 2), ("stale", warmup.WINDOW_DAYS + 1)])
+    _write_log(log_path, [("current", 1), ("also-current", 1)])
+    with open(log_path, "a", encoding="utf-8") as f:
+        f.write('{"time": 17000')   # Partial line from a crash
+
+    manifest = warmup.build_manifest(log_path, top_n=2, now=NOW)
+    assert [entry["video_id"] for entry in manifest["videos"]] == ["current", "also-current"]
+
+    manifest = warmup.build_manifest(log_path, top_n=10, now=NOW)
+    assert {entry["video_id"] for entry in manifest["videos"]} == {"current", "also-current", "rotated"}
+
+
+# ----------------------------------------------------------
+# Memory cap
+# ----------------------------------------------------------
+def test_warmup_stops_at_the_memory_cap():
+    _reset_warmup()
+    rss = iter([100.0, 100.0, 600.0])
+    mem_profile.rss_mb = lambda: next(rss, 600.0)
+    warmed = []
+    warmup._warm_video = lambda video_id, max_rss_mb: warmed.append(video_id) or True
+    try:
+        status = warmup.run_warmup(["first", "second", "third", "fourth"], max_rss_mb=500)
+    finally:
+        mem_profile.rss_mb, warmup._warm_video = _saved[6], _saved[5]
+
+    assert warmed == ["first", "second"]
+    assert status["state"] == warmup.CAPPED
+    assert status["warmed"] == ["first", "second"] and status["done"] == 2
+    assert status["ready"] and warmup.is_ready()
+
+
+def test_no_cap_warms_everything():
+    _reset_warmup()
+    warmup._warm_video = lambda video_id, max_rss_mb: video_id != "broken"
+    try:
+        status = warmup.run_warmup(["first", "broken", "third"], max_rss_mb=0)
+    finally:
+        warmup._warm_video = _saved[5]
+
+    assert status["state"] == warmup.READY
+    assert status["warmed"] == ["first", "third"] and status["skipped"] == ["broken"]
+
+
+# ----------------------------------------------------------
+# Re-ingesting is opt-in
+# ----------------------------------------------------------
+def test_videos_without_an_index_are_not_ingested_by_default():
+    submitted = []
+    ingest_jobs.submit_ingest = lambda video_id, **kwargs: submitted.append(video_id)
+    warmup.WARM_INGEST = False
+    try:
+        assert warmup._ensure_index("never-ingested") is False
+        status = warmup.run_warmup(["never-ingested"], max_rss_mb=0)
+    finally:
+        ingest_jobs.submit_ingest, warmup.WARM_INGEST = _saved[7], _saved[1]
+
+    assert submitted == []
+    assert status["skipped"] == ["never-ingested"]
+
+
+def test_ingest_only_with_warm_ingest():
+    submitted = []
+    ingest_jobs.submit_ingest = lambda video_id, **kwargs: submitted.append(video_id) or "missing-job"
+    warmup.WARM_INGEST = True
+    try:
+        assert warmup._ensure_index("manual-pasted", max_rss_mb=0) is False
+        assert warmup._ensure_index("fetchable", max_rss_mb=0) is False    # Job is unknown
+    finally:
+        ingest_jobs.submit_ingest, warmup.WARM_INGEST = _saved[7], _saved[1]
+
+    assert submitted == ["fetchable"]
+
+
+# ----------------------------------------------------------
+# Startup
+# ----------------------------------------------------------
+def test_startup_does_not_wait_for_the_manifest():
+    _reset_warmup()
+    release = threading.Event()
+
+    def slow_manifest(path):
+        release.wait(10)
+        return []
+
+    warmup.ENABLED = True
+    warmup.load_manifest = slow_manifest
+    try:
+        started = time.perf_counter()
+        thread = warmup.start_warmup(os.path.join(_root, "missing-manifest.json"))
+        assert time.perf_counter() - started < 1
+        assert thread is not None
+
+        # Status (and the lock behind it) stay available while the manifest is built
+        status = warmup.warm_status()
+        assert status["state"] == warmup.WARMING and not status["ready"]
+        assert warmup.start_warmup() is thread
+
+        release.set()
+        thread.join(10)
+    finally:
+        release.set()
+        warmup.ENABLED, warmup.load_manifest = _saved[3], _saved[4]
+
+    assert warmup.is_ready()
+    assert warmup.warm_status()["state"] == warmup.READY
+
+
+def test_startup_warms_the_manifest_videos():
+    _reset_warmup()
+    manifest_path = os.path.join(_root, "manifest.json")
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump({"videos": [{"video_id": "hot-1"}, {"video_id": "hot-2"}]}, f)
+
+    warmed = []
+    warmup.ENABLED = True
+    warmup._warm_video = lambda video_id, max_rss_mb: warmed.append(video_id) or True
+    try:
+        warmup.start_warmup(manifest_path).join(10)
+    finally:
+        warmup.ENABLED, warmup._warm_video = _saved[3], _saved[5]
+
+    assert warmed == ["hot-1", "hot-2"]
+    assert warmup.warm_status()["warmed"] == ["hot-1", "hot-2"]
+
+
+def main():
+    tests = [(name, fn) for name, fn in sorted(globals().items()) if name.startswith("test_") and callable(fn)]
+    failed = 0
+    setup_module()
+    try:
+        for name, fn in tests:
+            try:
+                fn()
+                print(f"✅ PASS - {name}")
+            except Exception as e:
+                failed += 1
+                print(f"❌ FAIL - {name}: {type(e).__name__}: {e}")
+    finally:
+        teardown_module()
+
+    print(f"\nTotal: {len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,14 @@
 # utils.py
 
+import html
+import os
 import re
 import requests
 import time
-from typing import Optional, Tuple
+from typing import Callable, List, Optional, Tuple
 import json
+import mem_profile
+import telemetry
 
 # ----------------------------------------------------------
 # Extract YouTube Video ID
@@ -24,38 +28,157 @@ def extract_video_id(url: str) -> Optional[str]:
     return None
 
 
+# ----------------------------------------------------------
+# Provider configuration
+# ----------------------------------------------------------
+PROVIDER_DELAY = float(os.getenv("TRANSCRIPT_PROVIDER_DELAY", "2"))   # Seconds between fallback methods
+CAPTION_DELAY = float(os.getenv("TRANSCRIPT_CAPTION_DELAY", "1"))     # Seconds between watch page and captions
+PROVIDER_TIMEOUT = float(os.getenv("TRANSCRIPT_PROVIDER_TIMEOUT", "10"))
+
+TRANSCRIPT_SERVICES = [
+    "https://youtube-transcript-api.onrender.com/transcript?video_id={video_id}",
+    "https://yt-transcript-api.vercel.app/api/transcript?videoId={video_id}",
+]
+BROWSER_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+
+# All provider HTTP requests go through this callable (requests.get by
+# default) so recorded traffic can be replayed offline; see http_replay.py
+_http_transport: Callable = requests.get
+
+
+def set_http_transport(transport: Optional[Callable] = None) -> Callable:
+    """
+    Route provider HTTP requests through a requests.get-compatible callable.
+
+    Args:
+        transport: Callable taking (url, **kwargs) and returning a response
+            with status_code, text, headers and json(); None restores
+            requests.get
+
+    Returns:
+        The previous transport, so callers can restore it
+    """
+    global _http_transport
+    previous = _http_transport
+    _http_transport = transport or requests.get
+    return previous
+
+
+def _http_get(url: str, **kwargs):
+    return _http_transport(url, **kwargs)
+
+
+# ----------------------------------------------------------
+# Provider response parsing (pure functions, no network)
+# ----------------------------------------------------------
+def parse_service_transcript(data) -> Optional[str]:
+    """
+    Extract transcript text from a third-party transcript service response.
+
+    Handles {"text": ...}, {"transcript": [...]} and bare lists of entries,
+    where entries are {"text": ...}, {"snippet": {"text": ...}} or strings.
+    """
+    if isinstance(data, dict):
+        if 'transcript' in data:
+            transcript_data = data['transcript']
+        elif 'text' in data:
+            return data['text'] or None
+        else:
+            transcript_data = data
+    else:
+        transcript_data = data
+    
+    if not isinstance(transcript_data, list):
+        return None
+    
+    chunks = []
+    for entry in transcript_data:
+        if isinstance(entry, dict):
+            text = entry.get('text', '') or entry.get('snippet', {}).get('text', '')
+        else:
+            text = str(entry)
+        if text:
+            chunks.append(text.strip())
+    
+    return " ".join(chunks).strip() or None
+
+
+def parse_library_entries(entries: List[dict]) -> Optional[str]:
+    """Join the entries returned by youtube-transcript-api into one transcript."""
+    chunks = [entry['text'].strip() for entry in entries if entry.get('text')]
+    return " ".join(chunks).strip() or None
+
+
+def parse_caption_tracks(page_html: str) -> Optional[List[dict]]:
+    """
+    Find the caption track list embedded in a YouTube watch page.
+
+    Returns:
+        List of caption track dicts, or None if the page has none
+    
+    Raises:
+        json.JSONDecodeError: If the embedded track list is malformed
+    """
+    match = re.search(r'"captionTracks":\s*(\[.*?\])', page_html)
+    if not match:
+        return None
+    return json.loads(match.group(1))
+
+
+def select_caption_url(caption_tracks: List[dict], language: str = "en") -> Optional[str]:
+    """Pick the caption URL for a language, falling back to the first track."""
+    for track in caption_tracks:
+        if 'baseUrl' in track and track.get('languageCode', '').startswith(language):
+            return track['baseUrl']
+    
+    if caption_tracks:
+        return caption_tracks[0].get('baseUrl')
+    return None
+
+
+def parse_timedtext_xml(xml: str) -> Optional[str]:
+    """Extract caption text from a timedtext XML document."""
+    texts = re.findall(r'<text[^>]*>(.*?)</text>', xml, re.DOTALL)
+    cleaned_texts = [html.unescape(text.strip()) for text in texts]
+    return " ".join(text for text in cleaned_texts if text) or None
+
+
 # ----------------------------------------------------------
 # Fetch transcript with multiple fallback methods
 # ----------------------------------------------------------
-def get_transcript(video_id: str, preferred_languages: list = None) -> Tuple[Optional[str], Optional[str]]:
+@mem_profile.profiled("get_transcript")
+def get_transcript(
+    video_id: str,
+    preferred_languages: list = None,
+    providers: Optional[List[Callable]] = None,
+) -> Tuple[Optional[str], Optional[str]]:
     """
     Fetch transcript using multiple methods to avoid rate limiting.
     
     Args:
         video_id: YouTube video ID
         preferred_languages: List of language codes
+        providers: Fetch methods to try in order (defaults to PROVIDERS)
     
     Returns:
         Tuple of (transcript_text, detected_language_code) or (None, None)
     """
     print(f"🔍 Fetching transcript for video: {video_id}")
     
-    # Method 1: Try YouTube Transcript API (third-party service) - No rate limit
-    transcript, lang = _fetch_from_youtube_transcript_api_service(video_id)
-    if transcript:
-        return transcript, lang
-    
-    # Method 2: Try youtube-transcript-api library (with delays)
-    time.sleep(2)
-    transcript, lang = _fetch_from_youtube_library(video_id)
-    if transcript:
-        return transcript, lang
-    
-    # Method 3: Try direct YouTube API
-    time.sleep(2)
-    transcript, lang = _fetch_direct_from_youtube(video_id)
-    if transcript:
-        return transcript, lang
+    for i, provider in enumerate(providers or PROVIDERS):
+        if i > 0 and PROVIDER_DELAY > 0:
+            time.sleep(PROVIDER_DELAY)
+        name = provider.__name__.replace("_fetch_from_", "").replace("_fetch_", "")
+        with telemetry.span("fetch", provider=name) as span:
+            transcript, lang = provider(video_id)
+            span.set(chars=len(transcript or ""))
+            if not transcript:
+                span.status = "failed"
+        if transcript:
+            return transcript, lang
     
     return None, None
 
@@ -65,59 +188,26 @@ def _fetch_from_youtube_transcript_api_service(video_id: str) -> Tuple[Optional[
     Fetch from free third-party transcript API service.
     This service acts as a proxy and helps avoid rate limiting.
     """
-    try:
-        print("📥 Trying YouTube Transcript API service...")
-        
-        # Try multiple free transcript services
-        services = [
-            f"https://youtube-transcript-api.onrender.com/transcript?video_id={video_id}",
-            f"https://yt-transcript-api.vercel.app/api/transcript?videoId={video_id}",
-        ]
-        
-        for service_url in services:
-            try:
-                response = requests.get(service_url, timeout=10)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    
-                    # Handle different response formats
-                    if isinstance(data, dict):
-                        if 'transcript' in data:
-                            transcript_data = data['transcript']
-                        elif 'text' in data:
-                            return data['text'], 'en'
-                        else:
-                            transcript_data = data
-                    else:
-                        transcript_data = data
-                    
-                    # Extract text
-                    if isinstance(transcript_data, list):
-                        chunks = []
-                        for entry in transcript_data:
-                            if isinstance(entry, dict):
-                                text = entry.get('text', '') or entry.get('snippet', {}).get('text', '')
-                            else:
-                                text = str(entry)
-                            if text:
-                                chunks.append(text.strip())
-                        
-                        final_transcript = " ".join(chunks).strip()
-                        
-                        if final_transcript:
-                            print(f"✅ Transcript fetched via API service ({len(final_transcript)} chars)")
-                            return final_transcript, 'en'
+    print("📥 Trying YouTube Transcript API service...")
+    
+    # Try multiple free transcript services
+    for service_url in TRANSCRIPT_SERVICES:
+        try:
+            response = _http_get(service_url.format(video_id=video_id), timeout=PROVIDER_TIMEOUT)
+            
+            if response.status_code == 200:
+                with telemetry.span("normalize", provider="service"):
+                    final_transcript = parse_service_transcript(response.json())
                 
-            except Exception as e:
-                continue
-        
-        print("⚠️ API services unavailable")
-        return None, None
+                if final_transcript:
+                    print(f"✅ Transcript fetched via API service ({len(final_transcript)} chars)")
+                    return final_transcript, 'en'
         
-    except Exception as e:
-        print(f"⚠️ API service error: {str(e)[:50]}")
-        return None, None
+        except Exception:
+            continue
+    
+    print("⚠️ API services unavailable")
+    return None, None
 
 
 def _fetch_from_youtube_library(video_id: str) -> Tuple[Optional[str], Optional[str]]:
@@ -133,8 +223,8 @@ def _fetch_from_youtube_library(video_id: str) -> Tuple[Optional[str], Optional[
             transcript_list = YouTubeTranscriptApi.get_transcript(video_id, languages=['en'])
             
             if transcript_list:
-                chunks = [entry['text'].strip() for entry in transcript_list if entry.get('text')]
-                final_transcript = " ".join(chunks).strip()
+                with telemetry.span("normalize", provider="library"):
+                    final_transcript = parse_library_entries(transcript_list)
                 
                 if final_transcript:
                     print(f"✅ Library fetch successful ({len(final_transcript)} chars)")
@@ -170,68 +260,37 @@ def _fetch_direct_from_youtube(video_id: str) -> Tuple[Optional[str], Optional[s
         
         # Get video page to find caption tracks
         video_url = f"https://www.youtube.com/watch?v={video_id}"
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'Accept-Language': 'en-US,en;q=0.9',
-        }
-        
-        response = requests.get(video_url, headers=headers, timeout=10)
+        response = _http_get(video_url, headers=BROWSER_HEADERS, timeout=PROVIDER_TIMEOUT)
         
         if response.status_code != 200:
             return None, None
         
-        # Look for caption tracks in the page
-        content = response.text
-        
-        # Find captionTracks in the page source
-        caption_track_pattern = r'"captionTracks":\s*(\[.*?\])'
-        match = re.search(caption_track_pattern, content)
+        try:
+            caption_tracks = parse_caption_tracks(response.text)
+        except json.JSONDecodeError:
+            print("⚠️ Could not parse caption data")
+            return None, None
         
-        if not match:
+        if not caption_tracks:
             print("⚠️ No caption tracks found")
             return None, None
         
-        try:
-            caption_tracks = json.loads(match.group(1))
-            
-            # Try to find English caption
-            caption_url = None
-            for track in caption_tracks:
-                if 'baseUrl' in track:
-                    lang_code = track.get('languageCode', '')
-                    if lang_code.startswith('en'):
-                        caption_url = track['baseUrl']
-                        break
-            
-            # If no English, take first available
-            if not caption_url and caption_tracks:
-                caption_url = caption_tracks[0].get('baseUrl')
-            
-            if caption_url:
-                # Fetch the captions
-                time.sleep(1)
-                caption_response = requests.get(caption_url, headers=headers, timeout=10)
-                
-                if caption_response.status_code == 200:
-                    # Parse XML captions
-                    caption_text = caption_response.text
-                    
-                    # Extract text from XML
-                    text_pattern = r'<text[^>]*>(.*?)</text>'
-                    texts = re.findall(text_pattern, caption_text, re.DOTALL)
-                    
-                    if texts:
-                        # Clean up HTML entities
-                        import html
-                        cleaned_texts = [html.unescape(text.strip()) for text in texts]
-                        final_transcript = " ".join(cleaned_texts)
-                        
-                        if final_transcript:
-                            print(f"✅ Direct API fetch successful ({len(final_transcript)} chars)")
-                            return final_transcript, 'en'
+        caption_url = select_caption_url(caption_tracks)
+        if not caption_url:
+            return None, None
         
-        except json.JSONDecodeError:
-            print("⚠️ Could not parse caption data")
+        # Fetch the captions
+        if CAPTION_DELAY > 0:
+            time.sleep(CAPTION_DELAY)
+        caption_response = _http_get(caption_url, headers=BROWSER_HEADERS, timeout=PROVIDER_TIMEOUT)
+        
+        if caption_response.status_code == 200:
+            with telemetry.span("normalize", provider="timedtext"):
+                final_transcript = parse_timedtext_xml(caption_response.text)
+            
+            if final_transcript:
+                print(f"✅ Direct API fetch successful ({len(final_transcript)} chars)")
+                return final_transcript, 'en'
         
         return None, None
         
@@ -240,6 +299,14 @@ def _fetch_direct_from_youtube(video_id: str) -> Tuple[Optional[str], Optional[s
         return None, None
 
 
+# Fallback order used by get_transcript
+PROVIDERS = [
+    _fetch_from_youtube_transcript_api_service,
+    _fetch_from_youtube_library,
+    _fetch_direct_from_youtube,
+]
+
+
 def _get_language_name(lang_code: str) -> str:
     """Get human-readable language name from code."""
     language_map = {
@@ -277,7 +344,7 @@ def _fetch_from_getproxytube(video_id: str) -> Optional[str]:
     
     try:
         print("🔄 Trying GetProxyTube API...")
-        resp = requests.get(url, timeout=15, headers=headers, allow_redirects=True)
+        resp = _http_get(url, timeout=15, headers=headers, allow_redirects=True)
         
         content_type = resp.headers.get("Content-Type", "")
         if resp.status_code == 200 and "application/json" in content_type:
@@ -293,4 +360,21 @@ def _fetch_from_getproxytube(video_id: str) -> Optional[str]:
     except:
         pass
     
-    return None
\ No newline at end of file
+    return None
+
+# ----------------------------------------------------------
+# LLM response helpers
+# ----------------------------------------------------------
+def extract_response_text(response) -> str:
+    """Extract text from an LLM response (string or chat message)."""
+    if isinstance(response, str):
+        return response.strip()
+    elif hasattr(response, "content"):
+        return response.content.strip()
+    else:
+        return str(response).strip()
+
+
+def llm_model_name(llm) -> str:
+    """Name of the model behind an LLM client, for cache and request keys."""
+    return str(getattr(llm, "model", None) or getattr(llm, "model_name", None) or type(llm).__name__)
@@ -0,0 +1,326 @@
+# vector_backend.py
+"""
+Pluggable vector store backends.
+
+A backend stores named collections of (id, vector, document, metadata)
+records and supports add, batched top-k queries with distances, get by ID
+(or metadata filter) and collection deletion. Two implementations:
+
+    LocalBackend    in-process Chroma, one persisted database per index
+                    directory (the layout rag_pipeline has always used)
+    RemoteBackend   client for index_server.py, a small HTTP service that
+                    lets several app replicas share indexes
+
+Collections are named "<index_id>/<collection>", e.g. "aircAruvnKk/langchain"
+for a video's chunks and "aircAruvnKk/summary_tree" for its summary tree.
+
+rag_pipeline talks to a backend through BackendStore, which provides the
+parts of LangChain's Chroma interface the pipeline uses.
+
+Configuration:
+    VECTOR_BACKEND=local|remote          default local
+    INDEX_SERVER_URL=http://host:port    index server for the remote backend
+"""
+
+import os
+import re
+import threading
+import uuid
+from typing import Any, Dict, List, Optional, Protocol, Sequence
+
+# Configuration
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "local")
+INDEX_SERVER_URL = os.getenv("INDEX_SERVER_URL", "http://127.0.0.1:8765")
+DEFAULT_COLLECTION = "langchain"     # LangChain's default Chroma collection name
+POOL_SIZE = 16                       # Keep-alive connections per remote backend
+QUERY_BATCH_SIZE = 64                # Query vectors per request
+REQUEST_TIMEOUT = 30
+REQUEST_RETRIES = 2
+
+_INDEX_ID_RE = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+# A query hit: {"id", "distance", "document", "metadata"}; lower distance is closer
+Hit = Dict[str, Any]
+
+
+class VectorBackend(Protocol):
+    def add(self, collection: str, ids: List[str], embeddings: Sequence[Sequence[float]],
+            documents: List[str], metadatas: List[dict]) -> None: ...
+
+    def query(self, collection: str, embeddings: Sequence[Sequence[float]], k: int,
+              where: Optional[dict] = None) -> List[List[Hit]]: ...
+
+    def get(self, collection: str, ids: Optional[List[str]] = None, where: Optional[dict] = None,
+            include: Sequence[str] = ("documents", "metadatas"), limit: Optional[int] = None,
+            offset: Optional[int] = None) -> Dict[str, list]: ...
+
+    def count(self, collection: str) -> int: ...
+
+    def delete_collection(self, collection: str) -> None: ...
+
+
+def collection_name(persist_dir: str, name: str = DEFAULT_COLLECTION) -> str:
+    """Backend collection name for a collection stored in an index directory."""
+    return f"{os.path.basename(os.path.normpath(persist_dir))}/{name}"
+
+
+def _split_collection(collection: str):
+    index_id, _, name = collection.partition("/")
+    name = name or DEFAULT_COLLECTION
+    if not _INDEX_ID_RE.match(index_id) or index_id in (".", "..") or not _INDEX_ID_RE.match(name):
+        raise ValueError(f"Invalid collection name {collection!r}")
+    return index_id, name
+
+
+def _hits(result: dict) -> List[List[Hit]]:
+    """Convert a Chroma query result into hit lists, one per query vector."""
+    return [
+        [
+            {"id": chunk_id, "distance": float(distance), "document": document, "metadata": metadata or {}}
+            for chunk_id, distance, document, metadata in zip(ids, distances, documents, metadatas)
+        ]
+        for ids, distances, documents, metadatas in zip(
+            result["ids"], result["distances"], result["documents"], result["metadatas"]
+        )
+    ]
+
+
+# ----------------------------------------------------------
+# In-process backend
+# ----------------------------------------------------------
+class LocalBackend:
+    """Chroma in this process, with one persisted database per index ID under root."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self._stores: Dict[tuple, Any] = {}
+        self._lock = threading.Lock()
+
+    def _collection(self, collection: str):
+        index_id, name = _split_collection(collection)
+        with self._lock:
+            store = self._stores.get((index_id, name))
+            if store is None:
+                # Opened through LangChain so the Chroma client settings match
+                # the ones rag_pipeline uses for the same directory
+                from langchain_community.vectorstores import Chroma
+                store = Chroma(collection_name=name, persist_directory=os.path.join(self.root, index_id))
+                self._stores[(index_id, name)] = store
+            return store._collection
+
+    def add(self, collection, ids, embeddings, documents, metadatas):
+        self._collection(collection).add(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+
+    def query(self, collection, embeddings, k, where=None):
+        target = self._collection(collection)
+        k = min(k, target.count())
+        if k <= 0:
+            return [[] for _ in embeddings]
+        result = target.query(
+            query_embeddings=embeddings,
+            n_results=k,
+            where=where or None,
+            include=["documents", "metadatas", "distances"],
+        )
+        return _hits(result)
+
+    def get(self, collection, ids=None, where=None, include=("documents", "metadatas"), limit=None, offset=None):
+        result = self._collection(collection).get(
+            ids=ids, where=where or None, include=list(include), limit=limit, offset=offset,
+        )
+        return {key: result[key] for key in ["ids", *include]}
+
+    def count(self, collection):
+        return self._collection(collection).count()
+
+    def delete_collection(self, collection):
+        index_id, name = _split_collection(collection)
+        with self._lock:
+            store = self._stores.pop((index_id, name), None)
+        if store is None:
+            if not os.path.exists(os.path.join(self.root, index_id)):
+                return
+            from langchain_community.vectorstores import Chroma
+            store = Chroma(collection_name=name, persist_directory=os.path.join(self.root, index_id))
+        store.delete_collection()
+
+
+# ----------------------------------------------------------
+# Remote backend
+# ----------------------------------------------------------
+class RemoteBackend:
+    """
+    Client for index_server.py.
+
+    Requests share a pool of keep-alive connections, and queries with many
+    vectors are sent QUERY_BATCH_SIZE vectors per request.
+    """
+
+    def __init__(self, base_url: str = INDEX_SERVER_URL, pool_size: int = POOL_SIZE, timeout: float = REQUEST_TIMEOUT):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        retry = Retry(
+            total=REQUEST_RETRIES,
+            backoff_factor=0.2,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=None,  # Adds use client-side IDs, so every call can be retried
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _call(self, operation: str, **payload) -> Any:
+        response = self.session.post(f"{self.base_url}/v1/{operation}", json=payload, timeout=self.timeout)
+        if response.status_code >= 400:
+            try:
+                message = response.json().get("error", response.text)
+            except ValueError:
+                message = response.text
+            raise RuntimeError(f"Index server {operation} failed ({response.status_code}): {message}")
+        return response.json()
+
+    def add(self, collection, ids, embeddings, documents, metadatas):
+        self._call(
+            "add", collection=collection, ids=list(ids), embeddings=_as_lists(embeddings),
+            documents=list(documents), metadatas=list(metadatas),
+        )
+
+    def query(self, collection, embeddings, k, where=None):
+        embeddings = _as_lists(embeddings)
+        hits = []
+        for start in range(0, len(embeddings), QUERY_BATCH_SIZE):
+            hits.extend(self._call(
+                "query", collection=collection, embeddings=embeddings[start:start + QUERY_BATCH_SIZE], k=k, where=where,
+            )["hits"])
+        return hits
+
+    def get(self, collection, ids=None, where=None, include=("documents", "metadatas"), limit=None, offset=None):
+        return self._call(
+            "get", collection=collection, ids=ids, where=where, include=list(include), limit=limit, offset=offset,
+        )
+
+    def count(self, collection):
+        return self._call("count", collection=collection)["count"]
+
+    def delete_collection(self, collection):
+        self._call("delete", collection=collection)
+
+    def close(self):
+        self.session.close()
+
+
+def _as_lists(embeddings) -> List[List[float]]:
+    return embeddings.tolist() if hasattr(embeddings, "tolist") else [list(map(float, vector)) for vector in embeddings]
+
+
+_backend: Optional[VectorBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_backend() -> Optional[VectorBackend]:
+    """
+    The shared backend configured by VECTOR_BACKEND/INDEX_SERVER_URL (one
+    per process), or None when indexes are local Chroma directories.
+    """
+    global _backend
+    if VECTOR_BACKEND != "remote":
+        return None
+    with _backend_lock:
+        if _backend is None:
+            _backend = RemoteBackend(INDEX_SERVER_URL)
+        return _backend
+
+
+# ----------------------------------------------------------
+# Vector store over a backend
+# ----------------------------------------------------------
+class BackendCollection:
+    """The parts of a Chroma collection the pipeline uses, over a backend."""
+
+    def __init__(self, backend: VectorBackend, name: str):
+        self.backend = backend
+        self.name = name
+
+    def add(self, ids, embeddings, documents, metadatas):
+        self.backend.add(self.name, ids, embeddings, documents, metadatas)
+
+    def count(self) -> int:
+        return self.backend.count(self.name)
+
+    def get(self, ids=None, where=None, include=("documents", "metadatas"), limit=None, offset=None) -> Dict[str, list]:
+        return self.backend.get(self.name, ids=ids, where=where, include=include, limit=limit, offset=offset)
+
+    def query(self, query_embeddings, n_results: int, where=None,
+              include=("documents", "metadatas", "distances")) -> Dict[str, list]:
+        """Top-k records per query vector, shaped like a Chroma query result."""
+        results = self.backend.query(self.name, query_embeddings, n_results, where=where)
+        result = {
+            "ids": [[hit["id"] for hit in hits] for hits in results],
+            "documents": [[hit["document"] for hit in hits] for hits in results],
+            "metadatas": [[hit["metadata"] for hit in hits] for hits in results],
+            "distances": [[hit["distance"] for hit in hits] for hits in results],
+        }
+        if "embeddings" in include:
+            # Hits don't carry vectors; fetch them in one call for all queries
+            ids = list({chunk_id for ids in result["ids"] for chunk_id in ids})
+            found = self.backend.get(self.name, ids=ids, include=["embeddings"]) if ids else {"ids": [], "embeddings": []}
+            vectors = dict(zip(found["ids"], found["embeddings"]))
+            result["embeddings"] = [[vectors[chunk_id] for chunk_id in ids] for ids in result["ids"]]
+        return {key: result[key] for key in ["ids", *include]}
+
+
+class BackendStore:
+    """
+    Vector store over a VectorBackend, standing in for LangChain's Chroma
+    where rag_pipeline creates one.
+
+    Index metadata (index.json, summary, coarse layer) still lives in
+    persist_directory, so with several replicas that directory should be
+    on a shared volume.
+    """
+
+    def __init__(self, backend: VectorBackend, collection: str, embedding_function, persist_directory: str):
+        self._collection = BackendCollection(backend, collection)
+        self._embedding_function = embedding_function
+        self._persist_directory = persist_directory
+
+    def persist(self):
+        pass  # The backend persists every add
+
+    def add_texts(self, texts: List[str], metadatas: Optional[List[dict]] = None) -> List[str]:
+        ids = [str(uuid.uuid4()) for _ in texts]
+        vectors = self._embedding_function.embed_documents(list(texts))
+        self._collection.add(ids, vectors, list(texts), metadatas or [{} for _ in texts])
+        return ids
+
+    def get(self, ids=None, where=None, include=("documents", "metadatas"), limit=None, offset=None) -> Dict[str, list]:
+        return self._collection.get(ids=ids, where=where, include=include, limit=limit, offset=offset)
+
+    def similarity_search_batch(self, queries: List[str], k: int = 4, filter: Optional[dict] = None) -> List[list]:
+        """Top-k documents for several queries in one backend call."""
+        from langchain_core.documents import Document
+
+        vectors = [self._embedding_function.embed_query(query) for query in queries]
+        results = self._collection.backend.query(self._collection.name, vectors, k, where=filter)
+        return [[Document(page_content=hit["document"], metadata=hit["metadata"]) for hit in hits] for hits in results]
+
+    def similarity_search(self, query: str, k: int = 4, filter: Optional[dict] = None) -> list:
+        return self.similarity_search_batch([query], k, filter)[0]
+
+    def as_retriever(self, search_type: str = "similarity", search_kwargs: Optional[dict] = None) -> "_Retriever":
+        return _Retriever(self, **(search_kwargs or {}))
+
+
+class _Retriever:
+    def __init__(self, store: BackendStore, k: int = 4, filter: Optional[dict] = None):
+        self.store = store
+        self.k = k
+        self.filter = filter
+
+    def invoke(self, query: str) -> list:
+        return self.store.similarity_search(query, self.k, self.filter)
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Warm-start preloading of popular videos.
+
+The app and API record which videos are used in an access log. A manifest
+of the hottest videos is derived from it (recent use counts more), and on
+startup a background thread preloads those videos into the process caches:
+    - the index is opened (or imported from a bundle if this node has none
+      yet; re-ingesting is opt-in)
+    - the embedding model it needs is loaded
+    - the coarse layer and precomputed summary are read
+
+Requests are served while warming; is_ready() / GET /ready report when it
+is done. Warming stops early once the process reaches the memory cap.
+Summaries are never generated while warming; they are built on first use.
+
+Configuration:
+    WARM_START=0              disable warm-up on startup
+    WARM_MANIFEST=path        manifest file (default ./warm_manifest.json);
+                              derived from the access log if missing
+    WARM_TOP_N=20             videos in a derived manifest
+    WARM_MAX_RSS_MB=4096      stop warming above this resident memory
+    WARM_BUNDLE_DIR=path      import <video_id>.ytrag from here for videos
+                              this node has no index for
+    WARM_INGEST=1             re-ingest videos with neither an index nor a
+                              bundle (fetches transcripts and embeds them)
+    ACCESS_LOG=path           access log (default ./access_log.jsonl)
+
+Usage:
+    python warmup.py manifest --top 50 --days 7
+    python warmup.py run
+"""
+
+import sys
+import os
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import argparse
+import json
+import threading
+import time
+from collections import defaultdict
+from typing import List, Optional
+import mem_profile
+
+# Configuration
+ENABLED = os.getenv("WARM_START", "1") != "0"
+ACCESS_LOG = os.getenv("ACCESS_LOG", "./access_log.jsonl")
+ACCESS_LOG_MAX_BYTES = 20 * 1024 * 1024     # Rotated to ACCESS_LOG + ".1" above this
+WARM_MANIFEST = os.getenv("WARM_MANIFEST", "./warm_manifest.json")
+WARM_TOP_N = int(os.getenv("WARM_TOP_N", "20"))
+WARM_MAX_RSS_MB = float(os.getenv("WARM_MAX_RSS_MB", "4096"))
+WARM_BUNDLE_DIR = os.getenv("WARM_BUNDLE_DIR")
+WARM_INGEST = os.getenv("WARM_INGEST") == "1"
+WINDOW_DAYS = 14            # Accesses older than this are ignored
+HALF_LIFE_DAYS = 3.0        # An access this old counts half
+INGEST_TIMEOUT = 600        # Seconds to wait for a warm-up ingest
+
+# Warm-up states
+IDLE = "idle"
+WARMING = "warming"
+READY = "ready"
+CAPPED = "capped"           # Stopped at the memory cap; serving anyway
+FAILED = "failed"
+
+_log_lock = threading.Lock()
+_status_lock = threading.Lock()
+_status = {"state": IDLE, "total": 0, "done": 0, "warmed": [], "skipped": [], "started_at": None, "seconds": None}
+_ready = threading.Event()
+_thread: Optional[threading.Thread] = None
+
+
+# ----------------------------------------------------------
+# Access log and manifest
+# ----------------------------------------------------------
+def record_access(video_id: str, event: str = "ask"):
+    """Append a video access to the access log. Never raises."""
+    if not video_id:
+        return
+    line = json.dumps({"time": time.time(), "video_id": video_id, "event": event})
+    try:
+        with _log_lock:
+            if os.path.exists(ACCESS_LOG) and os.path.getsize(ACCESS_LOG) > ACCESS_LOG_MAX_BYTES:
+                os.replace(ACCESS_LOG, ACCESS_LOG + ".1")
+            with open(ACCESS_LOG, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+    except OSError as e:
+        print(f"⚠️ Could not record access: {e}")
+
+
+def build_manifest(
+    log_path: str = ACCESS_LOG,
+    top_n: int = WARM_TOP_N,
+    window_days: float = WINDOW_DAYS,
+    now: Optional[float] = None,
+) -> dict:
+    """
+    Rank videos by recency-weighted accesses in the log (and its rotated
+    predecessor).
+
+    Returns:
+        Manifest: {"created_at", "videos": [{"video_id", "score", "hits"}]}
+    """
+    now = now or time.time()
+    scores = defaultdict(float)
+    hits = defaultdict(int)
+
+    for path in (log_path + ".1", log_path):
+        if not os.path.exists(path):
+            continue
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    age_days = (now - float(entry["time"])) / 86400
+                    video_id = entry["video_id"]
+                except (ValueError, KeyError, TypeError):
+                    continue  # Partial line from a crash
+                if age_days > window_days:
+                    continue
+                scores[video_id] += 0.5 ** (max(age_days, 0.0) / HALF_LIFE_DAYS)
+                hits[video_id] += 1
+
+    ranked = sorted(scores, key=lambda video_id: scores[video_id], reverse=True)[:top_n]
+    return {
+        "created_at": now,
+        "videos": [{"video_id": v, "score": round(scores[v], 3), "hits": hits[v]} for v in ranked],
+    }
+
+
+def load_manifest(path: str = WARM_MANIFEST) -> List[str]:
+    """Video IDs to warm, hottest first: from the manifest, or derived from the access log."""
+    if os.path.exists(path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                return [entry["video_id"] for entry in json.load(f)["videos"]]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"⚠️ Ignoring warm manifest {path}: {e}")
+    return [entry["video_id"] for entry in build_manifest()["videos"]]
+
+
+# ----------------------------------------------------------
+# Warm-up
+# ----------------------------------------------------------
+def _set_status(**fields):
+    with _status_lock:
+        _status.update(fields)
+
+
+def warm_status() -> dict:
+    """Progress of the warm-up, with "ready" once it has finished."""
+    with _status_lock:
+        status = json.loads(json.dumps(_status))
+    status["ready"] = _ready.is_set()
+    status["rss_mb"] = mem_profile.rss_mb()
+    return status
+
+
+def is_ready() -> bool:
+    return _ready.is_set()
+
+
+def wait_until_ready(timeout: Optional[float] = None) -> bool:
+    return _ready.wait(timeout)
+
+
+def _ensure_index(video_id: str, max_rss_mb: float = WARM_MAX_RSS_MB) -> bool:
+    """Make sure this node has an index for a video. Returns False if it can't."""
+    from ingest_jobs import DONE, FAILED as JOB_FAILED, get_job, submit_ingest
+    from rag_pipeline import index_exists
+
+    if index_exists(video_id):
+        return True
+
+    bundle = os.path.join(WARM_BUNDLE_DIR, f"{video_id}.ytrag") if WARM_BUNDLE_DIR else None
+    if bundle and os.path.exists(bundle):
+        from index_bundle import import_bundle
+        import_bundle(bundle, video_id)
+        return True
+
+    if not WARM_INGEST or video_id.startswith("manual-"):
+        return False  # Pasted transcripts can't be fetched again
+    if max_rss_mb and mem_profile.rss_mb() >= max_rss_mb:
+        return False
+
+    # One ingest at a time, so users' own ingests still get a worker. No
+    # llm: the summary is built when it is first asked for
+    job_id = submit_ingest(video_id)
+    deadline = time.time() + INGEST_TIMEOUT
+    while time.time() < deadline:
+        job = get_job(job_id)
+        if job is None or job.status == JOB_FAILED:
+            return False
+        if job.status == DONE:
+            return True
+        time.sleep(0.5)
+    return False
+
+
+def _warm_video(video_id: str, max_rss_mb: float = WARM_MAX_RSS_MB) -> bool:
+    """Load everything the first question about a video would need."""
+    from rag_pipeline import _get_coarse_index, get_embeddings, get_stored_summary, open_index
+
+    if not _ensure_index(video_id, max_rss_mb):
+        return False
+
+    vector_store = open_index(video_id)
+    if vector_store is None:
+        return False
+
+    model_name = getattr(vector_store._embedding_function, "model_name", None)
+    if model_name:
+        get_embeddings(model_name)
+    _get_coarse_index(vector_store)
+    get_stored_summary(vector_store, wait=False)
+    return True
+
+
+def run_warmup(video_ids: List[str], max_rss_mb: float = WARM_MAX_RSS_MB) -> dict:
+    """
+    Warm videos in order, stopping at the memory cap, then signal readiness.
+
+    Returns:
+        Final warm_status()
+    """
+    started = time.perf_counter()
+    _set_status(state=WARMING, total=len(video_ids), done=0, warmed=[], skipped=[], started_at=time.time())
+    state = READY
+    try:
+        for video_id in video_ids:
+            if max_rss_mb and mem_profile.rss_mb() >= max_rss_mb:
+                print(f"⚠️ Warm-up stopped at the {max_rss_mb:.0f} MB memory cap")
+                state = CAPPED
+                break
+
+            try:
+                warmed = _warm_video(video_id, max_rss_mb)
+            except Exception as e:
+                print(f"⚠️ Could not warm {video_id}: {e}")
+                warmed = False
+
+            with _status_lock:
+                _status["done"] += 1
+                _status["warmed" if warmed else "skipped"].append(video_id)
+    except Exception as e:
+        print(f"❌ Warm-up failed: {e}")
+        state = FAILED
+    finally:
+        _set_status(state=state, seconds=round(time.perf_counter() - started, 3))
+        _ready.set()
+
+    status = warm_status()
+    print(f"🔥 Warm-up {state}: {len(status['warmed'])}/{len(video_ids)} videos in {status['seconds']:.1f}s")
+    return status
+
+
+def _warm_from_manifest(manifest_path: str):
+    """Warm-up thread: read (or derive) the manifest, then warm its videos."""
+    try:
+        video_ids = load_manifest(manifest_path)
+    except Exception as e:
+        print(f"❌ Could not load the warm manifest: {e}")
+        _set_status(state=FAILED)
+        _ready.set()
+        return
+
+    if not video_ids:
+        _set_status(state=READY)
+        _ready.set()
+        return
+
+    print(f"🔥 Warming {len(video_ids)} popular videos in the background")
+    run_warmup(video_ids)
+
+
+def start_warmup(manifest_path: str = WARM_MANIFEST) -> Optional[threading.Thread]:
+    """
+    Start warming the manifest's videos on a background thread (once per
+    process). The manifest is read (or derived from the access log) on that
+    thread too, so startup never waits for it. Readiness is signalled
+    immediately with WARM_START=0, and by the thread when there is nothing
+    to warm.
+
+    Returns:
+        The warm-up thread, or None when warm-up is disabled
+    """
+    global _thread
+    with _status_lock:
+        if _thread is not None or _ready.is_set():
+            return _thread
+
+        if not ENABLED:
+            _status["state"] = READY
+            _ready.set()
+            return None
+
+        _status["state"] = WARMING
+        _thread = threading.Thread(target=_warm_from_manifest, args=(manifest_path,), name="warmup", daemon=True)
+
+    _thread.start()
+    return _thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the warm-start manifest or warm videos")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    manifest_parser = commands.add_parser("manifest", help="Derive the manifest from the access log")
+    manifest_parser.add_argument("--log", default=ACCESS_LOG, help="Access log to read")
+    manifest_parser.add_argument("--top", type=int, default=WARM_TOP_N, help="Videos to keep")
+    manifest_parser.add_argument("--days", type=float, default=WINDOW_DAYS, help="Only count accesses this recent")
+    manifest_parser.add_argument("--output", default=WARM_MANIFEST, help="Manifest file to write")
+
+    run_parser = commands.add_parser("run", help="Warm the manifest's videos in this process")
+    run_parser.add_argument("--manifest", default=WARM_MANIFEST)
+    args = parser.parse_args()
+
+    if args.command == "manifest":
+        manifest = build_manifest(args.log, args.top, args.days)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        print(f"💾 {len(manifest['videos'])} videos written to {args.output}")
+        return
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    run_warmup(load_manifest(args.manifest))
+
+
+if __name__ == "__main__":
+    main()